@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from . import cache, events, search
+
+        cache.connect_signals()
+        search.connect_signals()
+        events.connect_signals()
@@ -0,0 +1,21 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    # Discussion endpoints
+    path('discussions/', async_views.discussion_list_create, name='async-discussion-list-create'),
+    path('discussions/<int:pk>/', async_views.discussion_detail, name='async-discussion-detail'),
+
+    # Comment endpoints
+    path('comments/', async_views.comment_list_create, name='async-comment-list-create'),
+    path('comments/<int:pk>/', async_views.comment_detail, name='async-comment-detail'),
+
+    # Course Discussion endpoints
+    path('course-discussions/', async_views.course_discussion_list_create, name='async-course-discussion-list-create'),
+    path('course-discussions/<int:pk>/', async_views.course_discussion_detail, name='async-course-discussion-detail'),
+    path('course-discussions/<str:course_subject>/<str:course_id>/', async_views.course_discussion_by_course_info, name='async-course-discussion-by-course-info'),
+
+    # Course Comment endpoints
+    path('course-comments/', async_views.course_comment_list_create, name='async-course-comment-list-create'),
+    path('course-comments/<int:pk>/', async_views.course_comment_detail, name='async-course-comment-detail'),
+]
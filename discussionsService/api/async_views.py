@@ -0,0 +1,348 @@
+"""
+Native async versions of the list/detail endpoints, mounted under
+/api/async/ for ASGI deployments (discussionsService/asgi.py).
+
+Responses match the synchronous views in api/views.py: the same
+serializers, keyset pagination headers, conditional GET validators and
+course discussion cache. Reads use the async ORM (async iteration, aget,
+afirst), so a request waiting on the database does not hold a worker
+thread. Discussions are inserted with acreate; comment inserts also update
+the parent's counters inside transaction.atomic, which is sync-only, so
+that step runs as a single sync_to_async call.
+
+The comment event streams (Server-Sent Events, see api/events.py) are also
+async views, so under ASGI an open stream waits on the event loop instead
+of pinning a thread; they are routed from api/urls.py next to the resources
+they follow. Under WSGI they answer with a blocking stream instead, since a
+WSGI server cannot push an async generator.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import aprefetch_related_objects
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotAuthenticated, PermissionDenied
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+from base.tombstones import tombstones_for
+from discussionsService.db_router import PRIMARY
+from .cache import aget_course_discussion_data
+from .events import discussion_channel, stream_events, stream_events_sync
+from .conditional import acomment_validators, adiscussion_validators, not_modified_response
+from .pagination import KeysetCursorPagination
+from .renderers import render_json
+from .permissions import IsOwnerOrAdmin, IsStudent
+from .sync import ChangeSet, get_since
+from .serializers import (
+    DiscussionSerializer, CommentSerializer, CourseDiscussionSerializer, CourseCommentSerializer,
+    DiscussionSummarySerializer, CourseDiscussionSummarySerializer, cached_discussion_data,
+)
+from .views import (
+    comment_queryset, course_comment_queryset, course_discussion_queryset, discussion_queryset,
+    is_summary_request, save_comment,
+)
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    # same bytes as the renderer of the synchronous views
+    return HttpResponse(render_json(data), status=status, headers=headers, content_type='application/json')
+
+
+async def authenticate(request):
+    """
+    Run the configured authentication classes. Classes that provide an
+    ``aauthenticate`` coroutine are awaited directly; any others are run in
+    a thread so they cannot block the event loop.
+    """
+    for auth_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authenticator = auth_class()
+        if hasattr(authenticator, 'aauthenticate'):
+            result = await authenticator.aauthenticate(request)
+        else:
+            result = await sync_to_async(authenticator.authenticate)(request)
+        if result is not None:
+            return result
+    return AnonymousUser(), None
+
+
+def async_api_view(methods, permission_classes=()):
+    """
+    The async counterpart of DRF's @api_view for the views below: wraps the
+    request in a DRF Request (query_params, JSON request.data), authenticates
+    it, checks permissions and turns APIExceptions into JSON error responses.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def view(request, *args, **kwargs):
+            drf_request = Request(request, parsers=[JSONParser()])
+            try:
+                if request.method not in methods:
+                    raise MethodNotAllowed(request.method)
+                drf_request.user, drf_request.auth = await authenticate(drf_request)
+                for permission_class in permission_classes:
+                    if not permission_class().has_permission(drf_request, None):
+                        if not drf_request.user.is_authenticated:
+                            # DRF answers 403 here too: our authenticators send no WWW-Authenticate
+                            raise NotAuthenticated()
+                        raise PermissionDenied(getattr(permission_class, 'message', None))
+                return await func(drf_request, *args, **kwargs)
+            except APIException as exc:
+                code = status.HTTP_403_FORBIDDEN if isinstance(exc, NotAuthenticated) else exc.status_code
+                return json_response({'detail': exc.detail}, status=code)
+        return csrf_exempt(view)
+    return decorator
+
+
+async def paginated_response(request, queryset, serializer_class):
+    paginator = KeysetCursorPagination()
+    page = await paginator.apaginate_queryset(queryset, request)
+    data = serializer_class(page, many=True, context={'request': request}).data
+    return json_response(data, headers=paginator.get_headers())
+
+
+async def detail_response(request, validators, queryset, pk, serializer_class, not_found):
+    """Conditional GET: 304 from the validators alone, otherwise load and serialize."""
+    if validators is None:
+        return json_response({'error': not_found}, status=status.HTTP_404_NOT_FOUND)
+    not_modified = not_modified_response(request, validators)
+    if not_modified is not None:
+        return not_modified
+    obj = await queryset.filter(pk=pk).afirst()
+    if obj is None:
+        return json_response({'error': not_found}, status=status.HTTP_404_NOT_FOUND)
+    return json_response(serializer_class(obj, context={'request': request}).data, headers=validators.headers())
+
+
+async def preload_related(serializer_class, data, discussion_model):
+    """
+    Fetch the comment's discussion (and the comment it replies to)
+    asynchronously and hand them to the serializer through
+    ``discussion_map`` / ``parent_map``, so validation never falls back to a
+    synchronous lookup. Returns (serializer, errors).
+    """
+    fields = serializer_class().fields
+    querysets = {
+        'discussion': discussion_model.objects.all(),
+        'parent': serializer_class.Meta.model.objects.all(),
+    }
+    context = {}
+    for name, queryset in querysets.items():
+        value = data.get(name) if hasattr(data, 'get') else None
+        if value is None or isinstance(value, bool):
+            continue
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            return None, {name: [fields[name].error_messages['incorrect_type'].format(data_type=type(value).__name__)]}
+        obj = await queryset.filter(pk=pk).afirst()
+        if obj is None:
+            return None, {name: [fields[name].error_messages['does_not_exist'].format(pk_value=value)]}
+        context[f'{name}_map'] = {pk: obj}
+    return serializer_class(data=data, context=context), None
+
+
+async def create_comment(data, serializer_class, discussion_model, **save_kwargs):
+    serializer, errors = await preload_related(serializer_class, data, discussion_model)
+    if errors is None and not serializer.is_valid():
+        errors = serializer.errors
+    if errors is not None:
+        return json_response(errors, status=status.HTTP_400_BAD_REQUEST)
+    await sync_to_async(save_comment)(serializer, discussion_model, **save_kwargs)
+    return json_response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+def coerce_creator_id(data):
+    """Same creator_id coercion as the synchronous POST handlers."""
+    data = data.copy()
+    creator = data.get('creator_id')
+    if creator is not None:
+        try:
+            data['creator_id'] = int(creator)
+        except (TypeError, ValueError):
+            data['creator_id'] = None
+    return data
+
+
+# Discussion Views
+@async_api_view(['GET', 'POST'])
+async def discussion_list_create(request):
+    if request.method == 'GET':
+        if is_summary_request(request):
+            return await paginated_response(request, Discussion.objects.all(), DiscussionSummarySerializer)
+        return await paginated_response(request, discussion_queryset(), DiscussionSerializer)
+
+    data = coerce_creator_id(request.data)
+    serializer = DiscussionSerializer(data=data)
+    if not serializer.is_valid():
+        return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer.instance = await Discussion.objects.acreate(**serializer.validated_data)
+    # the representation nests comments; load them here rather than lazily during serialization
+    await aprefetch_related_objects([serializer.instance], 'comments')
+    return json_response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(['GET'])
+async def discussion_detail(request, pk):
+    validators = await adiscussion_validators(Discussion.objects.all(), pk)
+    return await detail_response(request, validators, discussion_queryset(), pk, DiscussionSerializer, 'Discussion not found')
+
+
+# Comment Views
+@async_api_view(['GET', 'POST'])
+async def comment_list_create(request):
+    if request.method == 'GET':
+        qs = comment_queryset()
+        tombstones = tombstones_for(Comment)
+        discussion_id = request.GET.get('discussion')
+        if discussion_id:
+            try:
+                qs = qs.filter(discussion_id=int(discussion_id))
+                tombstones = tombstones.filter(discussion_id=int(discussion_id))
+            except (TypeError, ValueError):
+                qs, tombstones = qs.none(), tombstones.none()
+        since = get_since(request)
+        if since is not None:
+            return json_response(await ChangeSet(request, since, qs, tombstones).aevaluate(CommentSerializer))
+        return await paginated_response(request, qs, CommentSerializer)
+
+    data = coerce_creator_id(request.data)
+    extra = {'creator_id': data['creator_id']} if data.get('creator_id') is not None else {}
+    return await create_comment(data, CommentSerializer, Discussion, **extra)
+
+
+@async_api_view(['GET'])
+async def comment_detail(request, pk):
+    validators = await acomment_validators(Comment.objects.all(), pk)
+    return await detail_response(request, validators, comment_queryset(), pk, CommentSerializer, 'Comment not found')
+
+
+# Course Discussion Views
+async def load_course_discussion_data(course_subject, course_id):
+    # from the primary: a lagging replica would put stale data in the shared cache
+    discussion = await course_discussion_queryset().using(PRIMARY).filter(course_subject=course_subject, course_id=course_id).afirst()
+    if discussion is None:
+        return None
+    return CourseDiscussionSerializer(discussion).data
+
+
+@async_api_view(['GET', 'POST'], permission_classes=[IsStudent])
+async def course_discussion_list_create(request):
+    if request.method == 'GET':
+        course_id = request.GET.get('course_id')
+        course_subject = request.GET.get('course_subject')
+        if course_id and course_subject and not is_summary_request(request):
+            data = cached_discussion_data(request, await aget_course_discussion_data(
+                course_subject, course_id,
+                lambda: load_course_discussion_data(course_subject, course_id),
+            ))
+            return json_response([data] if data is not None else [])
+        if is_summary_request(request):
+            qs, serializer_class = CourseDiscussion.objects.all(), CourseDiscussionSummarySerializer
+        else:
+            qs, serializer_class = course_discussion_queryset(), CourseDiscussionSerializer
+        if course_id and course_subject:
+            qs = qs.filter(course_id=course_id, course_subject=course_subject)
+        return await paginated_response(request, qs, serializer_class)
+
+    serializer = CourseDiscussionSerializer(data=request.data)
+    # the (course_subject, course_id) unique check queries the database
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer.instance = await CourseDiscussion.objects.acreate(
+        **serializer.validated_data, creator_id=getattr(request.user, 'id', None)
+    )
+    await aprefetch_related_objects([serializer.instance], 'comments')
+    return json_response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(['GET'], permission_classes=[IsStudent])
+async def course_discussion_detail(request, pk):
+    validators = await adiscussion_validators(CourseDiscussion.objects.all(), pk)
+    return await detail_response(request, validators, course_discussion_queryset(), pk, CourseDiscussionSerializer, 'Discussion not found')
+
+
+@async_api_view(['GET'], permission_classes=[IsOwnerOrAdmin])
+async def course_discussion_by_course_info(request, course_subject, course_id):
+    data = cached_discussion_data(request, await aget_course_discussion_data(
+        course_subject, course_id,
+        lambda: load_course_discussion_data(course_subject, course_id),
+    ))
+    if data is None:
+        return json_response({'error': 'Discussion not found for this course'}, status=status.HTTP_404_NOT_FOUND)
+    return json_response(data)
+
+
+# Course Comment Views
+@async_api_view(['GET', 'POST'], permission_classes=[IsStudent])
+async def course_comment_list_create(request):
+    if request.method == 'GET':
+        qs = course_comment_queryset()
+        tombstones = tombstones_for(CourseComment)
+        discussion_id = request.GET.get('discussion')
+        course_id = request.GET.get('course_id')
+        course_subject = request.GET.get('course_subject')
+        if discussion_id:
+            qs = qs.filter(discussion_id=discussion_id)
+            tombstones = tombstones.filter(discussion_id=discussion_id)
+        elif course_id and course_subject:
+            qs = qs.filter(discussion__course_id=course_id, discussion__course_subject=course_subject)
+            tombstones = tombstones.filter(discussion_id__in=CourseDiscussion.objects.filter(
+                course_id=course_id, course_subject=course_subject).values('pk'))
+        since = get_since(request)
+        if since is not None:
+            return json_response(await ChangeSet(request, since, qs, tombstones).aevaluate(CourseCommentSerializer))
+        return await paginated_response(request, qs, CourseCommentSerializer)
+
+    return await create_comment(
+        request.data, CourseCommentSerializer, CourseDiscussion, creator_id=getattr(request.user, 'id', None)
+    )
+
+
+@async_api_view(['GET'], permission_classes=[IsOwnerOrAdmin])
+async def course_comment_detail(request, pk):
+    validators = await acomment_validators(CourseComment.objects.all(), pk)
+    return await detail_response(request, validators, course_comment_queryset(), pk, CourseCommentSerializer, 'Comment not found')
+
+
+# Event streams
+def event_stream_response(request, channel):
+    # EventSource resends the last id it saw as Last-Event-ID when it reconnects
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    # a WSGI server iterates synchronously and would collect an async stream to the end first
+    stream = stream_events if isinstance(request._request, ASGIRequest) else stream_events_sync
+    response = StreamingHttpResponse(stream(channel, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
+
+
+@async_api_view(['GET'])
+async def discussion_events(request, pk):
+    if not await Discussion.objects.filter(pk=pk).aexists():
+        return json_response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
+    return event_stream_response(request, discussion_channel('Discussion', pk))
+
+
+@async_api_view(['GET'], permission_classes=[IsStudent])
+async def course_discussion_events(request, pk):
+    if not await CourseDiscussion.objects.filter(pk=pk).aexists():
+        return json_response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
+    return event_stream_response(request, discussion_channel('CourseDiscussion', pk))
+
+
+@async_api_view(['GET'], permission_classes=[IsStudent])
+async def course_events(request, course_subject, course_id):
+    pk = await (
+        CourseDiscussion.objects.filter(course_subject=course_subject, course_id=course_id)
+        .values_list('pk', flat=True).afirst()
+    )
+    if pk is None:
+        return json_response({'error': 'Discussion not found for this course'}, status=status.HTTP_404_NOT_FOUND)
+    return event_stream_response(request, discussion_channel('CourseDiscussion', pk))
@@ -0,0 +1,81 @@
+"""
+Batch comment creation for importers.
+
+Items are validated with the regular comment serializers in many=True
+mode, with every referenced discussion loaded in one query. If any item
+is invalid nothing is written and the errors are reported by position.
+Otherwise all rows are inserted with bulk_create, in chunks, inside one
+transaction. bulk_create sends no model signals, so the parent counters,
+the course discussion cache, the search index and the comment event
+streams are updated explicitly, and the thread paths (base.threads) are
+written after the insert.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from base.counters import comments_added
+from base.models import CourseComment
+from base.threads import assign_paths
+from .cache import invalidate_course_discussions
+from .events import CREATED, publish_comments
+from .search import index_objects
+
+
+def _config():
+    return getattr(settings, 'BULK_COMMENTS', {})
+
+
+def referenced_ids(items, field):
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item.get(field)))
+        except (TypeError, ValueError):
+            pass
+    return ids
+
+
+def bulk_create_comments(items, serializer_class, discussion_model, **save_kwargs):
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return Response({'error': 'Expected a JSON array (or NDJSON stream) of comment objects'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not items:
+        return Response({'error': 'No comments supplied'}, status=status.HTTP_400_BAD_REQUEST)
+    max_items = _config().get('MAX_ITEMS', 5000)
+    if len(items) > max_items:
+        return Response({'error': f'At most {max_items} comments per request'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    model = serializer_class.Meta.model
+    context = {
+        'discussion_map': discussion_model.objects.in_bulk(referenced_ids(items, 'discussion')),
+        'parent_map': model.objects.in_bulk(referenced_ids(items, 'parent')),
+    }
+    serializer = serializer_class(data=items, many=True, context=context)
+    if not serializer.is_valid():
+        errors = [
+            {'index': index, 'errors': item_errors}
+            for index, item_errors in enumerate(serializer.errors) if item_errors
+        ]
+        return Response({'created': 0, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    objs = [model(**{**attrs, **save_kwargs}) for attrs in serializer.validated_data]
+    with transaction.atomic():
+        model.objects.bulk_create(objs, batch_size=_config().get('BATCH_SIZE', 500))
+        assign_paths(objs)
+        index_objects(objs)
+        publish_comments(objs, CREATED)
+        added = defaultdict(list)
+        for obj in objs:
+            added[obj.discussion_id].append(obj.created_at)
+        for discussion_id, created in sorted(added.items()):
+            comments_added(discussion_model, discussion_id, count=len(created), last_activity_at=max(created))
+    if model is CourseComment:
+        invalidate_course_discussions(added)
+
+    results = [{'index': index, 'id': obj.pk} for index, obj in enumerate(objs)]
+    return Response({'created': len(objs), 'results': results}, status=status.HTTP_201_CREATED)
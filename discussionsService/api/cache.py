@@ -0,0 +1,153 @@
+"""
+Read-through cache for course discussion lookups.
+
+A course has exactly one CourseDiscussion (unique on course_subject +
+course_id) and it is read far more often than it changes, so the serialized
+discussion, nested comments included, is cached under that pair. Any save or
+delete of a CourseDiscussion or CourseComment evicts the affected entry; the
+signal receivers are connected in ApiConfig.ready().
+
+The backend is whatever Django cache alias COURSE_DISCUSSION_CACHE['ALIAS']
+names (local memory by default, Redis when REDIS_URL is set).
+"""
+import threading
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from base.models import CourseDiscussion, CourseComment
+
+KEY_PREFIX = 'course-discussion'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def _config():
+    return getattr(settings, 'COURSE_DISCUSSION_CACHE', {})
+
+
+def get_cache():
+    return caches[_config().get('ALIAS', 'default')]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    """Snapshot of this process's hit/miss/invalidation counters."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def course_cache_key(course_subject, course_id):
+    # quote() keeps keys free of spaces/control characters for memcached-style backends
+    return f'{KEY_PREFIX}:{quote(str(course_subject), safe="")}:{quote(str(course_id), safe="")}'
+
+
+def get_course_discussion_data(course_subject, course_id, loader):
+    """
+    Return the cached serialized discussion for a course, calling
+    ``loader()`` on a miss. ``loader`` returns the serialized data, or None
+    when the course has no discussion (misses are not cached).
+    """
+    cache = get_cache()
+    key = course_cache_key(course_subject, course_id)
+    data = cache.get(key)
+    if data is not None:
+        _count('hits')
+        return data
+
+    _count('misses')
+    data = loader()
+    if data is not None:
+        cache.set(key, data, _config().get('TIMEOUT', 300))
+    return data
+
+
+async def aget_course_discussion_data(course_subject, course_id, loader):
+    """Async variant of get_course_discussion_data; ``loader`` is a coroutine function."""
+    cache = get_cache()
+    key = course_cache_key(course_subject, course_id)
+    data = await cache.aget(key)
+    if data is not None:
+        _count('hits')
+        return data
+
+    _count('misses')
+    data = await loader()
+    if data is not None:
+        await cache.aset(key, data, _config().get('TIMEOUT', 300))
+    return data
+
+
+def invalidate_course(course_subject, course_id):
+    key = course_cache_key(course_subject, course_id)
+    cache = get_cache()
+    _count('invalidations')
+    cache.delete(key)
+    # evict again once the write is committed, in case a concurrent reader
+    # repopulated the entry from the pre-commit state
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_course_discussions(discussion_ids):
+    """Evict the courses owning these discussions (for writes that bypass signals, e.g. bulk_create)."""
+    courses = CourseDiscussion.objects.filter(pk__in=set(discussion_ids)).values_list('course_subject', 'course_id')
+    for course_subject, course_id in courses:
+        invalidate_course(course_subject, course_id)
+
+
+# Signal receivers
+
+def remember_previous_course(sender, instance, **kwargs):
+    """pre_save: note the stored course info so a PUT that changes it evicts the old key too."""
+    instance._cached_course_key = None
+    if instance.pk is None:
+        return
+    instance._cached_course_key = (
+        sender.objects.filter(pk=instance.pk).values_list('course_subject', 'course_id').first()
+    )
+
+
+def course_discussion_changed(sender, instance, **kwargs):
+    invalidate_course(instance.course_subject, instance.course_id)
+    previous = getattr(instance, '_cached_course_key', None)
+    if previous and previous != (instance.course_subject, instance.course_id):
+        invalidate_course(*previous)
+
+
+def course_comment_changed(sender, instance, **kwargs):
+    discussion = instance._state.fields_cache.get('discussion')
+    if discussion is not None:
+        course = (discussion.course_subject, discussion.course_id)
+    else:
+        course = (
+            CourseDiscussion.objects.filter(pk=instance.discussion_id)
+            .values_list('course_subject', 'course_id').first()
+        )
+    if course:
+        invalidate_course(*course)
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save, pre_save
+
+    pre_save.connect(remember_previous_course, sender=CourseDiscussion, dispatch_uid='course_cache_pre_save')
+    post_save.connect(course_discussion_changed, sender=CourseDiscussion, dispatch_uid='course_cache_discussion_save')
+    post_delete.connect(course_discussion_changed, sender=CourseDiscussion, dispatch_uid='course_cache_discussion_delete')
+    post_save.connect(course_comment_changed, sender=CourseComment, dispatch_uid='course_cache_comment_save')
+    post_delete.connect(course_comment_changed, sender=CourseComment, dispatch_uid='course_cache_comment_delete')
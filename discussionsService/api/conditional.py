@@ -0,0 +1,87 @@
+"""
+Conditional GET support for the detail endpoints.
+
+ETag and Last-Modified are computed from ``updated_at`` columns with a single
+aggregate query, so a client revalidating an unchanged resource gets a 304
+without the object being loaded or serialized.
+"""
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class Validators:
+    def __init__(self, parts, last_modified):
+        digest = hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+        self.etag = f'"{digest}"'
+        self.last_modified = last_modified
+
+    @property
+    def timestamp(self):
+        return int(timegm(self.last_modified.utctimetuple()))
+
+    def headers(self):
+        return {'ETag': self.etag, 'Last-Modified': http_date(self.timestamp)}
+
+
+def discussion_validators(queryset, pk):
+    """
+    Validators for a discussion with nested comments. The comment count is
+    part of the ETag so deleting a comment changes it even when the newest
+    ``updated_at`` stays the same.
+    """
+    return _discussion_validators(queryset, _discussion_row(queryset, pk).first())
+
+
+async def adiscussion_validators(queryset, pk):
+    return _discussion_validators(queryset, await _discussion_row(queryset, pk).afirst())
+
+
+def _discussion_row(queryset, pk):
+    return (
+        queryset.filter(pk=pk)
+        .annotate(comments_updated_at=Max('comments__updated_at'), comments_count=Count('comments'))
+        .values('pk', 'updated_at', 'comments_updated_at', 'comments_count')
+    )
+
+
+def _discussion_validators(queryset, row):
+    if row is None:
+        return None
+    last_modified = max(filter(None, (row['updated_at'], row['comments_updated_at'])))
+    parts = (queryset.model._meta.label, row['pk'], row['updated_at'].isoformat(),
+             row['comments_updated_at'] and row['comments_updated_at'].isoformat(), row['comments_count'])
+    return Validators(parts, last_modified)
+
+
+def comment_validators(queryset, pk):
+    """
+    Validators for a comment. The parent's ``updated_at`` is included because
+    the representation embeds ``discussion_title``.
+    """
+    return _comment_validators(queryset, _comment_row(queryset, pk).first())
+
+
+async def acomment_validators(queryset, pk):
+    return _comment_validators(queryset, await _comment_row(queryset, pk).afirst())
+
+
+def _comment_row(queryset, pk):
+    return queryset.filter(pk=pk).values('pk', 'updated_at', 'discussion__updated_at')
+
+
+def _comment_validators(queryset, row):
+    if row is None:
+        return None
+    last_modified = max(row['updated_at'], row['discussion__updated_at'])
+    parts = (queryset.model._meta.label, row['pk'], row['updated_at'].isoformat(),
+             row['discussion__updated_at'].isoformat())
+    return Validators(parts, last_modified)
+
+
+def not_modified_response(request, validators):
+    """Return a 304/412 response if the client's copy is current, else None."""
+    return get_conditional_response(request, etag=validators.etag, last_modified=validators.timestamp)
@@ -0,0 +1,404 @@
+"""
+Push of comment changes to subscribed clients (Server-Sent Events).
+
+Comment and CourseComment writes are published, once their transaction
+commits, to a per-discussion channel (``discussion:<pk>`` and
+``course-discussion:<pk>``) as ``comment.created``, ``comment.updated`` or
+``comment.deleted`` events. The stream views in api/async_views.py
+subscribe to one channel each.
+
+The ``EventBus`` fans events out to in-process subscribers. Publishing goes
+through a broker: ``LocalBroker`` (default) delivers within this process
+only; ``RedisBroker`` relays through Redis pub/sub so every worker process
+sees every event. Any class with the same constructor and ``publish``
+method can be configured in EVENT_STREAM['BROKER'].
+
+Backpressure: each subscriber has a bounded queue. A subscriber that falls
+QUEUE_SIZE events behind is closed instead of slowing the publisher or
+buffering without limit; its stream ends and the client reconnects.
+Replay: every channel keeps its last REPLAY_SIZE events, so a reconnecting
+client that sends ``Last-Event-ID`` receives what it missed. When that id
+is no longer buffered the client gets a ``reset`` event and should refetch
+the comment list.
+
+Under ASGI a stream is an async generator that waits on the event loop.
+Under WSGI (``runserver``, gunicorn's sync workers) StreamingHttpResponse
+cannot push an async generator, only collect it, so the stream views hand
+out ``stream_events_sync`` instead: it blocks its worker thread between
+events, which means every open stream holds a WSGI worker until
+MAX_STREAM_SECONDS. Serve the streams from ASGI where many clients listen.
+"""
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+from base.models import Comment, CourseComment
+
+CREATED = 'comment.created'
+UPDATED = 'comment.updated'
+DELETED = 'comment.deleted'
+RESET = 'reset'
+
+DEFAULTS = {
+    'BROKER': 'api.events.LocalBroker',
+    'BROKER_OPTIONS': {},
+    'REPLAY_SIZE': 200,
+    'QUEUE_SIZE': 100,
+    'MAX_CHANNELS': 10000,
+    'HEARTBEAT': 15,
+    'MAX_STREAM_SECONDS': 300,
+    'RETRY_MS': 3000,
+}
+
+
+def event_config():
+    return {**DEFAULTS, **getattr(settings, 'EVENT_STREAM', {})}
+
+
+def discussion_channel(discussion_model_name, discussion_id):
+    prefix = 'course-discussion' if discussion_model_name == 'CourseDiscussion' else 'discussion'
+    return f'{prefix}:{discussion_id}'
+
+
+class Event:
+    __slots__ = ('id', 'type', 'data')
+
+    def __init__(self, id, type, data):
+        self.id = id
+        self.type = type
+        self.data = data
+
+    def to_message(self):
+        return json.dumps({'id': self.id, 'type': self.type, 'data': self.data}, cls=JSONEncoder)
+
+    @classmethod
+    def from_message(cls, message):
+        raw = json.loads(message)
+        return cls(raw['id'], raw['type'], raw['data'])
+
+    def encode(self):
+        """The event in text/event-stream framing."""
+        data = json.dumps(self.data, cls=JSONEncoder, separators=(',', ':'))
+        id_line = f'id: {self.id}\n' if self.id else ''
+        return f'{id_line}event: {self.type}\ndata: {data}\n\n'
+
+
+class Subscription:
+    """One stream's bounded queue. Filled from any thread, drained by one consumer (async or blocking)."""
+
+    def __init__(self, bus, channel, max_size):
+        self.bus = bus
+        self.channel = channel
+        self.max_size = max_size
+        self.closed = False
+        self.overflowed = False
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)  # wakes a blocking consumer
+        self._waiter = None  # (loop, asyncio.Event) while an async consumer is waiting
+
+    def deliver(self, event):
+        with self._lock:
+            if self.closed:
+                return
+            if len(self._events) >= self.max_size:
+                # too far behind: drop the subscriber; it resumes via Last-Event-ID
+                self.closed = self.overflowed = True
+            else:
+                self._events.append(event)
+            self._ready.notify_all()
+            waiter = self._waiter
+        if waiter is not None:
+            loop, ready = waiter
+            loop.call_soon_threadsafe(ready.set)
+
+    async def aget(self, timeout):
+        """Next event, or None after ``timeout`` seconds or once closed and drained."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            with self._lock:
+                if self._events:
+                    return self._events.popleft()
+                if self.closed:
+                    return None
+                ready = asyncio.Event()
+                self._waiter = (loop, ready)
+            try:
+                await asyncio.wait_for(ready.wait(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                with self._lock:
+                    self._waiter = None
+
+    def get(self, timeout):
+        """Blocking counterpart of aget(), for streams served from WSGI worker threads."""
+        deadline = time.monotonic() + timeout
+        with self._ready:
+            while not self._events and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._ready.wait(remaining)
+            return self._events.popleft() if self._events else None
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._ready.notify_all()
+        self.bus.unsubscribe(self)
+
+
+class LocalBroker:
+    """Delivers events to this process's subscribers only."""
+
+    def __init__(self, dispatch, **options):
+        self.dispatch = dispatch
+
+    def publish(self, channel, message):
+        self.dispatch(channel, message)
+
+    def close(self):
+        pass
+
+
+class RedisBroker:
+    """Relays events through Redis pub/sub so all worker processes receive them."""
+
+    def __init__(self, dispatch, url=None, prefix='discussions-events', **options):
+        try:
+            import redis
+        except ImportError as exc:  # pragma: no cover - depends on the deployment
+            raise ImproperlyConfigured('RedisBroker requires the redis package') from exc
+        url = url or os.environ.get('REDIS_URL')
+        if not url:
+            raise ImproperlyConfigured('RedisBroker needs a url (or REDIS_URL)')
+        self.dispatch = dispatch
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(**{f'{prefix}:*': self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, channel, message):
+        self._client.publish(f'{self.prefix}:{channel}', message)
+
+    def _on_message(self, message):
+        channel = message['channel'].decode('utf-8')[len(self.prefix) + 1:]
+        self.dispatch(channel, message['data'].decode('utf-8'))
+
+    def close(self):
+        self._thread.stop()
+        self._pubsub.close()
+
+
+class EventBus:
+    def __init__(self, broker_class=LocalBroker, broker_options=None, replay_size=200,
+                 queue_size=100, max_channels=10000):
+        self.replay_size = replay_size
+        self.queue_size = queue_size
+        self.max_channels = max_channels
+        self._lock = threading.Lock()
+        self._history = OrderedDict()  # channel -> deque of recent events, LRU by channel
+        self._subscribers = {}         # channel -> set of Subscription
+        # ids only need to be unique and echoable; ordering comes from the history
+        self._id_prefix = f'{int(time.time() * 1000):x}-{os.getpid():x}'
+        self._sequence = itertools.count(1)
+        self.broker = broker_class(self.dispatch, **(broker_options or {}))
+
+    def publish(self, channel, event_type, data):
+        event = Event(f'{self._id_prefix}-{next(self._sequence)}', event_type, data)
+        self.broker.publish(channel, event.to_message())
+        return event
+
+    def dispatch(self, channel, message):
+        """Broker callback: record the event for replay and fan it out."""
+        event = Event.from_message(message)
+        with self._lock:
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self.replay_size)
+                while len(self._history) > self.max_channels:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(channel)
+            history.append(event)
+            # deliver under the lock so every subscriber sees the history order
+            for subscription in self._subscribers.get(channel, ()):
+                subscription.deliver(event)
+
+    def subscribe(self, channel, last_event_id=None):
+        """
+        Subscribe to ``channel``. Buffered events after ``last_event_id`` are
+        queued first, under the same lock as live delivery, so nothing is
+        lost or repeated between replay and the live stream.
+        """
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            if last_event_id:
+                history = list(self._history.get(channel, ()))
+                ids = [event.id for event in history]
+                missed = history[ids.index(last_event_id) + 1:] if last_event_id in ids else None
+                if missed is None or len(missed) > self.queue_size:
+                    missed = [Event(None, RESET, {'reason': 'missed events are no longer buffered'})]
+                for event in missed:
+                    subscription.deliver(event)
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    def close(self):
+        self.broker.close()
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    """Process-wide bus, configured from EVENT_STREAM on first use."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                config = event_config()
+                _bus = EventBus(
+                    broker_class=import_string(config['BROKER']),
+                    broker_options=config['BROKER_OPTIONS'],
+                    replay_size=config['REPLAY_SIZE'],
+                    queue_size=config['QUEUE_SIZE'],
+                    max_channels=config['MAX_CHANNELS'],
+                )
+    return _bus
+
+
+def reset_event_bus(**kwargs):
+    global _bus
+    if kwargs.get('setting') not in (None, 'EVENT_STREAM'):
+        return
+    with _bus_lock:
+        if _bus is not None:
+            _bus.close()
+        _bus = None
+
+
+setting_changed.connect(reset_event_bus)
+
+
+async def stream_events(channel, last_event_id=None):
+    """
+    text/event-stream body for ``channel``; ends after MAX_STREAM_SECONDS or
+    when the subscriber overflows. Subscribes on first iteration so a
+    response that is never sent leaves nothing registered on the bus.
+    """
+    config = event_config()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config['MAX_STREAM_SECONDS']
+    subscription = get_event_bus().subscribe(channel, last_event_id)
+    try:
+        yield f'retry: {config["RETRY_MS"]}\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            event = await subscription.aget(min(config['HEARTBEAT'], remaining))
+            if event is not None:
+                yield event.encode()
+            elif subscription.closed:
+                break
+            else:
+                yield ': keep-alive\n\n'
+    finally:
+        subscription.close()
+
+
+def stream_events_sync(channel, last_event_id=None):
+    """stream_events() as a plain generator, for WSGI servers, which can only iterate synchronously."""
+    config = event_config()
+    deadline = time.monotonic() + config['MAX_STREAM_SECONDS']
+    subscription = get_event_bus().subscribe(channel, last_event_id)
+    try:
+        yield f'retry: {config["RETRY_MS"]}\n\n'
+        while (remaining := deadline - time.monotonic()) > 0:
+            event = subscription.get(min(config['HEARTBEAT'], remaining))
+            if event is not None:
+                yield event.encode()
+            elif subscription.closed:
+                break
+            else:
+                yield ': keep-alive\n\n'
+    finally:
+        subscription.close()
+
+
+# Publishing
+
+def _comment_serializer(model):
+    from .serializers import CommentSerializer, CourseCommentSerializer
+
+    return CourseCommentSerializer if model is CourseComment else CommentSerializer
+
+
+def publish_comments(objs, event_type):
+    """
+    Publish events for ``objs`` once the current transaction commits.
+    Deletions are captured now, since a deleted instance loses its pk;
+    created and updated comments are serialized at commit, so fields written
+    after post_save (a new comment's ``path``, see base.threads) are included.
+    """
+    objs = list(objs)
+    if not objs:
+        return
+    model = type(objs[0])
+    discussion_model = model._meta.get_field('discussion').related_model.__name__
+    channels = [discussion_channel(discussion_model, obj.discussion_id) for obj in objs]
+    deleted = [{'id': obj.pk, 'discussion': obj.discussion_id} for obj in objs] if event_type == DELETED else None
+
+    def send():
+        payloads = deleted if deleted is not None else _comment_serializer(model)(objs, many=True).data
+        bus = get_event_bus()
+        for channel, payload in zip(channels, payloads):
+            bus.publish(channel, event_type, payload)
+
+    transaction.on_commit(send)
+
+
+# Signal receivers
+
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        publish_comments([instance], CREATED if created else UPDATED)
+
+
+def comment_deleted(sender, instance, **kwargs):
+    publish_comments([instance], DELETED)
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save
+
+    for model in (Comment, CourseComment):
+        post_save.connect(comment_saved, sender=model, dispatch_uid=f'events_save_{model.__name__}')
+        post_delete.connect(comment_deleted, sender=model, dispatch_uid=f'events_delete_{model.__name__}')
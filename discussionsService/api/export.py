@@ -0,0 +1,56 @@
+"""
+Streaming NDJSON export of discussions and comments.
+
+Rows are read with ``values().iterator(chunk_size=...)``, which uses a
+server-side cursor where the backend has one and fetchmany() batches on
+SQLite. Each row is encoded and yielded right away, so memory stays flat
+however large the export is. Shared by the /api/export/ endpoint and the
+export_discussions management command.
+
+Every line is one JSON object with a ``type`` field: ``discussion``,
+``comment``, ``course_discussion`` or ``course_comment``. All discussions
+of a kind come before their comments.
+"""
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+SCOPES = ('all', 'course', 'general')
+
+_encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+
+def _chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def _rows(record_type, queryset):
+    for row in queryset.order_by('pk').values().iterator(chunk_size=_chunk_size()):
+        row['type'] = record_type
+        yield row
+
+
+def iter_export_records(scope='all', course_subject=None, course_id=None):
+    """Yield export records as dicts. A course filter limits the export to course data."""
+    if scope not in SCOPES:
+        raise ValueError(f'scope must be one of {", ".join(SCOPES)}')
+    course_filter = {}
+    if course_subject:
+        course_filter['course_subject'] = course_subject
+    if course_id:
+        course_filter['course_id'] = course_id
+
+    if scope in ('all', 'general') and not course_filter:
+        yield from _rows('discussion', Discussion.objects.all())
+        yield from _rows('comment', Comment.objects.all())
+    if scope in ('all', 'course'):
+        comment_filter = {f'discussion__{key}': value for key, value in course_filter.items()}
+        yield from _rows('course_discussion', CourseDiscussion.objects.filter(**course_filter))
+        yield from _rows('course_comment', CourseComment.objects.filter(**comment_filter))
+
+
+def iter_ndjson(records):
+    for record in records:
+        yield _encoder.encode(record) + '\n'
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import SCOPES, iter_export_records, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = "Stream discussions and comments as NDJSON, one record per line."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scope', choices=SCOPES, default='all',
+                            help="Which models to export (default: all).")
+        parser.add_argument('--course-subject', help="Only export this course subject.")
+        parser.add_argument('--course-id', help="Only export this course id.")
+        parser.add_argument('--output', '-o', help="File to write to (default: stdout).")
+
+    def handle(self, *args, **options):
+        records = iter_export_records(
+            scope=options['scope'],
+            course_subject=options['course_subject'],
+            course_id=options['course_id'],
+        )
+        lines = iter_ndjson(records)
+
+        count = 0
+        if options['output']:
+            try:
+                with open(options['output'], 'w', encoding='utf-8') as out:
+                    for line in lines:
+                        out.write(line)
+                        count += 1
+            except OSError as exc:
+                raise CommandError(f"Cannot write {options['output']}: {exc}")
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
+                count += 1
+        self.stderr.write(f"Exported {count} records")
@@ -0,0 +1,142 @@
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.search import index_objects
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+from base.threads import MAX_DEPTH, assign_paths
+
+SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+WORDS = (
+    'lecture exam homework deadline project grade question answer office hours lab quiz midterm final '
+    'reading chapter slide recursion pointer database index query latency cache thread lock replica '
+    'commit rollback schema migration test deploy server client request response'
+).split()
+
+
+def parse_count(value):
+    """'1000', '10k', '1m' -> int."""
+    value = value.strip().lower()
+    try:
+        if value and value[-1] in SUFFIXES:
+            return int(float(value[:-1]) * SUFFIXES[value[-1]])
+        return int(value)
+    except ValueError:
+        raise CommandError(f"Not a count: {value!r}")
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+class Command(BaseCommand):
+    help = "Insert synthetic discussions and comments for benchmarks (use a scratch database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', default='10k',
+                            help="Total comments to create, e.g. 1k, 100k, 1m (default 10k).")
+        parser.add_argument('--per-discussion', type=int, default=50,
+                            help="Average comments per discussion (default 50).")
+        parser.add_argument('--reply-share', type=float, default=0.3,
+                            help="Fraction of comments that reply to an earlier comment (default 0.3).")
+        parser.add_argument('--course-share', type=float, default=0.5,
+                            help="Fraction of the data that belongs to course discussions (default 0.5).")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows per INSERT transaction (default 5000).")
+        parser.add_argument('--seed', type=int, default=520, help="Random seed, for reproducible data.")
+        parser.add_argument('--no-index', action='store_true', help="Skip the full-text search index.")
+
+    def handle(self, *args, **options):
+        total = parse_count(options['comments'])
+        rng = random.Random(options['seed'])
+        course_comments = int(total * options['course_share'])
+        started = time.perf_counter()
+
+        plans = (
+            (Discussion, Comment, total - course_comments),
+            (CourseDiscussion, CourseComment, course_comments),
+        )
+        for discussion_model, comment_model, count in plans:
+            if count <= 0:
+                continue
+            discussions = max(1, count // max(1, options['per_discussion']))
+            ids = self.create_discussions(discussion_model, discussions, rng, options)
+            self.create_comments(comment_model, ids, count, rng, options)
+            self.stdout.write(f"{discussion_model.__name__}: {discussions} discussions, {count} comments")
+        self.stdout.write(f"Seeded {total} comments in {time.perf_counter() - started:.1f}s")
+
+    def create_discussions(self, model, count, rng, options):
+        base = model.all_objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        objs = []
+        for n in range(count):
+            fields = dict(title=f'{sentence(rng, 4)} #{base + n + 1}', body=sentence(rng, 40),
+                          author=f'user{rng.randrange(1000)}', creator_id=rng.randrange(1, 1000))
+            if model is CourseDiscussion:
+                # course ids unique per seeding run, so repeated runs can share a database
+                fields.update(course_subject=rng.choice(('CS', 'MATH', 'PHYS', 'BIO')), course_id=f'{base + n + 1}')
+            objs.append(model(**fields))
+        for start in range(0, len(objs), options['batch_size']):
+            with transaction.atomic():
+                batch = model.objects.bulk_create(objs[start:start + options['batch_size']])
+                if not options['no_index']:
+                    index_objects(batch)
+        return [obj.pk for obj in objs]
+
+    def create_comments(self, model, discussion_ids, count, rng, options):
+        discussion_model = model._meta.get_field('discussion').related_model
+        per_discussion = Counter()
+        # a few (pk, path, depth) per discussion to reply to; replies only
+        # pick comments from earlier batches, whose paths are known
+        candidates = {}
+        replies = min(max(count - 1, 0), int(count * options['reply_share']))
+        roots = count - replies
+        # replies go in at least four batches, so threads get several levels deep
+        reply_batch = min(options['batch_size'], max(1, -(-replies // 4)))
+        created = 0
+        while created < count:
+            if created < roots:
+                size = min(roots - created, options['batch_size'])
+            else:
+                size = min(count - created, reply_batch)
+            objs = []
+            for _ in range(size):
+                discussion_id = rng.choice(discussion_ids)
+                per_discussion[discussion_id] += 1
+                obj = model(discussion_id=discussion_id, body=sentence(rng, 20),
+                            author=f'user{rng.randrange(1000)}', creator_id=rng.randrange(1, 1000))
+                parents = candidates.get(discussion_id)
+                if created >= roots and parents:
+                    pk, path, depth = rng.choice(parents)
+                    obj.parent = model(pk=pk, discussion_id=discussion_id, path=path, depth=depth)
+                objs.append(obj)
+            with transaction.atomic():
+                model.objects.bulk_create(objs)
+                assign_paths(objs)
+                if not options['no_index']:
+                    index_objects(objs)
+            for obj in objs:
+                if obj.depth < MAX_DEPTH:
+                    parents = candidates.setdefault(obj.discussion_id, [])
+                    if len(parents) < 8:
+                        parents.append((obj.pk, obj.path, obj.depth))
+                    else:
+                        parents[rng.randrange(8)] = (obj.pk, obj.path, obj.depth)
+            created += size
+            self.stderr.write(f"  {model.__name__}: {created}/{count}", ending='\r')
+        self.stderr.write('')
+
+        # bulk_create skips the counter updates save_comment() would do
+        now = timezone.now()
+        by_count = {}
+        for discussion_id, added in per_discussion.items():
+            by_count.setdefault(added, []).append(discussion_id)
+        with transaction.atomic():
+            for added, ids in by_count.items():
+                for start in range(0, len(ids), 500):
+                    discussion_model.objects.filter(pk__in=ids[start:start + 500]).update(
+                        comment_count=added, last_activity_at=now,
+                    )
@@ -0,0 +1,291 @@
+import base64
+import json
+import re
+
+from django.conf import settings
+from django.db.models import IntegerField, Q, Subquery
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class SubqueryCount(Subquery):
+    """COUNT(*) of a queryset, embedded as a scalar subquery in another SELECT."""
+
+    template = '(SELECT COUNT(*) FROM (%(subquery)s) _total)'
+    output_field = IntegerField()
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset pagination over (created_at, id), newest first.
+
+    The page body stays a plain JSON list so existing clients keep working;
+    the opaque next/prev cursors are advertised in a ``Link`` header.
+    Each page costs a single indexed range query no matter how deep the
+    client has scrolled.
+
+    The total row count is opt-in (``?include_total=true``) and is returned
+    in ``X-Total-Count``. It rides along in the page query as a scalar
+    subquery rather than costing a separate COUNT round-trip.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    include_total_query_param = 'include_total'
+    total_annotation = 'pagination_total_count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        config = getattr(settings, 'API_PAGINATION', {})
+        self.page_size = config.get('PAGE_SIZE', 50)
+        self.max_page_size = config.get('MAX_PAGE_SIZE', 200)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_query = self.get_page_query(queryset, request)
+        results = list(page_query)
+        if self.needs_unpaged_count(results):
+            return self.finish_page(results, self.unpaged.count())
+        return self.finish_page(results)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of paginate_queryset for native async views."""
+        page_query = self.get_page_query(queryset, request)
+        results = [obj async for obj in page_query]
+        if self.needs_unpaged_count(results):
+            return self.finish_page(results, await self.unpaged.acount())
+        return self.finish_page(results)
+
+    def get_page_query(self, queryset, request):
+        """Apply the cursor and ordering; returns the (lazy) query for one page plus a lookahead row."""
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        self.total = None
+
+        self.include_total = self.get_include_total(request)
+        self.unpaged = queryset
+        if self.include_total:
+            total_query = SubqueryCount(queryset.order_by().values('pk'))
+            queryset = queryset.annotate(**{self.total_annotation: total_query})
+
+        if self.cursor is None:
+            created_at, pk, self.reverse = None, None, False
+        else:
+            created_at, pk, self.reverse = self.cursor
+
+        if self.reverse:
+            # walk backwards from the cursor, then flip the page into display order
+            queryset = queryset.order_by('created_at', 'id')
+            if created_at is not None:
+                queryset = queryset.filter(created_at__gte=created_at).filter(
+                    Q(created_at__gt=created_at) | Q(id__gt=pk)
+                )
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+            if created_at is not None:
+                # the __lte bound lets the database seek on the index; the OR
+                # only has to break ties between rows sharing a timestamp
+                queryset = queryset.filter(created_at__lte=created_at).filter(
+                    Q(created_at__lt=created_at) | Q(id__lt=pk)
+                )
+
+        return queryset[:self.limit + 1]
+
+    def needs_unpaged_count(self, results):
+        # paged past the end: nothing carried the count back
+        return self.include_total and not results and self.cursor is not None
+
+    def finish_page(self, results, unpaged_count=None):
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+
+        if self.include_total:
+            if results:
+                self.total = getattr(results[0], self.total_annotation)
+            elif self.cursor is None:
+                self.total = 0
+            else:
+                self.total = unpaged_count
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            return self.page_size
+        if size < 1:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_include_total(self, request):
+        value = request.query_params.get(self.include_total_query_param, '')
+        return value.lower() in ('1', 'true', 'yes')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            created_at = parse_datetime(data['t'])
+            pk = int(data['i'])
+            reverse = bool(data.get('r', False))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk, reverse
+
+    def encode_cursor(self, obj, reverse):
+        data = {'t': obj.created_at.isoformat(), 'i': obj.pk}
+        if reverse:
+            data['r'] = 1
+        raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[0], True))
+
+    def get_link_header(self):
+        links = []
+        next_link = self.get_next_link()
+        if next_link:
+            links.append(f'<{next_link}>; rel="next"')
+        previous_link = self.get_previous_link()
+        if previous_link:
+            links.append(f'<{previous_link}>; rel="prev"')
+        return ', '.join(links)
+
+    def get_headers(self):
+        headers = {}
+        link = self.get_link_header()
+        if link:
+            headers['Link'] = link
+        if self.total is not None:
+            headers['X-Total-Count'] = str(self.total)
+        return headers
+
+    def get_paginated_response(self, data):
+        return Response(data, headers=self.get_headers())
+
+
+class RankedOffsetPagination(KeysetCursorPagination):
+    """
+    Offset pagination for result sets that have no stable keyset order, such
+    as relevance-ranked search hits. Shares page-size handling and the Link
+    header format with KeysetCursorPagination; the caller fetches one extra
+    row so no COUNT is needed to know whether another page exists.
+    """
+
+    offset_query_param = 'offset'
+
+    def get_offset(self, request):
+        try:
+            return max(0, int(request.query_params.get(self.offset_query_param, 0)))
+        except (TypeError, ValueError):
+            return 0
+
+    def paginate_results(self, fetch, request):
+        """Call ``fetch(limit, offset)`` and return the page of results."""
+        self.request = request
+        self.total = None
+        self.limit = self.get_page_size(request)
+        self.offset = self.get_offset(request)
+        results = list(fetch(self.limit + 1, self.offset))
+        self.has_next = len(results) > self.limit
+        self.has_previous = self.offset > 0
+        self.page = results[:self.limit]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        previous = self.offset - self.limit
+        if previous <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, previous)
+
+
+class ThreadPathPagination(KeysetCursorPagination):
+    """
+    Forward-only keyset pagination over the materialized comment path (see
+    base.threads): depth first, replies right after their parent. The cursor
+    is the last path served, so every page is one range scan on the
+    (discussion, path) index, and a reply is never served before the comments
+    above it. Page sizes come from COMMENT_THREADS; the body stays a plain
+    list with the next page in the ``Link`` header.
+    """
+
+    path_pattern = re.compile(r'(\d+/)+')
+
+    def __init__(self):
+        super().__init__()
+        config = getattr(settings, 'COMMENT_THREADS', {})
+        self.page_size = config.get('PAGE_SIZE', 200)
+        self.max_page_size = config.get('MAX_PAGE_SIZE', 1000)
+
+    def get_page_query(self, queryset, request):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        self.include_total = False
+        self.total = None
+        self.reverse = False
+        queryset = queryset.order_by('path')
+        if self.cursor is not None:
+            queryset = queryset.filter(path__gt=self.cursor)
+        return queryset[:self.limit + 1]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            path = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii')
+        except (ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not self.path_pattern.fullmatch(path):
+            raise NotFound(self.invalid_cursor_message)
+        return path
+
+    def encode_cursor(self, obj, reverse):
+        return base64.urlsafe_b64encode(obj.path.encode('ascii')).decode('ascii').rstrip('=')
+
+    def get_previous_link(self):
+        return None
@@ -1,18 +1,28 @@
+import logging
+
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from discussionsService.logging_utils import debug_enabled
+from discussionsService.metrics import timed
+
+logger = logging.getLogger(__name__)
 
 class IsAdmin(BasePermission):
+    @timed("perm")
     def has_permission(self, request, view):
-        return request.user.role == "ADMIN"
+        return getattr(request.user, "role", None) == "ADMIN"
 
 class IsStudent(BasePermission):
+    @timed("perm")
     def has_permission(self, request, view):
         user = request.user
-        print(f"[DEBUG] IsStudent: user={user}, is_authenticated={user.is_authenticated}, role={getattr(user, 'role', None)}")
+        if debug_enabled(logger):
+            logger.debug("IsStudent check", extra={"user_id": getattr(user, "id", None), "is_authenticated": user.is_authenticated, "role": getattr(user, "role", None)})
         return user.is_authenticated and (getattr(user, 'role', None) in ["STUDENT", "ADMIN", "STAFF"])
 
 class IsStaff(BasePermission):
+    @timed("perm")
     def has_permission(self, request, view):
-        return (request.user.role == "STAFF") or (request.user.role == "ADMIN") 
+        return getattr(request.user, "role", None) in ("STAFF", "ADMIN")
 
 class IsOwnerOrAdmin(BasePermission):
     """
@@ -20,6 +30,7 @@ class IsOwnerOrAdmin(BasePermission):
     Admin can modify anything.
     """
 
+    @timed("perm")
     def has_object_permission(self, request, view, obj):
         # Optional: allow read for everyone who passes has_permission
         if request.method in SAFE_METHODS:
@@ -0,0 +1,61 @@
+"""
+JSON rendering for the API.
+
+FastJSONRenderer is the default renderer (REST_FRAMEWORK in settings). When
+the optional orjson package is installed it encodes with orjson, which is
+several times faster than json.dumps with DRF's encoder on large list pages;
+the output is the same compact JSON: datetimes, lazy strings, Decimals and
+everything else orjson does not handle natively go through DRF's
+JSONEncoder.default, and U+2028/U+2029 are escaped as DRF does. It falls
+back to DRF's JSONRenderer without orjson, with UNICODE_JSON or
+COMPACT_JSON turned off, for indented output (``Accept: application/json;
+indent=4``, the browsable API) and for values orjson rejects (e.g. integers
+beyond 64 bits).
+
+Rendering happens after the view returns, so it is timed as part of the
+request's ``serialize`` phase (discussionsService.metrics).
+"""
+from rest_framework.renderers import JSONRenderer
+
+from discussionsService.metrics import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment
+    orjson = None
+
+ORJSON_OPTIONS = 0
+if orjson is not None:
+    # datetimes and dataclasses are left to DRF's encoder so the output matches JSONRenderer
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def dumps(data, default):
+    """orjson-encoded ``data`` with JavaScript line separators escaped, or None if orjson cannot encode it."""
+    if orjson is None:
+        return None
+    try:
+        ret = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        return None
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            if data is None:
+                return b''
+            indent = self.get_indent(accepted_media_type, renderer_context or {})
+            if self.compact and not self.ensure_ascii and indent is None:
+                ret = dumps(data, self.encoder_class().default)
+                if ret is not None:
+                    return ret
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def render_json(data):
+    """Compact JSON bytes, as FastJSONRenderer renders them (for views that build plain HttpResponses)."""
+    return FastJSONRenderer().render(data)
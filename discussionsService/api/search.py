@@ -0,0 +1,411 @@
+"""
+Full-text search over the title and body of discussions and comments.
+
+Two interchangeable backends answer the same queries:
+
+* ``FTS5SearchBackend``: an SQLite FTS5 virtual table (``base_search_index``,
+  created by migration base.0007 when FTS5 is compiled in), ranked with FTS5's
+  built-in bm25(). Index writes share the transaction of the model write.
+* ``MemorySearchBackend``: an in-process inverted index with BM25 scoring,
+  built lazily from the database on first use. Used when FTS5 is not
+  available (or on other databases). Each process keeps its own copy and
+  only sees its own writes as they happen, so with several worker
+  processes it is rebuilt from the database, on a background thread, once
+  it is older than SEARCH_MEMORY_REFRESH_SECONDS: other workers' writes
+  show up within about that interval.
+
+Both are kept up to date incrementally by the post_save/post_delete
+receivers connected in ApiConfig.ready(); writes that bypass signals (bulk
+inserts) call ``index_objects`` themselves. Soft-deleting a discussion
+writes nothing to the index: searches skip documents of soft-deleted
+discussions, and the background purge's post_delete signals remove their
+rows afterwards (base.purge).
+
+Documents are addressed by a single integer ``rowid = pk * 4 + type code``,
+which is also the FTS5 rowid, so updates and deletes never scan the index.
+Query terms are ANDed. Snippets are cut and highlighted in Python for both
+backends, after HTML-escaping the stored text.
+"""
+import html
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'base_search_index'
+
+# type code -> (doc type, model); the code is the rowid's remainder mod 4
+DOC_TYPES = {
+    0: ('discussion', Discussion),
+    1: ('comment', Comment),
+    2: ('course_discussion', CourseDiscussion),
+    3: ('course_comment', CourseComment),
+}
+TYPE_CODES = {name: code for code, (name, _) in DOC_TYPES.items()}
+MODEL_CODES = {model: code for code, (_, model) in DOC_TYPES.items()}
+COURSE_TYPES = ('course_discussion', 'course_comment')
+# comment type code -> the type code of its discussion
+DISCUSSION_CODES = {1: 0, 3: 2}
+
+TITLE_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+# letters and digits only, matching FTS5's unicode61 tokenizer
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def tokenize(text):
+    return [token.lower() for token in _TOKEN_RE.findall(text or '')]
+
+
+def doc_rowid(obj):
+    return obj.pk * 4 + MODEL_CODES[type(obj)]
+
+
+def doc_fields(obj):
+    """(title, body, parent discussion id) as stored in the index."""
+    title = getattr(obj, 'title', '') or ''
+    parent = getattr(obj, 'discussion_id', None)
+    return title, obj.body or '', parent
+
+
+def make_snippet(text, terms, width=12):
+    """HTML-escaped excerpt of ``text`` around the first hit, hits wrapped in <mark>."""
+    if not text:
+        return ''
+    tokens = list(_TOKEN_RE.finditer(text))
+    hit = next((i for i, m in enumerate(tokens) if m.group().lower() in terms), None)
+    if hit is None:
+        start_tok, end_tok = 0, min(len(tokens), width * 2)
+    else:
+        start_tok, end_tok = max(0, hit - width // 2), min(len(tokens), hit + width + width // 2)
+    if not tokens:
+        return html.escape(text[:200])
+    start = tokens[start_tok].start() if start_tok > 0 else 0
+    end = tokens[end_tok - 1].end() if end_tok < len(tokens) else len(text)
+
+    out = ['…' if start > 0 else '']
+    pos = start
+    for m in tokens[start_tok:end_tok]:
+        out.append(html.escape(text[pos:m.start()]))
+        word = html.escape(m.group())
+        out.append(f'<mark>{word}</mark>' if m.group().lower() in terms else word)
+        pos = m.end()
+    out.append(html.escape(text[pos:end]))
+    if end < len(text):
+        out.append('…')
+    return ''.join(out)
+
+
+class SearchHit:
+    def __init__(self, rowid, score, title, body, parent):
+        self.doc_type, _ = DOC_TYPES[rowid % 4]
+        self.id = rowid // 4
+        self.score = score
+        self.title = title
+        self.body = body
+        self.parent = parent
+
+    def as_dict(self, terms):
+        data = {'type': self.doc_type, 'id': self.id, 'score': self.score}
+        if self.doc_type in ('discussion', 'course_discussion'):
+            data['title'] = self.title
+        else:
+            data['discussion'] = self.parent
+        data['snippet'] = make_snippet(self.body, terms) or make_snippet(self.title, terms)
+        if self.title and set(tokenize(self.title)) & terms:
+            data['title_highlighted'] = make_snippet(self.title, terms, width=40)
+        return data
+
+
+class FTS5SearchBackend:
+    name = 'fts5'
+
+    def index(self, objs):
+        rows = [(doc_rowid(obj), *doc_fields(obj)) for obj in objs]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, body, parent) VALUES (%s, %s, %s, %s)', rows
+            )
+
+    def remove(self, objs):
+        self.remove_rowids([doc_rowid(obj) for obj in objs])
+
+    def remove_rowids(self, rowids):
+        if rowids:
+            with connection.cursor() as cursor:
+                cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(rowid,) for rowid in rowids])
+
+    def hide_discussion(self, discussion):
+        pass  # search() checks deleted_at
+
+    def search(self, terms, types, limit, offset):
+        match = ' AND '.join('"%s"' % term.replace('"', '""') for term in terms)
+        codes = ', '.join(str(TYPE_CODES[t]) for t in types)
+        # skip documents of soft-deleted discussions (one primary key lookup per match)
+        live = ' '.join(
+            f'AND NOT EXISTS (SELECT 1 FROM {DOC_TYPES[code][1]._meta.db_table} d WHERE d.deleted_at IS NOT NULL '
+            f'AND d.id = CASE {FTS_TABLE}.rowid %% 4 WHEN {code} THEN {FTS_TABLE}.rowid / 4 '
+            f'WHEN {comment_code} THEN {FTS_TABLE}.parent END)'
+            for comment_code, code in DISCUSSION_CODES.items()
+        )
+        sql = (
+            f'SELECT rowid, bm25({FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS rank, title, body, parent '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND (rowid %% 4) IN ({codes}) {live} '
+            f'ORDER BY rank, rowid LIMIT %s OFFSET %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [match, limit, offset])
+            # bm25() is "lower is better"; flip it so scores read like the memory backend's
+            return [SearchHit(rowid, -rank, title, body, parent) for rowid, rank, title, body, parent in cursor.fetchall()]
+
+
+class InvertedIndex:
+    """The memory backend's data: documents, postings and hidden discussions. Not thread-safe on its own."""
+
+    def __init__(self):
+        self.docs = {}                      # rowid -> (title, body, parent, weighted term freqs, length)
+        self.postings = defaultdict(set)    # term -> rowids
+        self.hidden = set()                 # rowids of soft-deleted discussions, until purged
+        self.total_length = 0.0
+
+    def add(self, obj):
+        rowid = doc_rowid(obj)
+        self.discard(rowid)
+        title, body, parent = doc_fields(obj)
+        freqs = Counter()
+        for term in tokenize(title):
+            freqs[term] += TITLE_WEIGHT
+        for term in tokenize(body):
+            freqs[term] += BODY_WEIGHT
+        length = sum(freqs.values())
+        self.docs[rowid] = (title, body, parent, freqs, length)
+        self.total_length += length
+        for term in freqs:
+            self.postings[term].add(rowid)
+
+    def discard(self, rowid):
+        self.hidden.discard(rowid)
+        doc = self.docs.pop(rowid, None)
+        if doc is None:
+            return
+        self.total_length -= doc[4]
+        for term in doc[3]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.discard(rowid)
+                if not postings:
+                    del self.postings[term]
+
+    def hide(self, rowid):
+        self.hidden.add(rowid)
+
+    def is_hidden(self, rowid, parent):
+        code = rowid % 4
+        if code in DISCUSSION_CODES:
+            return parent * 4 + DISCUSSION_CODES[code] in self.hidden
+        return rowid in self.hidden
+
+
+class MemorySearchBackend:
+    """
+    Searches an InvertedIndex of this process. It is built on first use and,
+    with ``max_age`` set, rebuilt on a background thread once it is older
+    than that, while searches keep using the current one; writes committed
+    during a build are replayed onto the new index before it is swapped in.
+    A rebuild briefly holds two copies of the index in memory.
+    """
+    name = 'memory'
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, max_age=None):
+        # seconds before the index is rebuilt to pick up other processes' writes; None: never
+        self.max_age = max_age
+        self._lock = threading.RLock()         # guards the current index and _pending
+        self._build_lock = threading.Lock()    # one build at a time
+        self._index = None
+        self._loaded_at = 0.0
+        self._pending = None                   # (operation, item) committed while a build runs
+        self._refresh_thread = None
+
+    def _build(self):
+        """Read every live document into a new index and swap it in. Writers only wait for the swap."""
+        with self._lock:
+            self._pending = []
+        index = InvertedIndex()
+        try:
+            for _, model in DOC_TYPES.values():
+                for obj in model.objects.all().iterator(chunk_size=2000):
+                    index.add(obj)
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            # repeating a write the build already read is harmless
+            for operation, item in self._pending:
+                getattr(index, operation)(item)
+            self._pending = None
+            self._index = index
+            self._loaded_at = time.monotonic()
+
+    def _refresh(self):
+        try:
+            close_old_connections()
+            with self._build_lock:
+                self._build()
+        except Exception:
+            # _loaded_at is unchanged, so the next search tries again
+            logger.exception('search index refresh failed')
+        finally:
+            connection.close()
+
+    def _schedule_refresh(self):
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self._refresh, name='search-index-refresh', daemon=True)
+            self._refresh_thread.start()
+
+    def _current_index(self):
+        if self._index is None:
+            with self._build_lock:
+                if self._index is None:
+                    self._build()
+        elif self.max_age is not None and time.monotonic() - self._loaded_at >= self.max_age:
+            self._schedule_refresh()
+        return self._index
+
+    def index(self, objs):
+        objs = list(objs)
+        transaction.on_commit(lambda: self._apply('add', objs))
+
+    def remove(self, objs):
+        self.remove_rowids([doc_rowid(obj) for obj in objs])
+
+    def remove_rowids(self, rowids):
+        rowids = list(rowids)
+        transaction.on_commit(lambda: self._apply('discard', rowids))
+
+    def hide_discussion(self, discussion):
+        rowid = doc_rowid(discussion)
+        transaction.on_commit(lambda: self._apply('hide', [rowid]))
+
+    def _apply(self, operation, items):
+        with self._lock:
+            # before the first build starts there is nothing to update: it reads the committed state
+            if self._pending is not None:
+                self._pending.extend((operation, item) for item in items)
+            if self._index is not None:
+                for item in items:
+                    getattr(self._index, operation)(item)
+
+    def search(self, terms, types, limit, offset):
+        index = self._current_index()
+        codes = {TYPE_CODES[t] for t in types}
+        with self._lock:
+            postings = [index.postings.get(term, set()) for term in terms]
+            if not postings:
+                return []
+            candidates = set.intersection(*postings)
+            total_docs = len(index.docs)
+            avg_length = index.total_length / total_docs if total_docs else 0.0
+            scored = []
+            for rowid in candidates:
+                if rowid % 4 not in codes:
+                    continue
+                title, body, parent, freqs, length = index.docs[rowid]
+                if index.hidden and index.is_hidden(rowid, parent):
+                    continue
+                score = 0.0
+                for term, docs in zip(terms, postings):
+                    tf = freqs[term]
+                    idf = math.log((total_docs - len(docs) + 0.5) / (len(docs) + 0.5) + 1.0)
+                    norm = self.k1 * (1 - self.b + self.b * (length / avg_length if avg_length else 0.0))
+                    score += idf * tf * (self.k1 + 1) / (tf + norm)
+                scored.append((-score, rowid, title, body, parent))
+        scored.sort()
+        return [SearchHit(rowid, -neg, title, body, parent) for neg, rowid, title, body, parent in scored[offset:offset + limit]]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def fts5_available():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        return FTS_TABLE in connection.introspection.table_names(cursor)
+
+
+def get_search_backend():
+    """The configured backend; SEARCH_BACKEND is 'auto' (default), 'fts5' or 'memory'."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                choice = getattr(settings, 'SEARCH_BACKEND', 'auto')
+                if choice == 'fts5' or (choice == 'auto' and fts5_available()):
+                    _backend = FTS5SearchBackend()
+                else:
+                    _backend = MemorySearchBackend(max_age=getattr(settings, 'SEARCH_MEMORY_REFRESH_SECONDS', None))
+    return _backend
+
+
+def reset_search_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def search(query, types=None, limit=20, offset=0):
+    """Return (hits as dicts, query terms) for ``query``, best match first."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return [], terms
+    types = [t for t in (types or TYPE_CODES) if t in TYPE_CODES]
+    if not types:
+        return [], terms
+    hits = get_search_backend().search(terms, types, limit, offset)
+    term_set = set(terms)
+    return [hit.as_dict(term_set) for hit in hits], terms
+
+
+def index_objects(objs):
+    get_search_backend().index(objs)
+
+
+# Signal receivers
+
+def document_saved(sender, instance, **kwargs):
+    if getattr(instance, 'deleted_at', None) is not None:
+        # hidden from searches; the purge removes its rows (and its comments')
+        get_search_backend().hide_discussion(instance)
+    else:
+        index_objects([instance])
+
+
+def document_deleted(sender, instance, **kwargs):
+    get_search_backend().remove([instance])
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_save
+
+    for _, model in DOC_TYPES.values():
+        post_save.connect(document_saved, sender=model, dispatch_uid=f'search_index_save_{model.__name__}')
+        post_delete.connect(document_deleted, sender=model, dispatch_uid=f'search_index_delete_{model.__name__}')
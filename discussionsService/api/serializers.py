@@ -1,77 +1,215 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 from django.utils import timezone
 from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+from base.threads import MAX_DEPTH
+from discussionsService.metrics import timed
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that first looks the object up in ``context[<field>_map]``
+    (a pk -> instance dict). The bulk endpoints preload every referenced
+    discussion and parent comment in one query each instead of one query per
+    item; unknown pks fall back to the normal lookup and its error messages.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get(f'{self.field_name}_map')
+        if preloaded is not None and not isinstance(data, bool):
+            try:
+                obj = preloaded.get(int(data))
+            except (TypeError, ValueError):
+                obj = None
+            if obj is not None:
+                return obj
+        return super().to_internal_value(data)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """Counts building a page (``.data``) as the request's ``serialize`` phase."""
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """Counts ``.data`` of a single object as ``serialize``; pair with Meta.list_serializer_class."""
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def format_created_at(value, tz):
+    """'YYYY-MM-DD HH:MM' in ``tz``; same output as strftime('%Y-%m-%d %H:%M'), several times faster."""
+    try:
+        local = value.astimezone(tz)
+    except (ValueError, OverflowError):
+        # out of range after conversion; the raw timestamp is better than nothing
+        return value.isoformat()
+    return f'{local.year:04d}-{local.month:02d}-{local.day:02d} {local.hour:02d}:{local.minute:02d}'
+
+
+def omits_created_at_display(request):
+    return request.query_params.get('created_at_display', '').lower() in FALSE_VALUES
+
+
+def cached_discussion_data(request, data):
+    """A cached discussion representation (or None) with created_at_display left out if ``request`` asks so."""
+    if data is None or not omits_created_at_display(request):
+        return data
+    data = {key: value for key, value in data.items() if key != 'created_at_display'}
+    if 'comments' in data:
+        data['comments'] = [
+            {key: value for key, value in comment.items() if key != 'created_at_display'}
+            for comment in data['comments']
+        ]
+    return data
+
+
+class CreatedAtDisplayMixin:
+    """
+    ``created_at_display``: created_at in the site time zone (TIME_ZONE, or
+    whatever is activated), formatted for display. The time zone is looked up
+    once per serializer rather than once per row. GET requests (lists and
+    single objects) may send ``?created_at_display=false`` to leave the field
+    out and format ``created_at`` on the client instead; the views pass the
+    request in the serializer context for that, and strip the field from
+    cached course discussions with cached_discussion_data().
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None and omits_created_at_display(request):
+            fields.pop('created_at_display', None)
+        return fields
 
-
-class CommentSerializer(serializers.ModelSerializer):
+    def get_created_at_display(self, obj):
+        if not obj.created_at:
+            return None
+        tz = getattr(self, '_display_tz', None)
+        if tz is None:
+            tz = self._display_tz = timezone.get_current_timezone()
+        return format_created_at(obj.created_at, tz)
+
+
+class UpdateFieldsMixin:
+    """
+    Updates save only the submitted fields (and ``updated_at``). A full-row
+    save would write back the ``comment_count`` / ``last_activity_at`` read
+    at the start of the request over concurrent F() updates from
+    base.counters, and ``deleted_at`` over a concurrent soft delete.
+    """
+
+    def update(self, instance, validated_data):
+        serializers.raise_errors_on_nested_writes('update', self, validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class ThreadedCommentMixin:
+    """
+    Validation of ``parent`` (the comment replied to): it must be in the same
+    discussion and not already MAX_DEPTH deep. A comment keeps its place in
+    the thread: ``parent`` cannot change after creation, and comments in a
+    thread (replies, or comments with replies) cannot move to another
+    discussion, since their subtree would be split.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        instance = self.instance
+        discussion = attrs.get('discussion', getattr(instance, 'discussion', None))
+        if instance is None:
+            parent = attrs.get('parent')
+            if parent is not None:
+                if parent.discussion_id != discussion.pk:
+                    raise serializers.ValidationError({'parent': 'A reply must be in the same discussion as its parent.'})
+                if parent.depth >= MAX_DEPTH:
+                    raise serializers.ValidationError({'parent': f'Replies are limited to {MAX_DEPTH} levels.'})
+            return attrs
+        if 'parent' in attrs and getattr(attrs['parent'], 'pk', None) != instance.parent_id:
+            raise serializers.ValidationError({'parent': 'The parent of a comment cannot be changed.'})
+        if discussion.pk != instance.discussion_id and (instance.parent_id or instance.replies.exists()):
+            raise serializers.ValidationError({'discussion': 'A comment in a reply thread cannot move to another discussion.'})
+        return attrs
+
+
+class CommentSerializer(ThreadedCommentMixin, TimedSerializerMixin, CreatedAtDisplayMixin, serializers.ModelSerializer):
+    discussion = PreloadedPrimaryKeyRelatedField(queryset=Discussion.objects.all())
+    parent = PreloadedPrimaryKeyRelatedField(queryset=Comment.objects.all(), required=False, allow_null=True)
     created_at_display = serializers.SerializerMethodField()
     discussion_title = serializers.CharField(source='discussion.title', read_only=True)
 
     class Meta:
         model = Comment
+        list_serializer_class = TimedListSerializer
         fields = '__all__'
 
-    def get_created_at_display(self, obj):
-        if not obj.created_at:
-            return None
-        try:
-            # convert to current SITE timezone (settings.TIME_ZONE)
-            local = timezone.localtime(obj.created_at)
-            return local.strftime('%Y-%m-%d %H:%M')
-        except Exception:
-            return obj.created_at.isoformat()
 
-
-class DiscussionSerializer(serializers.ModelSerializer):
+class DiscussionSerializer(UpdateFieldsMixin, TimedSerializerMixin, CreatedAtDisplayMixin, serializers.ModelSerializer):
     comments = CommentSerializer(many=True, read_only=True)
     created_at_display = serializers.SerializerMethodField()
 
     class Meta:
         model = Discussion
-        fields = '__all__'
-
-    def get_created_at_display(self, obj):
-        if not obj.created_at:
-            return None
-        try:
-            local = timezone.localtime(obj.created_at)
-            return local.strftime('%Y-%m-%d %H:%M')
-        except Exception:
-            return obj.created_at.isoformat()
+        list_serializer_class = TimedListSerializer
+        # deleted_at is internal: only live discussions are ever served
+        exclude = ('deleted_at',)
+        read_only_fields = ('comment_count', 'last_activity_at')
 
 
-class CourseCommentSerializer(serializers.ModelSerializer):
+class CourseCommentSerializer(ThreadedCommentMixin, TimedSerializerMixin, CreatedAtDisplayMixin, serializers.ModelSerializer):
+    discussion = PreloadedPrimaryKeyRelatedField(queryset=CourseDiscussion.objects.all())
+    parent = PreloadedPrimaryKeyRelatedField(queryset=CourseComment.objects.all(), required=False, allow_null=True)
     created_at_display = serializers.SerializerMethodField()
     discussion_title = serializers.CharField(source='discussion.title', read_only=True)
 
     class Meta:
         model = CourseComment
+        list_serializer_class = TimedListSerializer
         fields = '__all__'
 
-    def get_created_at_display(self, obj):
-        if not obj.created_at:
-            return None
-        try:
-            # convert to current SITE timezone (settings.TIME_ZONE)
-            local = timezone.localtime(obj.created_at)
-            return local.strftime('%Y-%m-%d %H:%M')
-        except Exception:
-            return obj.created_at.isoformat()
-
 
-class CourseDiscussionSerializer(serializers.ModelSerializer):
+class CourseDiscussionSerializer(UpdateFieldsMixin, TimedSerializerMixin, CreatedAtDisplayMixin, serializers.ModelSerializer):
     comments = CourseCommentSerializer(many=True, read_only=True)
     created_at_display = serializers.SerializerMethodField()
 
     class Meta:
         model = CourseDiscussion
-        fields = '__all__'
+        list_serializer_class = TimedListSerializer
+        # deleted_at is internal: only live discussions are ever served
+        exclude = ('deleted_at',)
+        read_only_fields = ('comment_count', 'last_activity_at')
+        # the default manager only sees live rows, matching the conditional
+        # unique constraint (DRF's generated validator skips its condition)
+        validators = [
+            UniqueTogetherValidator(queryset=CourseDiscussion.objects.all(), fields=('course_id', 'course_subject')),
+        ]
+
+
+# Lightweight feed representations used by ?mode=summary on the discussion
+# list endpoints. comment_count and last_activity_at are denormalized columns,
+# so no comments are loaded.
+class DiscussionSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Discussion
+        list_serializer_class = TimedListSerializer
+        fields = ('id', 'title', 'author', 'created_at', 'comment_count', 'last_activity_at')
 
-    def get_created_at_display(self, obj):
-        if not obj.created_at:
-            return None
-        try:
-            local = timezone.localtime(obj.created_at)
-            return local.strftime('%Y-%m-%d %H:%M')
-        except Exception:
-            return obj.created_at.isoformat()
+
+class CourseDiscussionSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = CourseDiscussion
+        list_serializer_class = TimedListSerializer
+        fields = ('id', 'course_subject', 'course_id', 'title', 'author', 'created_at', 'comment_count', 'last_activity_at')
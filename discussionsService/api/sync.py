@@ -0,0 +1,138 @@
+"""
+Incremental ("since") sync for the comment lists.
+
+``GET /api/comments/?discussion=<id>&since=<timestamp>`` (``updated_after``
+is an alias; the course comment list takes the same parameters) returns
+only what changed after ``since`` instead of the whole thread::
+
+    {"results": [...comments created or edited since...],
+     "deleted": [...ids of comments deleted or moved away since...],
+     "next_cursor": null,
+     "server_time": "<pass this as since next time>"}
+
+Changed rows are read in (updated_at, id) order off an index, so a sync
+costs O(changes) rather than O(thread). When more than a page changed,
+``next_cursor`` continues the same sync (send it with the same ``since``);
+``deleted`` is only sent on the first page. Clients should apply
+``deleted`` first and then upsert ``results``.
+
+``since`` is widened by COMMENT_SYNC['OVERLAP_SECONDS'] so that a write
+committed just after the previous sync with an earlier updated_at is not
+missed, so a row may be sent twice. A ``since`` older than the tombstone
+retention window gets 410 Gone: the deletions from before it are no longer
+known and the client must refetch the list.
+
+Sync reads always go to the primary database, never a read replica
+(discussionsService.db_router): ``server_time`` comes from the app's clock,
+so rows a lagging replica had not received yet would fall before the
+client's next ``since`` and never be sent.
+"""
+import base64
+import json
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from discussionsService.db_router import PRIMARY
+from .pagination import KeysetCursorPagination
+
+SINCE_PARAMS = ('since', 'updated_after')
+
+
+class SyncWindowExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'since is older than the deletion history; refetch the full list.'
+    default_code = 'sync_window_expired'
+
+
+def sync_config():
+    return {'OVERLAP_SECONDS': 5, 'TOMBSTONE_RETENTION_DAYS': 30, **getattr(settings, 'COMMENT_SYNC', {})}
+
+
+def get_since(request):
+    """The requested ``since`` timestamp, or None for a normal list request."""
+    for param in SINCE_PARAMS:
+        raw = request.query_params.get(param)
+        if raw:
+            break
+    else:
+        return None
+    # a '+' in an unencoded offset arrives as a space
+    value = parse_datetime(raw.replace(' ', '+'))
+    if value is None:
+        raise ValidationError({param: 'Expected an ISO 8601 timestamp.'})
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def format_time(value):
+    return value.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def encode_cursor(obj):
+    raw = json.dumps({'t': obj.updated_at.isoformat(), 'i': obj.pk}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(encoded):
+    try:
+        padded = encoded + '=' * (-len(encoded) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        updated_at = parse_datetime(data['t'])
+        pk = int(data['i'])
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise NotFound('Invalid cursor')
+    if updated_at is None:
+        raise NotFound('Invalid cursor')
+    return updated_at, pk
+
+
+class ChangeSet:
+    """
+    The lazy queries for one page of a sync. Evaluate them with
+    ``evaluate()`` (sync views) or ``aevaluate()`` (async views).
+    """
+
+    def __init__(self, request, since, queryset, tombstones):
+        config = sync_config()
+        queryset, tombstones = queryset.using(PRIMARY), tombstones.using(PRIMARY)
+        self.request = request
+        self.server_time = timezone.now()
+        if since < self.server_time - timedelta(days=config['TOMBSTONE_RETENTION_DAYS']):
+            raise SyncWindowExpired()
+        floor = since - timedelta(seconds=config['OVERLAP_SECONDS'])
+        self.limit = KeysetCursorPagination().get_page_size(request)
+
+        rows = queryset.filter(updated_at__gt=floor)
+        encoded = request.query_params.get('cursor')
+        if encoded:
+            updated_at, pk = decode_cursor(encoded)
+            rows = rows.filter(updated_at__gte=updated_at).filter(Q(updated_at__gt=updated_at) | Q(id__gt=pk))
+        self.rows = rows.order_by('updated_at', 'id')[:self.limit + 1]
+        self.deleted = None if encoded else (
+            tombstones.filter(deleted_at__gt=floor).order_by().values_list('comment_id', flat=True)
+        )
+
+    def evaluate(self, serializer_class):
+        deleted = list(self.deleted) if self.deleted is not None else []
+        return self.build(list(self.rows), deleted, serializer_class)
+
+    async def aevaluate(self, serializer_class):
+        deleted = [pk async for pk in self.deleted] if self.deleted is not None else []
+        return self.build([obj async for obj in self.rows], deleted, serializer_class)
+
+    def build(self, rows, deleted, serializer_class):
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        return {
+            'results': serializer_class(rows, many=True, context={'request': self.request}).data,
+            'deleted': sorted(set(deleted)),
+            'next_cursor': encode_cursor(rows[-1]) if has_more else None,
+            'server_time': format_time(self.server_time),
+        }
@@ -0,0 +1,140 @@
+import inspect
+import logging
+
+from django.core.handlers.asgi import ASGIHandler
+from django.test import SimpleTestCase, TestCase, override_settings
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+from . import async_views
+
+STUDENT = {'X-User-ID': '10', 'X-User-Role': 'STUDENT'}
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.discussion = Discussion.objects.create(title='D1', body='b1', author='A', creator_id=10)
+        self.comment = Comment.objects.create(discussion=self.discussion, body='c1', author='B', creator_id=10)
+        self.course = CourseDiscussion.objects.create(title='CD1', body='cb', author='CA', creator_id=10, course_subject='CS', course_id='101')
+        self.course_comment = CourseComment.objects.create(discussion=self.course, body='cc1', author='CB', creator_id=10)
+
+    def test_views_are_coroutines(self):
+        for name in ('discussion_list_create', 'discussion_detail', 'comment_list_create', 'comment_detail',
+                     'course_discussion_list_create', 'course_discussion_detail', 'course_discussion_by_course_info',
+                     'course_comment_list_create', 'course_comment_detail'):
+            self.assertTrue(inspect.iscoroutinefunction(getattr(async_views, name)), name)
+
+    async def test_lists_match_sync_views(self):
+        for path in ('discussions/', 'comments/', 'discussions/?mode=summary',
+                     'course-discussions/', 'course-comments/?course_subject=CS&course_id=101'):
+            expected = (await self.async_client.get(f'/api/{path}', headers=STUDENT)).json()
+            resp = await self.async_client.get(f'/api/async/{path}', headers=STUDENT)
+            self.assertEqual(resp.status_code, 200, path)
+            self.assertEqual(resp.json(), expected, path)
+
+    async def test_list_is_paginated_with_link_header(self):
+        for i in range(3):
+            await Discussion.objects.acreate(title=f'extra{i}', body='b', author='A')
+        resp = await self.async_client.get('/api/async/discussions/?page_size=2&include_total=true')
+        self.assertEqual(len(resp.json()), 2)
+        self.assertIn('rel="next"', resp['Link'])
+        self.assertEqual(resp['X-Total-Count'], '4')
+
+    async def test_detail_supports_conditional_get(self):
+        url = f'/api/async/discussions/{self.discussion.id}/'
+        resp = await self.async_client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['comments'][0]['body'], 'c1')
+        again = await self.async_client.get(url, headers={'If-None-Match': resp['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+        missing = await self.async_client.get('/api/async/comments/999999/')
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(missing.json(), {'error': 'Comment not found'})
+
+    async def test_create_discussion_and_comment(self):
+        resp = await self.async_client.post(
+            '/api/async/discussions/', {'title': 'New', 'body': 'nb', 'author': 'N', 'creator_id': '7'},
+            content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 201)
+        created = await Discussion.objects.aget(pk=resp.json()['id'])
+        self.assertEqual(created.creator_id, 7)
+
+        resp = await self.async_client.post(
+            '/api/async/comments/', {'discussion': created.id, 'body': 'hi', 'author': 'N'},
+            content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json()['discussion_title'], 'New')
+        await created.arefresh_from_db()
+        self.assertEqual(created.comment_count, 1)
+
+    async def test_comment_for_missing_discussion_is_rejected(self):
+        resp = await self.async_client.post(
+            '/api/async/comments/', {'discussion': 999999, 'body': 'hi', 'author': 'N'},
+            content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('discussion', resp.json())
+
+    async def test_course_endpoints_require_student_role(self):
+        resp = await self.async_client.get('/api/async/course-discussions/')
+        self.assertEqual(resp.status_code, 403)
+        resp = await self.async_client.get('/api/async/course-discussions/', headers={'X-User-ID': '1', 'X-User-Role': 'GUEST'})
+        self.assertEqual(resp.status_code, 403)
+
+    async def test_course_lookup_uses_cache(self):
+        url = '/api/async/course-discussions/CS/101/'
+        first = await self.async_client.get(url, headers=STUDENT)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['title'], 'CD1')
+        # served from the cache populated by the first request, same as the sync view
+        sync = await self.async_client.get('/api/course-discussions/CS/101/', headers=STUDENT)
+        self.assertEqual(sync.json(), first.json())
+
+    async def test_course_comment_post_uses_authenticated_creator(self):
+        resp = await self.async_client.post(
+            '/api/async/course-comments/', {'discussion': self.course.id, 'body': 'new', 'author': 'S'},
+            content_type='application/json', headers=STUDENT,
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json()['creator_id'], 10)
+
+    async def test_unsupported_method(self):
+        resp = await self.async_client.delete(f'/api/async/discussions/{self.discussion.id}/')
+        self.assertEqual(resp.status_code, 405)
+
+    async def test_create_course_discussion(self):
+        resp = await self.async_client.post(
+            '/api/async/course-discussions/',
+            {'title': 'CD2', 'body': 'b', 'author': 'S', 'course_subject': 'CS', 'course_id': '102'},
+            content_type='application/json', headers=STUDENT,
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual((resp.json()['creator_id'], resp.json()['comments']), (10, []))
+
+        duplicate = await self.async_client.post(
+            '/api/async/course-discussions/',
+            {'title': 'CD3', 'body': 'b', 'author': 'S', 'course_subject': 'CS', 'course_id': '102'},
+            content_type='application/json', headers=STUDENT,
+        )
+        self.assertEqual(duplicate.status_code, 400)
+
+
+class AsyncMiddlewareTests(SimpleTestCase):
+    @override_settings(DEBUG=True)
+    def test_middleware_chain_is_not_adapted_under_asgi(self):
+        # with DEBUG on, Django logs each middleware it wraps in async_to_sync/sync_to_async
+        with self.assertLogs('django.request', 'DEBUG') as logs:
+            logging.getLogger('django.request').debug('building the ASGI handler')
+            ASGIHandler()
+        self.assertEqual([r.getMessage() for r in logs.records if 'adapted' in r.getMessage()], [])
+
+
+@override_settings(QUERY_COUNT_HEADER=True)
+class AsyncMiddlewareRequestTests(TestCase):
+    async def test_middleware_runs_on_async_requests(self):
+        await Discussion.objects.acreate(title='D1', body='b1', author='A')
+        resp = await self.async_client.get('/api/async/discussions/', headers={'X-Request-ID': 'abc-123'})
+        self.assertEqual(resp['X-Request-ID'], 'abc-123')
+        self.assertIn('db;dur=', resp['Server-Timing'])
+        self.assertGreater(int(resp['X-Query-Count']), 0)
@@ -0,0 +1,84 @@
+import time
+from unittest import mock
+
+import jwt
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.backends import TokenBackend
+from discussionsService.authentication import (
+    ExternalJWTAuthentication, VerifiedTokenCache, get_token_cache, reset_token_cache,
+)
+
+
+def make_token(user_id=1, exp_in=3600, **claims):
+    payload = {'user_id': user_id, 'role': 'STUDENT', 'exp': int(time.time()) + exp_in, **claims}
+    return jwt.encode(payload, settings.SIMPLE_JWT['SIGNING_KEY'], algorithm='HS256')
+
+
+class ExternalJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        reset_token_cache()
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, token):
+        request = self.factory.get('/api/discussions/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return ExternalJWTAuthentication().authenticate(request)
+
+    def test_valid_token(self):
+        user, payload = self.authenticate(make_token(user_id=7, email='a@b.c'))
+        self.assertEqual(user.id, 7)
+        self.assertEqual(user.email, 'a@b.c')
+        self.assertEqual(payload['role'], 'STUDENT')
+
+    def test_repeated_token_is_verified_once(self):
+        token = make_token()
+        with mock.patch.object(TokenBackend, 'decode', autospec=True, side_effect=TokenBackend.decode) as decode:
+            for _ in range(5):
+                self.authenticate(token)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_invalid_token_is_rejected_and_not_cached(self):
+        token = make_token() + 'tampered'
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(token)
+        self.assertEqual(len(get_token_cache()), 0)
+
+    @override_settings(SIMPLE_JWT={**settings.SIMPLE_JWT, 'VERIFIED_TOKEN_CACHE_SIZE': 0})
+    def test_cache_can_be_disabled(self):
+        token = make_token()
+        with mock.patch.object(TokenBackend, 'decode', autospec=True, side_effect=TokenBackend.decode) as decode:
+            self.authenticate(token)
+            self.authenticate(token)
+        self.assertEqual(decode.call_count, 2)
+
+
+class VerifiedTokenCacheTests(TestCase):
+    def test_entry_expires_with_token(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=300)
+        cache.set('t', {'user_id': 1, 'exp': time.time() - 1})
+        self.assertIsNone(cache.get('t'))
+
+    def test_entry_expires_after_ttl(self):
+        cache = VerifiedTokenCache(max_size=10, ttl=60)
+        cache.set('t', {'user_id': 1})
+        with mock.patch('discussionsService.authentication.time.time', return_value=time.time() + 61):
+            self.assertIsNone(cache.get('t'))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = VerifiedTokenCache(max_size=2, ttl=60)
+        cache.set('a', {'user_id': 1})
+        cache.set('b', {'user_id': 2})
+        cache.get('a')
+        cache.set('c', {'user_id': 3})
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_returned_payload_is_a_copy(self):
+        cache = VerifiedTokenCache(max_size=2, ttl=60)
+        cache.set('a', {'user_id': 1})
+        cache.get('a')['user_id'] = 99
+        self.assertEqual(cache.get('a')['user_id'], 1)
@@ -0,0 +1,98 @@
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+class BulkCommentTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=3, role='STUDENT'))
+        self.d1 = Discussion.objects.create(title='D1', body='b', author='A')
+        self.d2 = Discussion.objects.create(title='D2', body='b', author='A')
+        self.course = CourseDiscussion.objects.create(title='CD', body='b', author='A', course_subject='CS', course_id='1')
+
+    def test_json_array_is_created_in_order(self):
+        items = [
+            {'discussion': self.d1.id, 'body': 'one', 'author': 'x', 'creator_id': '9'},
+            {'discussion': self.d2.id, 'body': 'two', 'author': 'y'},
+            {'discussion': self.d1.id, 'body': 'three', 'author': 'z', 'creator_id': 'bogus'},
+        ]
+        resp = self.client.post('/api/comments/bulk/', items, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['created'], 3)
+        ids = [r['id'] for r in resp.data['results']]
+        self.assertEqual([r['index'] for r in resp.data['results']], [0, 1, 2])
+        self.assertEqual([Comment.objects.get(pk=pk).body for pk in ids], ['one', 'two', 'three'])
+        self.assertEqual(Comment.objects.get(pk=ids[0]).creator_id, 9)
+        self.assertIsNone(Comment.objects.get(pk=ids[2]).creator_id)
+
+        self.d1.refresh_from_db()
+        self.d2.refresh_from_db()
+        self.assertEqual((self.d1.comment_count, self.d2.comment_count), (2, 1))
+
+    def test_query_count_does_not_grow_with_items(self):
+        items = [{'discussion': self.d1.id, 'body': f'c{i}', 'author': 'x'} for i in range(50)]
+        # preload discussions, insert, thread paths, one counter update,
+        # search index delete + insert (+ savepoint bookkeeping)
+        with self.assertNumQueries(8):
+            resp = self.client.post('/api/comments/bulk/', items, format='json')
+        self.assertEqual(resp.status_code, 201)
+
+    def test_invalid_items_reject_whole_batch_with_indexed_errors(self):
+        items = [
+            {'discussion': self.d1.id, 'body': 'ok', 'author': 'x'},
+            {'discussion': 999999, 'body': 'bad fk', 'author': 'x'},
+            {'discussion': self.d1.id, 'author': 'missing body'},
+        ]
+        resp = self.client.post('/api/comments/bulk/', items, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual([e['index'] for e in resp.data['errors']], [1, 2])
+        self.assertIn('discussion', resp.data['errors'][0]['errors'])
+        self.assertIn('body', resp.data['errors'][1]['errors'])
+        self.assertEqual(Comment.objects.count(), 0)
+
+    def test_ndjson_stream(self):
+        lines = [json.dumps({'discussion': self.d1.id, 'body': f'n{i}', 'author': 'x'}) for i in range(3)]
+        body = '\n'.join(lines[:2]) + '\n\n' + lines[2] + '\n'
+        resp = self.client.post('/api/comments/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['created'], 3)
+
+    def test_malformed_ndjson_reports_line(self):
+        body = json.dumps({'discussion': self.d1.id, 'body': 'a', 'author': 'x'}) + '\n{oops\n'
+        resp = self.client.post('/api/comments/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('line 2', resp.data['detail'])
+
+    def test_rejects_non_list_and_oversized_batches(self):
+        resp = self.client.post('/api/comments/bulk/', {'discussion': self.d1.id}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        with self.settings(BULK_COMMENTS={'MAX_ITEMS': 2}):
+            items = [{'discussion': self.d1.id, 'body': 'x', 'author': 'x'}] * 3
+            resp = self.client.post('/api/comments/bulk/', items, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_course_comments_use_authenticated_creator_and_evict_cache(self):
+        url = '/api/course-discussions/CS/1/'
+        self.assertEqual(self.client.get(url).data['comments'], [])
+        items = [{'discussion': self.course.id, 'body': 'hi', 'author': 'x', 'creator_id': 77}]
+        resp = self.client.post('/api/course-comments/bulk/', items, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(CourseComment.objects.get().creator_id, 3)
+        data = self.client.get(url).data
+        self.assertEqual([c['body'] for c in data['comments']], ['hi'])
+        self.assertEqual(data['comment_count'], 1)
+
+    def test_course_bulk_requires_student(self):
+        self.client.force_authenticate(user=None)
+        resp = self.client.post('/api/course-comments/bulk/', [], format='json')
+        self.assertEqual(resp.status_code, 403)
@@ -0,0 +1,85 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from base.models import CourseDiscussion, CourseComment
+from .cache import cache_stats, reset_cache_stats
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+class CourseDiscussionCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=10, role='STUDENT'))
+        self.discussion = CourseDiscussion.objects.create(title='CD1', body='cb', author='CA', creator_id=10, course_subject='CS', course_id='101')
+        reset_cache_stats()
+
+    def test_second_lookup_is_a_hit_without_queries(self):
+        url = '/api/course-discussions/CS/101/'
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['title'], 'CD1')
+        stats = cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_list_filter_shares_the_cache(self):
+        self.client.get('/api/course-discussions/CS/101/')
+        with self.assertNumQueries(0):
+            resp = self.client.get('/api/course-discussions/?course_subject=CS&course_id=101')
+        self.assertEqual([d['id'] for d in resp.data], [self.discussion.id])
+
+    def test_missing_course_is_not_cached(self):
+        resp = self.client.get('/api/course-discussions/?course_subject=CS&course_id=999')
+        self.assertEqual(resp.data, [])
+        CourseDiscussion.objects.create(title='new', body='b', author='A', course_subject='CS', course_id='999')
+        resp = self.client.get('/api/course-discussions/?course_subject=CS&course_id=999')
+        self.assertEqual(len(resp.data), 1)
+
+    def test_new_comment_invalidates(self):
+        url = '/api/course-discussions/CS/101/'
+        self.assertEqual(self.client.get(url).data['comments'], [])
+        resp = self.client.post('/api/course-comments/', {'discussion': self.discussion.id, 'body': 'hi', 'author': 'U'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual([c['body'] for c in self.client.get(url).data['comments']], ['hi'])
+
+    def test_comment_delete_invalidates(self):
+        comment = CourseComment.objects.create(discussion=self.discussion, body='gone', author='U')
+        url = '/api/course-discussions/CS/101/'
+        self.assertEqual(len(self.client.get(url).data['comments']), 1)
+        comment.delete()
+        self.assertEqual(self.client.get(url).data['comments'], [])
+
+    def test_update_that_moves_course_evicts_old_key(self):
+        self.client.get('/api/course-discussions/CS/101/')
+        resp = self.client.put(
+            f'/api/course-discussions/{self.discussion.id}/',
+            {'title': 'moved', 'body': 'b', 'author': 'CA', 'course_subject': 'CS', 'course_id': '102'},
+            format='json',
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.client.get('/api/course-discussions/CS/101/').status_code, 404)
+        self.assertEqual(self.client.get('/api/course-discussions/CS/102/').data['title'], 'moved')
+
+    def test_delete_invalidates(self):
+        url = '/api/course-discussions/CS/101/'
+        self.client.get(url)
+        resp = self.client.delete(url)
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_stats_endpoint_is_admin_only(self):
+        resp = self.client.get('/api/course-discussions/cache-stats/')
+        self.assertEqual(resp.status_code, 403)
+
+        self.client.force_authenticate(user=DummyUser(id=1, role='ADMIN'))
+        self.client.get('/api/course-discussions/CS/101/')
+        resp = self.client.get('/api/course-discussions/cache-stats/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['misses'], 1)
+        self.assertIn('hit_ratio', resp.data)
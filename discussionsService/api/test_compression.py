@@ -0,0 +1,115 @@
+import gzip
+import json
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.utils import timezone
+from django.utils.functional import lazy
+from rest_framework.renderers import JSONRenderer
+from api import renderers
+from api.renderers import FastJSONRenderer
+from base.models import Discussion, Comment
+from discussionsService.compression import COMPRESSORS, choose_encoding
+
+STAFF = {'X-User-ID': '1', 'X-User-Role': 'STAFF'}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def sample(self):
+        return {
+            'when': timezone.now(),
+            'text': 'café \u2028 line \u2029 para "quoted"',
+            'lazy': lazy(lambda: 'translated', str)(),
+            'amount': Decimal('1.50'),
+            'items': [1, 2.5, None, True, ('a', 'b')],
+            1: 'int key',
+        }
+
+    def test_same_bytes_as_drf(self):
+        data = self.sample()
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    @skipIf(renderers.orjson is None, 'orjson not installed')
+    def test_uses_orjson(self):
+        with mock.patch.object(renderers.orjson, 'dumps', wraps=renderers.orjson.dumps) as dumps:
+            FastJSONRenderer().render({'a': 1})
+        dumps.assert_called_once()
+
+    def test_fallbacks(self):
+        data = self.sample()
+        expected = JSONRenderer().render(data)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+        indented = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(indented, b'{\n  "a": 1\n}')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class ChooseEncodingTests(SimpleTestCase):
+    def test_negotiation(self):
+        self.assertEqual(choose_encoding('gzip, deflate', ['br', 'gzip']), 'gzip')
+        self.assertEqual(choose_encoding('gzip, br', ['br', 'gzip']), 'br')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip;q=0.8', ['br', 'gzip']), 'gzip')
+        self.assertEqual(choose_encoding('*', ['br', 'gzip']), 'br')
+        self.assertEqual(choose_encoding('gzip;q=0, *;q=0.1', ['gzip']), None)
+        self.assertEqual(choose_encoding('identity', ['br', 'gzip']), None)
+        self.assertEqual(choose_encoding('', ['gzip']), None)
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        for n in range(30):
+            d = Discussion.objects.create(title=f'Discussion {n}', body='body ' * 20, author='A')
+            Comment.objects.create(discussion=d, body='comment ' * 10, author='A')
+
+    def test_large_json_is_gzipped(self):
+        plain = self.client.get('/api/discussions/')
+        resp = self.client.get('/api/discussions/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        self.assertEqual(int(resp['Content-Length']), len(resp.content))
+        self.assertLess(len(resp.content), len(plain.content) / 3)
+        self.assertEqual(json.loads(gzip.decompress(resp.content)), plain.json())
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+    @skipIf('br' not in COMPRESSORS, 'brotli not installed')
+    def test_brotli_preferred(self):
+        import brotli
+        resp = self.client.get('/api/discussions/', headers={'Accept-Encoding': 'gzip, deflate, br'})
+        self.assertEqual(resp['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(resp.content)), self.client.get('/api/discussions/').json())
+
+    def test_small_responses_are_not_compressed(self):
+        resp = self.client.get('/api/discussions/?page_size=1', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', resp)
+        self.assertFalse(resp.has_header('Vary') and 'Accept-Encoding' in resp['Vary'])
+
+    def test_streaming_responses_are_not_compressed(self):
+        resp = self.client.get('/api/export/', headers={**STAFF, 'Accept-Encoding': 'gzip'})
+        self.assertTrue(resp.streaming)
+        self.assertNotIn('Content-Encoding', resp)
+        b''.join(resp.streaming_content)
+
+    def test_etag_is_weakened_and_still_revalidates(self):
+        pk = Discussion.objects.first().pk
+        Comment.objects.bulk_create([Comment(discussion_id=pk, body='x' * 50, author='A') for _ in range(30)])
+        strong = self.client.get(f'/api/discussions/{pk}/')['ETag']
+        resp = self.client.get(f'/api/discussions/{pk}/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertEqual(resp['ETag'], 'W/' + strong)
+        again = self.client.get(f'/api/discussions/{pk}/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': resp['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    @override_settings(RESPONSE_COMPRESSION={'ENABLED': False})
+    def test_disabled(self):
+        resp = self.client.get('/api/discussions/', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', resp)
+
+    def test_async_views_render_the_same_bytes(self):
+        sync = self.client.get('/api/discussions/')
+        async_ = self.client.get('/api/async/discussions/')
+        self.assertEqual(sync.content, async_.content)
+        self.assertEqual(async_['Content-Type'], 'application/json')
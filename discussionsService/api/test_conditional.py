@@ -0,0 +1,81 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='STUDENT'))
+        self.discussion = Discussion.objects.create(title='D', body='b', author='A', creator_id=1)
+        self.comment = Comment.objects.create(discussion=self.discussion, body='c', author='A', creator_id=1)
+        self.course = CourseDiscussion.objects.create(title='CD', body='b', author='A', course_subject='CS', course_id='1', creator_id=1)
+        self.course_comment = CourseComment.objects.create(discussion=self.course, body='c', author='A', creator_id=1)
+
+    def urls(self):
+        return [
+            f'/api/discussions/{self.discussion.id}/',
+            f'/api/comments/{self.comment.id}/',
+            f'/api/course-discussions/{self.course.id}/',
+            f'/api/course-comments/{self.course_comment.id}/',
+        ]
+
+    def test_detail_responses_carry_validators(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                resp = self.client.get(url)
+                self.assertEqual(resp.status_code, 200)
+                self.assertTrue(resp['ETag'].startswith('"'))
+                self.assertIn('Last-Modified', resp)
+
+    def test_matching_etag_returns_304_with_one_query(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(1):
+                    resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(resp.status_code, 304)
+                self.assertEqual(resp.content, b'')
+
+    def test_if_modified_since(self):
+        url = f'/api/comments/{self.comment.id}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_new_comment_changes_discussion_etag(self):
+        url = f'/api/discussions/{self.discussion.id}/'
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(discussion=self.discussion, body='new', author='B')
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_deleted_comment_changes_discussion_etag(self):
+        url = f'/api/discussions/{self.discussion.id}/'
+        older = Comment.objects.create(discussion=self.discussion, body='old', author='B')
+        Comment.objects.filter(pk=older.pk).update(updated_at=self.comment.updated_at)
+        etag = self.client.get(url)['ETag']
+        older.delete()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_parent_rename_changes_comment_etag(self):
+        url = f'/api/comments/{self.comment.id}/'
+        etag = self.client.get(url)['ETag']
+        self.discussion.title = 'renamed'
+        self.discussion.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['discussion_title'], 'renamed')
+
+    def test_missing_returns_404(self):
+        resp = self.client.get('/api/discussions/999999/', HTTP_IF_NONE_MATCH='"x"')
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from api.serializers import CourseDiscussionSerializer, DiscussionSerializer
+from base.counters import comments_added, comments_removed
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+
+class CounterTests(TestCase):
+    def test_added_and_removed_use_single_updates(self):
+        d = Discussion.objects.create(title='D', body='b', author='A')
+        c = Comment.objects.create(discussion=d, body='c', author='A')
+        with self.assertNumQueries(1):
+            comments_added(Discussion, d.id, last_activity_at=c.created_at)
+        with self.assertNumQueries(1):
+            comments_removed(Discussion, d.id, count=5)
+        d.refresh_from_db()
+        # never drops below zero
+        self.assertEqual(d.comment_count, 0)
+        self.assertEqual(d.last_activity_at, c.created_at)
+
+    def test_last_activity_never_moves_backwards(self):
+        d = Discussion.objects.create(title='D', body='b', author='A')
+        before = d.last_activity_at
+        comments_added(Discussion, d.id, last_activity_at=before.replace(year=2000))
+        d.refresh_from_db()
+        self.assertEqual(d.last_activity_at, before)
+
+    def test_edits_do_not_overwrite_concurrent_counter_updates(self):
+        d = Discussion.objects.create(title='D', body='b', author='A')
+        cd = CourseDiscussion.objects.create(title='CD', body='b', author='A', course_subject='CS', course_id='1')
+        for serializer_class, obj, data in (
+            (DiscussionSerializer, d, {'title': 'Edited', 'body': 'b', 'author': 'A'}),
+            (CourseDiscussionSerializer, cd, {'title': 'Edited', 'body': 'b', 'author': 'A', 'course_subject': 'CS', 'course_id': '1'}),
+        ):
+            # loaded by the PUT before another request adds a comment and soft-deletes it
+            serializer = serializer_class(obj, data=data)
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            comments_added(type(obj), obj.id, count=3)
+            type(obj).objects.filter(pk=obj.pk).update(deleted_at=timezone.now())
+            serializer.save()
+
+            fresh = type(obj).all_objects.get(pk=obj.pk)
+            self.assertEqual(fresh.title, 'Edited')
+            self.assertEqual(fresh.comment_count, 3)
+            self.assertIsNotNone(fresh.deleted_at)
+
+    def test_recompute_command_repairs_drift(self):
+        d = Discussion.objects.create(title='D', body='b', author='A')
+        empty = Discussion.objects.create(title='E', body='b', author='A')
+        comments = [Comment.objects.create(discussion=d, body=f'c{i}', author='A') for i in range(3)]
+        cd = CourseDiscussion.objects.create(title='CD', body='b', author='A', course_subject='CS', course_id='1')
+        CourseComment.objects.create(discussion=cd, body='c', author='A')
+        Discussion.objects.update(comment_count=42)
+
+        out = StringIO()
+        call_command('recompute_discussion_counters', '--batch-size', '1', stdout=out)
+
+        d.refresh_from_db()
+        empty.refresh_from_db()
+        cd.refresh_from_db()
+        self.assertEqual(d.comment_count, 3)
+        self.assertEqual(d.last_activity_at, comments[-1].created_at)
+        self.assertEqual(empty.comment_count, 0)
+        self.assertEqual(empty.last_activity_at, empty.created_at)
+        self.assertEqual(cd.comment_count, 1)
+        self.assertIn('Discussion: recomputed 2 rows', out.getvalue())
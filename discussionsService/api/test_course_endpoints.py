@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from base.models import CourseDiscussion, CourseComment
 
@@ -65,3 +67,31 @@ class CourseEndpointTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         resp = self.client.delete(f'/api/course-comments/{self.comment.id}/')
         self.assertIn(resp.status_code, (200, 204))
+
+    def test_course_comment_list_default_path_is_one_select(self):
+        user = DummyUser(id=2, role='STUDENT')
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(f'/api/course-comments/?discussion={self.discussion.id}')
+        self.assertEqual(resp.status_code, 200)
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('COUNT(', selects[0].upper())
+        self.assertNotIn('X-Total-Count', resp)
+
+    def test_course_comment_list_total_is_opt_in_and_same_round_trip(self):
+        user = DummyUser(id=2, role='STUDENT')
+        self.client.force_authenticate(user=user)
+        for i in range(4):
+            CourseComment.objects.create(discussion=self.discussion, body=f'more{i}', author='U')
+        other = CourseDiscussion.objects.create(title='CD2', body='cb', author='CA', course_subject='CS', course_id='102')
+        CourseComment.objects.create(discussion=other, body='elsewhere', author='U')
+
+        url = f'/api/course-comments/?discussion={self.discussion.id}&include_total=true&page_size=2'
+        with self.assertNumQueries(1):
+            resp = self.client.get(url)
+        self.assertEqual(len(resp.data), 2)
+        self.assertEqual(resp['X-Total-Count'], '5')
+
+        resp = self.client.get('/api/course-comments/?course_subject=CS&course_id=101&include_total=1')
+        self.assertEqual(resp['X-Total-Count'], '5')
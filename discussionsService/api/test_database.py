@@ -0,0 +1,91 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase, SimpleTestCase, override_settings
+
+from discussionsService.database import database_config, sqlite_pragmas
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    default = Path('/srv/db.sqlite3')
+
+    def test_defaults_to_tuned_sqlite(self):
+        config = database_config({}, self.default)
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(config['NAME'], self.default)
+        self.assertEqual(config['OPTIONS'], {'transaction_mode': 'IMMEDIATE'})
+        self.assertEqual(sqlite_pragmas({})['journal_mode'], 'WAL')
+
+    def test_sqlite_tuning_can_be_disabled(self):
+        env = {'SQLITE_TUNING': '0'}
+        self.assertNotIn('OPTIONS', database_config(env, self.default))
+        self.assertEqual(sqlite_pragmas(env), {})
+
+    def test_postgres_from_variables(self):
+        config = database_config({'DB_ENGINE': 'postgres', 'DB_NAME': 'disc', 'DB_HOST': 'db', 'DB_CONN_MAX_AGE': '120'}, self.default)
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((config['NAME'], config['HOST'], config['PORT']), ('disc', 'db', '5432'))
+        self.assertEqual(config['CONN_MAX_AGE'], 120)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', config['OPTIONS'])
+
+    def test_postgres_url_with_pool(self):
+        env = {'DATABASE_URL': 'postgres://u%40x:p@db.example:6432/disc', 'DB_POOL': '1', 'DB_POOL_MAX_SIZE': '20'}
+        config = database_config(env, self.default)
+        self.assertEqual((config['USER'], config['PASSWORD'], config['HOST'], config['PORT']), ('u@x', 'p', 'db.example', '6432'))
+        self.assertEqual(config['OPTIONS']['pool']['max_size'], 20)
+        # Django rejects persistent connections together with the pool
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+
+    def test_sqlite_url(self):
+        self.assertEqual(database_config({'DATABASE_URL': 'sqlite:////tmp/x.db'}, self.default)['NAME'], '/tmp/x.db')
+
+    def test_unknown_url_scheme(self):
+        with self.assertRaises(ValueError):
+            database_config({'DATABASE_URL': 'mysql://db/x'}, self.default)
+
+
+class SqlitePragmaTests(TestCase):
+    def connect(self):
+        # a fresh connection to a file, so connection_created fires outside the test transaction
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(tmp.name, 'db.sqlite3')}, alias='pragmas')
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_new_connections(self):
+        with override_settings(SQLITE_PRAGMAS=sqlite_pragmas({})):
+            wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+
+    def test_untuned(self):
+        with override_settings(SQLITE_PRAGMAS={}):
+            wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+
+class HealthTests(TestCase):
+    def test_healthy(self):
+        resp = self.client.get('/api/health/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['status'], 'ok')
+        self.assertTrue(resp.json()['databases']['default']['ok'])
+
+    def test_database_down(self):
+        with mock.patch.object(connection, 'cursor', side_effect=DatabaseError('down')):
+            resp = self.client.get('/api/health/')
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.json()['databases']['default'], {'vendor': 'sqlite', 'ok': False})
@@ -1,6 +1,9 @@
+from datetime import timedelta
+
 from django.test import TestCase
 from rest_framework.test import APIClient
 from base.models import Discussion, Comment
+from django.utils.dateparse import parse_datetime
 
 
 class DummyUser:
@@ -108,3 +111,53 @@ class DiscussionEndpointTests(TestCase):
         resp = self.client.post('/api/discussions/', {'title': 't', 'author': 'a'}, format='json')
         self.assertEqual(resp.status_code, 400)
 
+    def test_summary_mode_omits_comments_and_counts_them(self):
+        user = DummyUser(id=22, role='STUDENT')
+        self.client.force_authenticate(user=user)
+
+        d = Discussion.objects.create(title='busy', body='b', author='a')
+        for body in ('c1', 'c2'):
+            resp = self.client.post('/api/comments/', {'discussion': d.id, 'body': body, 'author': 'x'}, format='json')
+            self.assertEqual(resp.status_code, 201)
+        latest = Comment.objects.get(pk=resp.data['id'])
+
+        resp = self.client.get('/api/discussions/?mode=summary')
+        self.assertEqual(resp.status_code, 200)
+        item = next(x for x in resp.data if x['id'] == d.id)
+        self.assertNotIn('comments', item)
+        self.assertNotIn('body', item)
+        self.assertEqual(item['comment_count'], 2)
+        self.assertEqual(parse_datetime(item['last_activity_at']), latest.created_at)
+
+        quiet = next(x for x in resp.data if x['id'] == self.owner_discussion.id)
+        self.assertEqual(quiet['comment_count'], 0)
+        self.assertGreaterEqual(parse_datetime(quiet['last_activity_at']), self.owner_discussion.created_at - timedelta(seconds=1))
+
+    def test_comment_views_maintain_counters(self):
+        user = DummyUser(id=23, role='STUDENT')
+        self.client.force_authenticate(user=user)
+        d = Discussion.objects.create(title='counted', body='b', author='a')
+        other = Discussion.objects.create(title='other', body='b', author='a')
+
+        ids = []
+        for i in range(3):
+            resp = self.client.post('/api/comments/', {'discussion': d.id, 'body': f'c{i}', 'author': 'x', 'creator_id': 23}, format='json')
+            ids.append(resp.data['id'])
+        d.refresh_from_db()
+        self.assertEqual(d.comment_count, 3)
+        self.assertEqual(d.last_activity_at, Comment.objects.get(pk=ids[-1]).created_at)
+
+        self.client.delete(f'/api/comments/{ids[0]}/')
+        # moving a comment to another discussion shifts the count with it
+        self.client.put(f'/api/comments/{ids[1]}/', {'discussion': other.id, 'body': 'moved', 'author': 'x'}, format='json')
+        d.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(d.comment_count, 1)
+        self.assertEqual(other.comment_count, 1)
+
+    def test_counters_are_read_only(self):
+        user = DummyUser(id=24, role='STUDENT')
+        self.client.force_authenticate(user=user)
+        resp = self.client.post('/api/discussions/', {'title': 't', 'body': 'b', 'author': 'a', 'comment_count': 50}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['comment_count'], 0)
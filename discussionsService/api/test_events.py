@@ -0,0 +1,195 @@
+import asyncio
+import json
+import threading
+import time
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment, CourseDiscussion
+from .events import CREATED, DELETED, RESET, UPDATED, EventBus, get_event_bus, reset_event_bus
+
+STUDENT = {'X-User-ID': '10', 'X-User-Role': 'STUDENT'}
+FAST_STREAM = {'MAX_STREAM_SECONDS': 0.3, 'HEARTBEAT': 0.1}
+
+
+def drain(subscription, timeout=0.05):
+    async def collect():
+        events = []
+        while (event := await subscription.aget(timeout)) is not None:
+            events.append(event)
+        return events
+    return asyncio.run(collect())
+
+
+def parse_stream(body):
+    events = []
+    for block in body.decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':') and ': ' in line)
+        if 'event' in fields:
+            events.append({'id': fields.get('id'), 'event': fields['event'], 'data': json.loads(fields['data'])})
+    return events
+
+
+class EventBusTests(SimpleTestCase):
+    def setUp(self):
+        self.bus = EventBus(replay_size=3, queue_size=2)
+
+    def test_events_fan_out_to_channel_subscribers_only(self):
+        first = self.bus.subscribe('discussion:1')
+        second = self.bus.subscribe('discussion:1')
+        other = self.bus.subscribe('discussion:2')
+        self.bus.publish('discussion:1', CREATED, {'id': 5})
+        self.assertEqual([e.data for e in drain(first)], [{'id': 5}])
+        self.assertEqual([e.data for e in drain(second)], [{'id': 5}])
+        self.assertEqual(drain(other), [])
+
+    def test_replay_from_last_event_id(self):
+        ids = [self.bus.publish('discussion:1', CREATED, {'id': i}).id for i in range(3)]
+        subscription = self.bus.subscribe('discussion:1', last_event_id=ids[0])
+        self.assertEqual([e.data['id'] for e in drain(subscription)], [1, 2])
+
+    def test_unknown_last_event_id_gets_reset(self):
+        for i in range(5):
+            self.bus.publish('discussion:1', CREATED, {'id': i})
+        subscription = self.bus.subscribe('discussion:1', last_event_id='evicted')
+        self.assertEqual([e.type for e in drain(subscription)], [RESET])
+
+    def test_slow_subscriber_is_disconnected(self):
+        subscription = self.bus.subscribe('discussion:1')
+        for i in range(3):
+            self.bus.publish('discussion:1', CREATED, {'id': i})
+        self.assertTrue(subscription.overflowed)
+        # what was queued is still delivered, then the stream ends
+        self.assertEqual([e.data['id'] for e in drain(subscription)], [0, 1])
+        self.assertTrue(subscription.closed)
+
+    def test_close_unsubscribes(self):
+        subscription = self.bus.subscribe('discussion:1')
+        self.assertEqual(self.bus.subscriber_count('discussion:1'), 1)
+        subscription.close()
+        self.assertEqual(self.bus.subscriber_count(), 0)
+
+
+class CommentEventTests(TestCase):
+    def setUp(self):
+        self.addCleanup(reset_event_bus)
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_USER_ID='10', HTTP_X_USER_ROLE='STUDENT')
+        self.discussion = Discussion.objects.create(title='D1', body='b1', author='A', creator_id=10)
+        self.course = CourseDiscussion.objects.create(title='CD1', body='cb', author='CA', creator_id=10, course_subject='CS', course_id='101')
+
+    def test_comment_writes_are_published_after_commit(self):
+        subscription = get_event_bus().subscribe(f'discussion:{self.discussion.id}')
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/api/comments/', {'discussion': self.discussion.id, 'body': 'hi', 'author': 'B', 'creator_id': 10}, format='json')
+        comment_id = resp.data['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f'/api/comments/{comment_id}/', {'discussion': self.discussion.id, 'body': 'edited', 'author': 'B'}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/comments/{comment_id}/')
+
+        events = drain(subscription)
+        self.assertEqual([e.type for e in events], [CREATED, UPDATED, DELETED])
+        self.assertEqual(events[0].data['body'], 'hi')
+        self.assertEqual(events[1].data['body'], 'edited')
+        self.assertEqual(events[2].data, {'id': comment_id, 'discussion': self.discussion.id})
+
+    def test_created_events_carry_the_thread_path(self):
+        subscription = get_event_bus().subscribe(f'discussion:{self.discussion.id}')
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/api/comments/', {'discussion': self.discussion.id, 'body': 'top', 'author': 'B'}, format='json')
+        top = resp.data['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/comments/', {'discussion': self.discussion.id, 'parent': top, 'body': 'reply', 'author': 'B'}, format='json')
+        events = drain(subscription)
+        stored = {c.id: c.path for c in Comment.objects.all()}
+        self.assertEqual([e.data['path'] for e in events], [stored[e.data['id']] for e in events])
+        self.assertEqual(events[0].data['path'], f'{top:010d}/')
+        self.assertTrue(events[1].data['path'].startswith(events[0].data['path']))
+
+    def test_nothing_is_published_for_rolled_back_writes(self):
+        subscription = get_event_bus().subscribe(f'discussion:{self.discussion.id}')
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Comment.objects.create(discussion=self.discussion, body='x', author='B')
+        self.assertEqual(drain(subscription), [])
+        self.assertEqual(len(callbacks), 1)
+
+    def test_bulk_created_course_comments_are_published(self):
+        subscription = get_event_bus().subscribe(f'course-discussion:{self.course.id}')
+        items = [{'discussion': self.course.id, 'body': f'c{i}', 'author': 'x'} for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/course-comments/bulk/', items, format='json')
+        self.assertEqual([e.data['body'] for e in drain(subscription)], ['c0', 'c1', 'c2'])
+
+
+@override_settings(EVENT_STREAM=FAST_STREAM)
+class EventStreamViewTests(TestCase):
+    def setUp(self):
+        self.addCleanup(reset_event_bus)
+        self.discussion = Discussion.objects.create(title='D1', body='b1', author='A', creator_id=10)
+        self.course = CourseDiscussion.objects.create(title='CD1', body='cb', author='CA', creator_id=10, course_subject='CS', course_id='101')
+
+    async def read(self, url, **kwargs):
+        resp = await self.async_client.get(url, **kwargs)
+        body = b''.join([chunk async for chunk in resp.streaming_content])
+        return resp, body
+
+    async def test_stream_replays_after_last_event_id(self):
+        bus = get_event_bus()
+        channel = f'discussion:{self.discussion.id}'
+        first = bus.publish(channel, CREATED, {'id': 1, 'body': 'one'})
+        bus.publish(channel, CREATED, {'id': 2, 'body': 'two'})
+
+        resp, body = await self.read(f'/api/discussions/{self.discussion.id}/events/', headers={'Last-Event-ID': first.id})
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        self.assertEqual(resp['Cache-Control'], 'no-cache')
+        self.assertTrue(body.startswith(b'retry: '))
+        self.assertIn(b': keep-alive', body)
+        events = parse_stream(body)
+        self.assertEqual([(e['event'], e['data']['body']) for e in events], [(CREATED, 'two')])
+        self.assertEqual(bus.subscriber_count(), 0)
+
+    async def test_live_events_are_streamed(self):
+        async def publish_soon():
+            await asyncio.sleep(0.05)
+            get_event_bus().publish(f'course-discussion:{self.course.id}', DELETED, {'id': 7, 'discussion': self.course.id})
+
+        task = asyncio.ensure_future(publish_soon())
+        resp, body = await self.read('/api/course-discussions/CS/101/events/', headers=STUDENT)
+        await task
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([e['event'] for e in parse_stream(body)], [DELETED])
+
+    async def test_missing_discussion_and_permissions(self):
+        resp = await self.async_client.get('/api/discussions/999999/events/')
+        self.assertEqual(resp.status_code, 404)
+        resp = await self.async_client.get(f'/api/course-discussions/{self.course.id}/events/')
+        self.assertEqual(resp.status_code, 403)
+        resp = await self.async_client.get('/api/course-discussions/CS/999/events/', headers=STUDENT)
+        self.assertEqual(resp.status_code, 404)
+
+
+@override_settings(EVENT_STREAM={'MAX_STREAM_SECONDS': 30, 'HEARTBEAT': 0.1})
+class WSGIEventStreamTests(TestCase):
+    def setUp(self):
+        self.addCleanup(reset_event_bus)
+        self.discussion = Discussion.objects.create(title='D1', body='b1', author='A', creator_id=10)
+
+    def test_events_arrive_before_the_stream_ends(self):
+        channel = f'discussion:{self.discussion.id}'
+        resp = self.client.get(f'/api/discussions/{self.discussion.id}/events/')
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        publisher = threading.Timer(0.1, lambda: get_event_bus().publish(channel, CREATED, {'id': 1, 'body': 'live'}))
+        started = time.monotonic()
+        publisher.start()
+        # iterated the way a WSGI server sends the body
+        received = b''
+        for chunk in iter(resp):
+            received += chunk
+            if b'event: ' in received:
+                break
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual([e['data']['body'] for e in parse_stream(received)], ['live'])
+        resp.close()
+        publisher.join()
+        self.assertEqual(get_event_bus().subscriber_count(), 0)
@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='STAFF'))
+        d = Discussion.objects.create(title='D', body='b', author='A')
+        Comment.objects.create(discussion=d, body='c', author='A')
+        self.cs = CourseDiscussion.objects.create(title='CS101', body='b', author='A', course_subject='CS', course_id='101')
+        CourseComment.objects.create(discussion=self.cs, body='cs-c', author='A')
+        math = CourseDiscussion.objects.create(title='MATH1', body='b', author='A', course_subject='MATH', course_id='1')
+        CourseComment.objects.create(discussion=math, body='math-c', author='A')
+
+    def read(self, resp):
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        body = b''.join(resp.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_full_export_streams_every_record(self):
+        records = self.read(self.client.get('/api/export/'))
+        self.assertEqual(
+            [r['type'] for r in records],
+            ['discussion', 'comment', 'course_discussion', 'course_discussion', 'course_comment', 'course_comment'],
+        )
+        self.assertEqual(records[0]['title'], 'D')
+        self.assertIn('created_at', records[0])
+
+    def test_course_filter(self):
+        records = self.read(self.client.get('/api/export/?course_subject=CS&course_id=101'))
+        self.assertEqual([(r['type'], r.get('title', r.get('body'))) for r in records],
+                         [('course_discussion', 'CS101'), ('course_comment', 'cs-c')])
+
+    def test_general_scope(self):
+        records = self.read(self.client.get('/api/export/?scope=general'))
+        self.assertEqual({r['type'] for r in records}, {'discussion', 'comment'})
+
+    def test_bad_scope_and_permissions(self):
+        self.assertEqual(self.client.get('/api/export/?scope=nope').status_code, 400)
+        self.client.force_authenticate(user=DummyUser(id=2, role='STUDENT'))
+        self.assertEqual(self.client.get('/api/export/').status_code, 403)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/api/export/').status_code, 403)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command('export_discussions', '--scope', 'course', stdout=out, stderr=StringIO())
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), 4)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'export.ndjson')
+            call_command('export_discussions', '--output', path, stderr=StringIO())
+            with open(path) as fh:
+                self.assertEqual(len(fh.readlines()), 6)
@@ -0,0 +1,59 @@
+import unittest
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'query plans are checked against SQLite')
+class HotQueryPlanTests(TestCase):
+    """
+    The list endpoints filter on discussion / course / creator and page
+    through rows ordered by (created_at, id). Each of those queries must be
+    answered from an index: no full table scan and no separate sort step.
+    """
+
+    def assertIndexed(self, queryset):
+        plan = queryset[:51].explain()
+        self.assertNotIn('TEMP B-TREE', plan, plan)
+        for line in plan.splitlines():
+            if ' SCAN ' in f' {line} ':
+                self.assertIn('USING', line, plan)
+
+    def newest_first(self, queryset, cursor=False):
+        if cursor:
+            now = timezone.now()
+            queryset = queryset.filter(created_at__lte=now).filter(Q(created_at__lt=now) | Q(id__lt=10))
+        return queryset.order_by('-created_at', '-id')
+
+    def test_unfiltered_lists(self):
+        for model in (Discussion, Comment, CourseDiscussion, CourseComment):
+            for cursor in (False, True):
+                with self.subTest(model=model.__name__, cursor=cursor):
+                    self.assertIndexed(self.newest_first(model.objects.all(), cursor))
+
+    def test_comments_by_discussion(self):
+        for model in (Comment, CourseComment):
+            for cursor in (False, True):
+                with self.subTest(model=model.__name__, cursor=cursor):
+                    self.assertIndexed(self.newest_first(model.objects.filter(discussion_id=1), cursor))
+
+    def test_course_comments_by_course_info(self):
+        qs = CourseComment.objects.filter(discussion__course_id='101', discussion__course_subject='CS')
+        self.assertIndexed(self.newest_first(qs))
+
+    def test_course_discussion_by_course_info(self):
+        # the partial unique index on live rows finds the (single) match; SQLite
+        # does not treat a partial index as unique for ORDER BY, so the plan
+        # still has a sort step, over at most one row
+        qs = CourseDiscussion.objects.filter(course_id='101', course_subject='CS')
+        plan = self.newest_first(qs)[:51].explain()
+        self.assertIn('USING INDEX unique_active_course_discussion', plan, plan)
+        self.assertNotIn(' SCAN ', f' {plan} ', plan)
+
+    def test_by_creator(self):
+        for model in (Discussion, Comment, CourseDiscussion, CourseComment):
+            with self.subTest(model=model.__name__):
+                self.assertIndexed(model.objects.filter(creator_id=7).order_by('-created_at'))
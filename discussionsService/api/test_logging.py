@@ -0,0 +1,95 @@
+import json
+import logging
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from base.models import CourseDiscussion
+from discussionsService.logging_utils import (
+    JSONFormatter, RequestContextFilter, debug_sampled_var, parse_levels, request_id_var,
+)
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+class CapturingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.addFilter(RequestContextFilter())
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class RequestLoggingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='STUDENT'))
+        self.discussion = CourseDiscussion.objects.create(title='CD', body='b', author='A', course_subject='CS', course_id='1')
+        self.handler = CapturingHandler()
+        self.logger = logging.getLogger('api')
+        self.previous_level = self.logger.level
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.logger.setLevel(self.previous_level)
+
+    def test_request_id_is_generated_and_echoed(self):
+        resp = self.client.get(f'/api/course-comments/?discussion={self.discussion.id}')
+        self.assertTrue(resp['X-Request-ID'])
+
+        resp = self.client.get(f'/api/course-comments/?discussion={self.discussion.id}', HTTP_X_REQUEST_ID='abc-123')
+        self.assertEqual(resp['X-Request-ID'], 'abc-123')
+
+    def test_malformed_request_id_is_replaced(self):
+        resp = self.client.get(f'/api/course-comments/?discussion={self.discussion.id}', HTTP_X_REQUEST_ID='bad id\n')
+        self.assertNotEqual(resp['X-Request-ID'], 'bad id\n')
+
+    @override_settings(LOG_DEBUG_SAMPLE_RATE=0.0)
+    def test_unsampled_request_emits_no_debug(self):
+        self.client.get(f'/api/course-comments/?discussion={self.discussion.id}')
+        self.assertEqual([r for r in self.handler.records if r.levelno == logging.DEBUG], [])
+
+    @override_settings(LOG_DEBUG_SAMPLE_RATE=1.0)
+    def test_sampled_request_emits_correlated_debug(self):
+        resp = self.client.get(f'/api/course-comments/?discussion={self.discussion.id}', HTTP_X_REQUEST_ID='req-1')
+        records = [r for r in self.handler.records if r.getMessage() == 'course_comment_list_create']
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].request_id, 'req-1')
+        self.assertEqual(records[0].course_subject, None)
+        self.assertEqual(resp['X-Request-ID'], 'req-1')
+
+
+class LoggingUtilsTests(TestCase):
+    def test_json_formatter_includes_extra_and_request_id(self):
+        record = logging.LogRecord('api', logging.INFO, __file__, 1, 'hello %s', ('world',), None)
+        record.user_id = 5
+        token = request_id_var.set('rid')
+        try:
+            RequestContextFilter().filter(record)
+        finally:
+            request_id_var.reset(token)
+        data = json.loads(JSONFormatter().format(record))
+        self.assertEqual(data['message'], 'hello world')
+        self.assertEqual(data['request_id'], 'rid')
+        self.assertEqual(data['user_id'], 5)
+
+    def test_debug_outside_request_is_kept(self):
+        record = logging.LogRecord('api', logging.DEBUG, __file__, 1, 'x', (), None)
+        self.assertTrue(RequestContextFilter().filter(record))
+        token = debug_sampled_var.set(False)
+        try:
+            self.assertFalse(RequestContextFilter().filter(record))
+        finally:
+            debug_sampled_var.reset(token)
+
+    def test_parse_levels(self):
+        self.assertEqual(parse_levels('api=debug, discussionsService=WARNING,bogus'), {'api': 'DEBUG', 'discussionsService': 'WARNING'})
+        self.assertEqual(parse_levels(''), {})
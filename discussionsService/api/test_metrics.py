@@ -0,0 +1,106 @@
+import re
+from unittest import mock
+
+from django.test import TestCase, SimpleTestCase, override_settings
+from base.models import Discussion, Comment
+from discussionsService.metrics import RequestTimings, current_timings, reset_registry, timed
+
+STUDENT = {'X-User-ID': '1', 'X-User-Role': 'STUDENT'}
+
+
+def server_timing(response):
+    return {
+        name: float(dur)
+        for name, dur in re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing'])
+    }
+
+
+@override_settings(PERFORMANCE_METRICS={'ENABLED': True, 'SERVER_TIMING': True})
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        reset_registry()
+        self.addCleanup(reset_registry)
+        d = Discussion.objects.create(title='T', body='b', author='A')
+        Comment.objects.create(discussion=d, body='c', author='A')
+
+    def test_server_timing_breakdown(self):
+        resp = self.client.get('/api/course-discussions/', headers=STUDENT)
+        phases = server_timing(resp)
+        self.assertEqual(set(phases), {'auth', 'perm', 'db', 'serialize', 'app', 'total'})
+        self.assertGreater(phases['auth'], 0)
+        self.assertGreater(phases['perm'], 0)
+        self.assertGreaterEqual(phases['total'], phases['db'])
+        self.assertIn('db;dur=', resp['Server-Timing'])
+        self.assertRegex(resp['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries"')
+
+    @override_settings(DEBUG=True)
+    def test_metrics_endpoint_histograms_by_url_name(self):
+        self.client.get('/api/discussions/')
+        self.client.get('/api/discussions/')
+        self.client.get('/api/nowhere/')
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_requests_total{view="discussion-list-create",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{view="discussion-list-create",method="GET"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="discussion-list-create",method="GET",le="+Inf"} 2', body)
+        self.assertIn('http_request_db_queries_bucket{view="discussion-list-create",le="2"} 2', body)
+        self.assertIn('http_request_phase_seconds_count{view="discussion-list-create",phase="serialize"} 2', body)
+        self.assertIn('http_response_size_bytes_count{view="discussion-list-create"} 2', body)
+        self.assertIn('view="unmatched"', body)
+        # scrapes are not recorded
+        self.assertNotIn('view="metrics"', body)
+
+    @override_settings(PERFORMANCE_METRICS={'TOKEN': 's3cret'})
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        resp = self.client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_metrics_need_a_token_outside_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(PERFORMANCE_METRICS={'ENABLED': False})
+    def test_disabled(self):
+        resp = self.client.get('/api/discussions/')
+        self.assertNotIn('Server-Timing', resp)
+
+    @override_settings(PERFORMANCE_METRICS={'SERVER_TIMING': False, 'TOKEN': 's3cret'})
+    def test_header_can_be_turned_off_but_metrics_kept(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/discussions/'))
+        body = self.client.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).content.decode()
+        self.assertIn('discussion-list-create', body)
+
+
+class TimedTests(SimpleTestCase):
+    def test_noop_outside_requests(self):
+        with timed('auth'):
+            pass
+
+    def test_nested_blocks_of_one_phase_count_once(self):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        self.addCleanup(current_timings.reset, token)
+        with timed('serialize'):
+            with timed('serialize'):
+                pass
+            outer_only = timings.phases['serialize']
+        self.assertEqual(outer_only, 0.0)
+        self.assertGreater(timings.phases['serialize'], 0.0)
+
+    def test_app_is_the_time_outside_every_phase(self):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        self.addCleanup(current_timings.reset, token)
+        # replaces this module's reference only: other threads keep the real clock
+        with mock.patch('discussionsService.metrics.time') as clock:
+            clock.perf_counter.side_effect = [0.0, 0.0, 1.0, 3.0, 4.0, 4.0]
+            # serialize 0-4 with a query from 1 to 3 inside it
+            with timed('serialize'):
+                timings.record_query(lambda *args: None, 'SELECT 1', None, False, {})
+        self.assertEqual((timings.phases['serialize'], timings.phases['db']), (4.0, 2.0))
+        self.assertEqual(timings.busy, 4.0)
+        self.assertEqual(timings.app(10.0), 6.0)
+        self.assertIn('app;dur=6000.00', timings.server_timing(10.0))
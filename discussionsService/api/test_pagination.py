@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment
+from .pagination import KeysetCursorPagination
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+def parse_links(resp):
+    links = {}
+    header = resp.get('Link')
+    if not header:
+        return links
+    for part in header.split(','):
+        url, rel = part.split(';')
+        links[rel.strip().split('=')[1].strip('"')] = url.strip()[1:-1]
+    return links
+
+
+@override_settings(API_PAGINATION={'PAGE_SIZE': 3, 'MAX_PAGE_SIZE': 5})
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='STUDENT'))
+        self.discussion = Discussion.objects.create(title='D', body='b', author='A')
+        # give half the comments an identical timestamp so ties are exercised
+        same = timezone.now()
+        self.comments = []
+        for i in range(8):
+            c = Comment.objects.create(discussion=self.discussion, body=f'c{i}', author='A')
+            ts = same if i % 2 else same + timedelta(seconds=i)
+            Comment.objects.filter(pk=c.pk).update(created_at=ts)
+            self.comments.append(c)
+        self.expected = [
+            c.body for c in Comment.objects.order_by('-created_at', '-id')
+        ]
+
+    def walk(self, url):
+        seen = []
+        pages = 0
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertLessEqual(len(resp.data), 3)
+            seen.extend(c['body'] for c in resp.data)
+            url = parse_links(resp).get('next')
+            pages += 1
+        return seen, pages
+
+    def test_first_page_is_bounded_and_has_next_link(self):
+        resp = self.client.get('/api/comments/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([c['body'] for c in resp.data], self.expected[:3])
+        links = parse_links(resp)
+        self.assertIn('next', links)
+        self.assertNotIn('prev', links)
+
+    def test_walking_next_links_visits_every_row_once(self):
+        seen, pages = self.walk(f'/api/comments/?discussion={self.discussion.id}')
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_prev_link_returns_previous_page(self):
+        first = self.client.get('/api/comments/')
+        second = self.client.get(parse_links(first)['next'])
+        back = self.client.get(parse_links(second)['prev'])
+        self.assertEqual(back.data, first.data)
+        self.assertNotIn('prev', parse_links(back))
+
+    def test_page_size_is_capped_server_side(self):
+        resp = self.client.get('/api/comments/?page_size=1000')
+        self.assertEqual(len(resp.data), 5)
+
+        resp = self.client.get('/api/comments/?page_size=2')
+        self.assertEqual(len(resp.data), 2)
+
+    def test_invalid_cursor_returns_404(self):
+        resp = self.client.get('/api/comments/?cursor=not-a-cursor')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_discussion_list_is_paginated(self):
+        for i in range(4):
+            Discussion.objects.create(title=f'extra{i}', body='b', author='A')
+        resp = self.client.get('/api/discussions/')
+        self.assertEqual(len(resp.data), 3)
+        self.assertIn('next', parse_links(resp))
+
+    def test_total_survives_paging_past_the_end(self):
+        oldest = Comment.objects.order_by('created_at', 'id').first()
+        cursor = KeysetCursorPagination().encode_cursor(oldest, False)
+        resp = self.client.get(f'/api/comments/?include_total=true&cursor={cursor}')
+        self.assertEqual(resp.data, [])
+        self.assertEqual(resp['X-Total-Count'], '8')
+
+    def test_total_is_absent_unless_requested(self):
+        resp = self.client.get('/api/comments/')
+        self.assertNotIn('X-Total-Count', resp)
+        resp = self.client.get('/api/discussions/?include_total=true')
+        self.assertEqual(resp['X-Total-Count'], '1')
@@ -0,0 +1,85 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+class QueryCountTests(TestCase):
+    """
+    Every read endpoint must issue a fixed number of SQL statements,
+    independent of how many discussions and comments exist. Detail
+    endpoints spend one of them on the ETag/Last-Modified lookup.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='STUDENT'))
+        self.discussion = Discussion.objects.create(title='D0', body='b', author='A')
+        self.comment = Comment.objects.create(discussion=self.discussion, body='c', author='A')
+        self.course = CourseDiscussion.objects.create(title='CD0', body='b', author='A', course_subject='CS', course_id='100')
+        self.course_comment = CourseComment.objects.create(discussion=self.course, body='c', author='A')
+
+    def grow(self, n):
+        for i in range(n):
+            d = Discussion.objects.create(title=f'D{i}x', body='b', author='A')
+            cd = CourseDiscussion.objects.create(title=f'CD{i}x', body='b', author='A', course_subject='CS', course_id=f'{i}x')
+            for j in range(3):
+                Comment.objects.create(discussion=d, body='c', author='A')
+                Comment.objects.create(discussion=self.discussion, body='c', author='A')
+                CourseComment.objects.create(discussion=cd, body='c', author='A')
+                CourseComment.objects.create(discussion=self.course, body='c', author='A')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200, url)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url, expected):
+        self.assertEqual(self.count_queries(url), expected, url)
+        self.grow(5)
+        self.assertEqual(self.count_queries(url), expected, url)
+
+    def test_discussion_list(self):
+        self.assertConstantQueries('/api/discussions/', 2)
+
+    def test_discussion_detail(self):
+        self.assertConstantQueries(f'/api/discussions/{self.discussion.id}/', 3)
+
+    def test_comment_list(self):
+        self.assertConstantQueries('/api/comments/', 1)
+
+    def test_comment_list_filtered(self):
+        self.assertConstantQueries(f'/api/comments/?discussion={self.discussion.id}', 1)
+
+    def test_comment_detail(self):
+        self.assertConstantQueries(f'/api/comments/{self.comment.id}/', 2)
+
+    def test_course_discussion_list(self):
+        self.assertConstantQueries('/api/course-discussions/', 2)
+
+    def test_course_discussion_detail(self):
+        self.assertConstantQueries(f'/api/course-discussions/{self.course.id}/', 3)
+
+    def test_course_discussion_by_course_info(self):
+        self.assertConstantQueries('/api/course-discussions/CS/100/', 2)
+
+    def test_course_comment_list(self):
+        self.assertConstantQueries(f'/api/course-comments/?discussion={self.course.id}', 1)
+
+    def test_course_comment_detail(self):
+        self.assertConstantQueries(f'/api/course-comments/{self.course_comment.id}/', 2)
+
+    def test_discussion_summary_list(self):
+        self.assertConstantQueries('/api/discussions/?mode=summary', 1)
+
+    def test_course_discussion_summary_list(self):
+        self.assertConstantQueries('/api/course-discussions/?mode=summary', 1)
@@ -0,0 +1,75 @@
+from django.test import TestCase, SimpleTestCase, override_settings
+from api.serializers import CommentSerializer
+from base.models import Discussion, Comment
+from discussionsService.querywatch import QueryInspectionError, fingerprint, inspect_queries
+
+INSPECT = {'ENABLED': True, 'RAISE': True, 'DUPLICATE_THRESHOLD': 2}
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_placeholders_share_a_shape(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id = 1 AND name = \'it\'\'s\''),
+            fingerprint('SELECT *  FROM t WHERE id = %s AND name = %s'),
+        )
+
+    def test_in_lists_collapse(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE id IN (...)',
+        )
+
+
+class InspectQueriesTests(TestCase):
+    def setUp(self):
+        for n in range(4):
+            d = Discussion.objects.create(title=f'T{n}', body='b', author='A')
+            Comment.objects.create(discussion=d, body='c', author='A')
+
+    def test_n_plus_one_names_serializer_field(self):
+        with self.assertRaises(QueryInspectionError) as ctx:
+            with inspect_queries('comments', **INSPECT):
+                CommentSerializer(Comment.objects.all(), many=True).data
+        issue, = ctx.exception.issues
+        self.assertEqual(issue.kind, 'duplicate')
+        self.assertEqual(issue.count, 4)
+        self.assertIn('CommentSerializer.discussion_title', issue.sources)
+        self.assertTrue(any(loc.startswith('api/test_querywatch.py') for loc in issue.locations))
+
+    def test_select_related_is_clean(self):
+        with inspect_queries('comments', **INSPECT) as inspection:
+            CommentSerializer(Comment.objects.select_related('discussion'), many=True).data
+        self.assertEqual(inspection.issues('comments'), [])
+
+    def test_slow_query_logged(self):
+        with self.assertLogs('discussionsService.querywatch', 'WARNING') as logs:
+            with inspect_queries('count', RAISE=False, SLOW_QUERY_MS=-1):
+                Comment.objects.count()
+        self.assertIn('query slow_query: count:', logs.output[0])
+        self.assertEqual(logs.records[0].kind, 'slow_query')
+
+
+class QueryInspectorMiddlewareTests(TestCase):
+    def setUp(self):
+        d = Discussion.objects.create(title='T', body='b', author='A')
+        for _ in range(3):
+            Comment.objects.create(discussion=d, body='c', author='A')
+
+    @override_settings(QUERY_INSPECTOR=INSPECT)
+    def test_endpoints_are_clean(self):
+        for url in ('/api/discussions/', '/api/comments/', '/api/comments/?discussion=1'):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('X-Query-Issues', resp)
+
+    @override_settings(QUERY_INSPECTOR={'ENABLED': True, 'REQUEST_DB_BUDGET_MS': -1})
+    def test_budget_reported_with_view_name(self):
+        with self.assertLogs('discussionsService.querywatch', 'WARNING') as logs:
+            resp = self.client.get('/api/discussions/')
+        self.assertEqual(resp['X-Query-Issues'], '1')
+        self.assertEqual(logs.records[0].kind, 'slow_request')
+        self.assertEqual(logs.records[0].view, 'discussion-list-create')
+
+    @override_settings(QUERY_INSPECTOR={'ENABLED': False, 'REQUEST_DB_BUDGET_MS': -1})
+    def test_disabled(self):
+        self.assertNotIn('X-Query-Issues', self.client.get('/api/discussions/'))
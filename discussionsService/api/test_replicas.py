@@ -0,0 +1,133 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from base.models import Discussion, CourseDiscussion
+from discussionsService.db_router import (
+    STICKY_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, replica_reads_var,
+)
+from .sync import format_time
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+@override_settings(READ_REPLICAS={'ALIASES': ['replica1', 'replica2'], 'STICKY_SECONDS': 5})
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def read_db(self, **hints):
+        return self.router.db_for_read(Discussion, **hints)
+
+    def test_reads_use_primary_outside_safe_requests(self):
+        self.assertEqual(self.read_db(), 'default')
+
+    def test_safe_reads_use_a_replica(self):
+        token = replica_reads_var.set(True)
+        self.addCleanup(replica_reads_var.reset, token)
+        self.assertIn(self.read_db(), ('replica1', 'replica2'))
+        self.assertEqual(self.router.db_for_write(Discussion), 'default')
+        # related lookups stay on the database the instance came from
+        instance = Discussion()
+        instance._state.db = 'default'
+        self.assertEqual(self.read_db(instance=instance), 'default')
+
+    @override_settings(READ_REPLICAS={'ALIASES': []})
+    def test_no_replicas_configured(self):
+        token = replica_reads_var.set(True)
+        self.addCleanup(replica_reads_var.reset, token)
+        self.assertEqual(self.read_db(), 'default')
+
+    def test_migrations_only_run_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'base'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'base'))
+
+
+@override_settings(READ_REPLICAS={'ALIASES': ['replica1'], 'STICKY_SECONDS': 5})
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = []
+
+        def view(request):
+            self.seen.append(replica_reads_var.get())
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        self.middleware = ReplicaRoutingMiddleware(view)
+
+    def test_get_reads_from_replica(self):
+        response = self.middleware(self.factory.get('/api/discussions/'))
+        self.assertEqual(self.seen, [True])
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        self.assertFalse(replica_reads_var.get())
+
+    def test_write_pins_client_to_primary(self):
+        response = self.middleware(self.factory.post('/api/discussions/'))
+        self.assertEqual(self.seen, [False])
+        cookie = response.cookies[STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+
+        request = self.factory.get('/api/discussions/')
+        request.COOKIES[STICKY_COOKIE] = cookie.value
+        self.middleware(request)
+        self.assertEqual(self.seen, [False, False])
+
+    def test_expired_or_garbled_pin_is_ignored(self):
+        for value in (str(time.time() - 1), 'nonsense'):
+            request = self.factory.get('/api/discussions/')
+            request.COOKIES[STICKY_COOKIE] = value
+            self.middleware(request)
+        self.assertEqual(self.seen, [True, True])
+
+
+class ReplicaRoutingEndToEndTests(TestCase):
+    def test_read_your_writes(self):
+        client = APIClient()
+        client.force_authenticate(user=DummyUser(id=1, role='ADMIN'))
+        # stand in for the replica with the primary, but record each time one is picked
+        with override_settings(READ_REPLICAS={'ALIASES': ['default'], 'STICKY_SECONDS': 5}), \
+                mock.patch('discussionsService.db_router.random.choice', return_value='default') as choice:
+            client.get('/api/discussions/')
+            self.assertTrue(choice.called)
+
+            choice.reset_mock()
+            client.post('/api/discussions/', {'title': 'T', 'body': 'b', 'author': 'A'}, format='json')
+            self.assertIn(STICKY_COOKIE, client.cookies)
+            client.get('/api/discussions/')
+            self.assertFalse(choice.called)
+
+    def test_since_sync_reads_from_primary(self):
+        discussion = Discussion.objects.create(title='T', body='b', author='A')
+        course = CourseDiscussion.objects.create(title='T', body='b', author='A', course_subject='CS', course_id='101')
+        student = {'X-User-ID': '1', 'X-User-Role': 'STUDENT'}
+        since = format_time(timezone.now())
+        urls = [
+            f'/api/comments/?discussion={discussion.id}&since={since}',
+            f'/api/async/comments/?discussion={discussion.id}&since={since}',
+            f'/api/course-comments/?course_subject=CS&course_id=101&since={since}',
+            f'/api/async/course-comments/?discussion={course.id}&since={since}',
+        ]
+        with override_settings(READ_REPLICAS={'ALIASES': ['default'], 'STICKY_SECONDS': 5}), \
+                mock.patch('discussionsService.db_router.random.choice', return_value='default') as choice:
+            for url in urls:
+                resp = self.client.get(url, headers=student)
+                self.assertEqual(resp.status_code, 200, url)
+                self.assertIn('server_time', resp.json())
+                self.assertFalse(choice.called, url)
+
+
+class CopySqliteReplicaTests(SimpleTestCase):
+    def test_requires_a_replica(self):
+        with self.assertRaises(CommandError):
+            call_command('copy_sqlite_replica', stdout=StringIO())
@@ -0,0 +1,187 @@
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+from base.purge import purge_discussion
+from .search import (
+    FTS_TABLE, FTS5SearchBackend, InvertedIndex, MemorySearchBackend, doc_rowid, get_search_backend, make_snippet,
+    reset_search_backend,
+)
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+class SearchTestsMixin:
+    def setUp(self):
+        reset_search_backend()
+        self.addCleanup(reset_search_backend)
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='STUDENT'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_title = Discussion.objects.create(title='Recursion basics', body='Functions calling functions', author='A')
+            self.in_body = Discussion.objects.create(title='Homework help', body='Stuck on recursion in problem 3', author='B')
+            self.comment = Comment.objects.create(discussion=self.in_body, body='Try a smaller recursion base case', author='C')
+            self.course = CourseDiscussion.objects.create(
+                title='Recursion in CS 101', body='Course thread', author='D', creator_id=1, course_subject='CS', course_id='101'
+            )
+            self.course_comment = CourseComment.objects.create(discussion=self.course, body='Recursion quiz on Friday', author='E')
+
+    def search(self, query, **params):
+        resp = self.client.get('/api/search/', {'q': query, **params})
+        self.assertEqual(resp.status_code, 200)
+        return resp
+
+    def test_matches_every_document_type(self):
+        resp = self.search('recursion')
+        found = {(hit['type'], hit['id']) for hit in resp.data}
+        self.assertEqual(found, {
+            ('discussion', self.in_title.id),
+            ('discussion', self.in_body.id),
+            ('comment', self.comment.id),
+            ('course_discussion', self.course.id),
+            ('course_comment', self.course_comment.id),
+        })
+
+    def test_title_match_ranks_above_body_match(self):
+        resp = self.search('recursion', type='discussion')
+        self.assertEqual([hit['id'] for hit in resp.data], [self.in_title.id, self.in_body.id])
+        self.assertGreater(resp.data[0]['score'], resp.data[1]['score'])
+
+    def test_terms_are_anded(self):
+        resp = self.search('recursion base')
+        self.assertEqual([(hit['type'], hit['id']) for hit in resp.data], [('comment', self.comment.id)])
+        self.assertEqual(resp.data[0]['discussion'], self.in_body.id)
+
+    def test_hits_are_highlighted(self):
+        resp = self.search('recursion', type='discussion')
+        top = resp.data[0]
+        self.assertEqual(top['title_highlighted'], '<mark>Recursion</mark> basics')
+        self.assertIn('<mark>recursion</mark>', resp.data[1]['snippet'])
+
+    def test_updates_and_deletes_are_reflected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_title.title = 'Iteration basics'
+            self.in_title.save()
+            self.comment.delete()
+        found = {(hit['type'], hit['id']) for hit in self.search('recursion').data}
+        self.assertNotIn(('discussion', self.in_title.id), found)
+        self.assertNotIn(('comment', self.comment.id), found)
+        self.assertEqual(self.search('iteration').data[0]['id'], self.in_title.id)
+
+    def test_soft_deleted_discussions_are_hidden_until_purged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.search('recursion')  # loads the memory index
+            self.in_body.soft_delete()
+            self.course.soft_delete()
+        found = {(hit['type'], hit['id']) for hit in self.search('recursion').data}
+        self.assertEqual(found, {('discussion', self.in_title.id)})
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_discussion(Discussion, self.in_body.id, pause=0)
+            purge_discussion(CourseDiscussion, self.course.id, pause=0)
+        self.assertEqual({(hit['type'], hit['id']) for hit in self.search('recursion').data}, found)
+        if isinstance(get_search_backend(), FTS5SearchBackend):
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+                self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_bulk_created_comments_are_indexed(self):
+        items = [{'discussion': self.in_title.id, 'body': f'memoization tip {i}', 'author': 'x'} for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/api/comments/bulk/', items, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(self.search('memoization').data), 3)
+
+    def test_course_types_are_hidden_from_anonymous_users(self):
+        self.client.force_authenticate(user=None)
+        types = {hit['type'] for hit in self.search('recursion').data}
+        self.assertEqual(types, {'discussion', 'comment'})
+
+    def test_offset_pagination_links(self):
+        resp = self.search('recursion', page_size=2)
+        self.assertEqual(len(resp.data), 2)
+        self.assertIn('offset=2', resp['Link'])
+        last = self.search('recursion', page_size=2, offset=4)
+        self.assertEqual(len(last.data), 1)
+        self.assertIn('rel="prev"', last['Link'])
+        self.assertNotIn('rel="next"', last['Link'])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'x', 'type': 'nope'}).status_code, 400)
+
+
+class FTS5SearchTests(SearchTestsMixin, TestCase):
+    def test_uses_fts5_backend(self):
+        self.assertIsInstance(get_search_backend(), FTS5SearchBackend)
+
+
+@override_settings(SEARCH_BACKEND='memory')
+class MemorySearchTests(SearchTestsMixin, TestCase):
+    def test_uses_memory_backend(self):
+        self.assertIsInstance(get_search_backend(), MemorySearchBackend)
+
+
+class MemoryRefreshTests(TestCase):
+    def test_stale_index_is_rebuilt_off_the_request_path(self):
+        backend = MemorySearchBackend(max_age=60)
+        self.assertEqual(backend.search(['gradients'], ['discussion'], 10, 0), [])
+        # bulk_create sends no signals, like a write handled by another worker
+        Discussion.objects.bulk_create([Discussion(title='Gradients', body='b', author='A')])
+        self.assertEqual(backend.search(['gradients'], ['discussion'], 10, 0), [])
+        with mock.patch('api.search.time.monotonic', return_value=time.monotonic() + 61), \
+                mock.patch.object(backend, '_schedule_refresh') as schedule:
+            # the search answers from the current index and leaves the rebuild to a thread
+            self.assertEqual(backend.search(['gradients'], ['discussion'], 10, 0), [])
+        schedule.assert_called_once_with()
+        # what that thread runs (threads do not see this test's transaction)
+        backend._build()
+        self.assertEqual(len(backend.search(['gradients'], ['discussion'], 10, 0)), 1)
+
+    def test_writes_during_a_build_are_replayed_onto_the_new_index(self):
+        backend = MemorySearchBackend(max_age=60)
+        backend.search(['gradients'], ['discussion'], 10, 0)
+        old = Discussion.objects.create(title='Recursion', body='b', author='A')
+        new = Discussion(pk=old.pk + 1, title='Gradients', body='b', author='A')
+        real_add = InvertedIndex.add
+        written = []
+
+        def add(index, obj):
+            # a write committed while the build is reading the database
+            if index is not backend._index and not written:
+                written.append(obj)
+                backend._apply('add', [new])
+                backend._apply('discard', [doc_rowid(old)])
+            real_add(index, obj)
+
+        with mock.patch.object(InvertedIndex, 'add', add):
+            backend._build()
+        self.assertTrue(written)
+        self.assertEqual([hit.id for hit in backend.search(['gradients'], ['discussion'], 10, 0)], [new.pk])
+        self.assertEqual(backend.search(['recursion'], ['discussion'], 10, 0), [])
+
+    @override_settings(SEARCH_BACKEND='memory', SEARCH_MEMORY_REFRESH_SECONDS=30)
+    def test_refresh_interval_comes_from_settings(self):
+        reset_search_backend()
+        self.addCleanup(reset_search_backend)
+        self.assertEqual(get_search_backend().max_age, 30)
+
+
+class SnippetTests(TestCase):
+    def test_text_is_escaped_before_highlighting(self):
+        snippet = make_snippet('<b>recursion</b> & more', {'recursion'})
+        self.assertEqual(snippet, '&lt;b&gt;<mark>recursion</mark>&lt;/b&gt; &amp; more')
+
+    def test_long_text_is_cut_around_first_hit(self):
+        text = ' '.join(f'w{i}' for i in range(100)) + ' needle ' + ' '.join(f'v{i}' for i in range(100))
+        snippet = make_snippet(text, {'needle'})
+        self.assertTrue(snippet.startswith('…'))
+        self.assertTrue(snippet.endswith('…'))
+        self.assertIn('<mark>needle</mark>', snippet)
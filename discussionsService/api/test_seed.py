@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+
+class SeedBenchmarkDataTests(TestCase):
+    def seed(self, *args):
+        call_command('seed_benchmark_data', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_seeds_requested_scale_with_consistent_counters(self):
+        self.seed('--comments', '0.2k', '--per-discussion', '20', '--batch-size', '30')
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertEqual(CourseComment.objects.count(), 100)
+        self.assertEqual(Discussion.objects.count(), 5)
+        for discussion in Discussion.objects.annotate(n=Count('comments')):
+            self.assertEqual(discussion.comment_count, discussion.n)
+
+    def test_repeated_runs_add_unique_courses(self):
+        self.seed('--comments', '40', '--per-discussion', '10')
+        self.seed('--comments', '40', '--per-discussion', '10')
+        self.assertEqual(CourseDiscussion.objects.count(), 4)
+
+    def test_rejects_bad_count(self):
+        with self.assertRaises(CommandError):
+            self.seed('--comments', 'lots')
+
+
+class QueryCountHeaderTests(TestCase):
+    def test_off_by_default(self):
+        self.assertNotIn('X-Query-Count', self.client.get('/api/discussions/'))
+
+    @override_settings(QUERY_COUNT_HEADER=True)
+    def test_reports_queries(self):
+        d = Discussion.objects.create(title='T', body='b', author='A')
+        Comment.objects.create(discussion=d, body='c', author='A')
+        # the page and the prefetched comments
+        self.assertEqual(self.client.get('/api/discussions/')['X-Query-Count'], '2')
@@ -1,5 +1,7 @@
+import json
+
 from django.test import TestCase
-from base.models import Discussion, Comment
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
 from .serializers import DiscussionSerializer, CommentSerializer
 from django.utils import timezone
 
@@ -76,3 +78,57 @@ class SerializerTests(TestCase):
         self.assertIn('comments', data)
         self.assertIsInstance(data['comments'], list)
 
+
+
+class CreatedAtDisplayTests(TestCase):
+    def test_matches_localtime_strftime(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+        from .serializers import format_created_at
+
+        tz = timezone.get_current_timezone()
+        # either side of both DST transitions in TIME_ZONE
+        start = datetime(2026, 3, 8, 5, 30, tzinfo=dt_timezone.utc)
+        for offset in range(0, 24 * 240, 7):
+            value = start + timedelta(hours=offset / 7)
+            self.assertEqual(format_created_at(value, tz), timezone.localtime(value).strftime('%Y-%m-%d %H:%M'))
+
+    def test_follows_activated_timezone(self):
+        d = Discussion.objects.create(title='T', body='b', author='A')
+        with timezone.override('UTC'):
+            data = DiscussionSerializer(d).data
+        self.assertEqual(data['created_at_display'], d.created_at.strftime('%Y-%m-%d %H:%M'))
+
+    def test_list_can_omit_display_field(self):
+        from rest_framework.test import APIClient
+
+        d = Discussion.objects.create(title='T', body='b', author='A')
+        Comment.objects.create(discussion=d, body='x', author='y')
+        client = APIClient()
+        data = client.get('/api/discussions/', {'created_at_display': 'false'}).json()
+        self.assertNotIn('created_at_display', data[0])
+        self.assertNotIn('created_at_display', data[0]['comments'][0])
+        self.assertIn('created_at', data[0])
+        data = client.get('/api/comments/').json()
+        self.assertIn('created_at_display', data[0])
+
+    def test_detail_and_course_endpoints_can_omit_display_field(self):
+        from rest_framework.test import APIClient
+
+        d = Discussion.objects.create(title='T', body='b', author='A')
+        c = Comment.objects.create(discussion=d, body='x', author='y')
+        cd = CourseDiscussion.objects.create(title='CD', body='b', author='A', course_subject='CS', course_id='101')
+        CourseComment.objects.create(discussion=cd, body='x', author='y')
+        client = APIClient()
+        client.credentials(HTTP_X_USER_ID='1', HTTP_X_USER_ROLE='STUDENT')
+        omit = {'created_at_display': 'false'}
+        for prefix in ('/api/', '/api/async/'):
+            for path in (f'discussions/{d.id}/', f'comments/{c.id}/', f'course-discussions/{cd.id}/',
+                         'course-discussions/CS/101/'):
+                data = client.get(prefix + path, omit).json()
+                self.assertNotIn('created_at_display', data, path)
+                self.assertNotIn('created_at_display', json.dumps(data), path)
+                self.assertIn('created_at_display', client.get(prefix + path).json(), path)
+            # cached course lookups keep the field for the next request
+            data = client.get(prefix + 'course-discussions/', {'course_subject': 'CS', 'course_id': '101', **omit}).json()
+            self.assertNotIn('created_at_display', data[0]['comments'][0])
+            self.assertIn('created_at_display', client.get(prefix + 'course-discussions/CS/101/').json()['comments'][0])
@@ -0,0 +1,128 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment, CommentTombstone
+from base.purge import purge_discussion, schedule_purge
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+@override_settings(SOFT_DELETE={'PURGE_PAUSE_SECONDS': 0})
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='ADMIN'))
+        self.discussion = Discussion.objects.create(title='Doomed', body='b', author='A')
+        self.comments = [Comment.objects.create(discussion=self.discussion, body=f'c{i}', author='A') for i in range(5)]
+
+    def test_delete_hides_discussion_and_comments(self):
+        resp = self.client.delete(f'/api/discussions/{self.discussion.id}/')
+        self.assertEqual(resp.status_code, 204)
+
+        self.assertEqual(self.client.get(f'/api/discussions/{self.discussion.id}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/discussions/').data, [])
+        resp = self.client.get('/api/comments/', {'discussion': self.discussion.id})
+        self.assertEqual(resp.data, [])
+        self.assertEqual(self.client.get(f'/api/comments/{self.comments[0].id}/').status_code, 404)
+        # rows stay until the purge runs
+        self.assertEqual(Comment.all_objects.count(), 5)
+        self.assertIsNotNone(Discussion.all_objects.get(pk=self.discussion.id).deleted_at)
+
+    def test_delete_does_not_touch_comment_rows(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.delete(f'/api/discussions/{self.discussion.id}/')
+        # every statement but reads and transaction control, including the search index's
+        writes = [q['sql'] for q in ctx.captured_queries if not q['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE', 'ROLLBACK'))]
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith('UPDATE "base_discussion"'))
+        # nor read them
+        self.assertFalse([q for q in ctx.captured_queries if 'base_comment' in q['sql']])
+
+    def test_cannot_comment_on_deleted_discussion(self):
+        self.discussion.soft_delete()
+        resp = self.client.post('/api/comments/', {'discussion': self.discussion.id, 'body': 'x', 'author': 'A'}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_delete_schedules_purge_on_commit(self):
+        with mock.patch('base.purge._worker') as worker:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f'/api/discussions/{self.discussion.id}/')
+        worker.enqueue.assert_called_once_with(Discussion, self.discussion.id)
+
+    @override_settings(SOFT_DELETE={'PURGE_IN_BACKGROUND': False})
+    def test_background_purge_can_be_disabled(self):
+        with mock.patch('base.purge._worker') as worker:
+            with self.captureOnCommitCallbacks(execute=True):
+                schedule_purge(Discussion, self.discussion.id)
+        worker.enqueue.assert_not_called()
+
+    def test_purge_deletes_in_batches_and_leaves_tombstones(self):
+        self.discussion.soft_delete()
+        with mock.patch('base.purge.time.sleep') as sleep:
+            deleted = purge_discussion(Discussion, self.discussion.id, batch_size=2, pause=0.01)
+        self.assertEqual(deleted, 5)
+        self.assertEqual(sleep.call_count, 3)
+        self.assertFalse(Discussion.all_objects.filter(pk=self.discussion.id).exists())
+        self.assertEqual(Comment.all_objects.count(), 0)
+        self.assertEqual(
+            sorted(CommentTombstone.objects.values_list('comment_id', flat=True)),
+            sorted(c.id for c in self.comments),
+        )
+
+    def test_purge_ignores_live_discussions(self):
+        self.assertEqual(purge_discussion(Discussion, self.discussion.id), 0)
+        self.assertEqual(Comment.objects.count(), 5)
+
+    def test_purge_command(self):
+        self.discussion.soft_delete()
+        Discussion.objects.create(title='Alive', body='b', author='A')
+        out = StringIO()
+        call_command('purge_deleted_discussions', '--batch-size', '2', '--pause', '0', stdout=out)
+        self.assertIn('Discussion: purged 1 discussions, 5 comments', out.getvalue())
+        self.assertIn('CourseDiscussion: purged 0 discussions, 0 comments', out.getvalue())
+        self.assertEqual(Discussion.all_objects.count(), 1)
+
+    def test_search_drops_deleted_discussion(self):
+        self.client.delete(f'/api/discussions/{self.discussion.id}/')
+        resp = self.client.get('/api/search/', {'q': 'c1'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, [])
+        resp = self.client.get('/api/search/', {'q': 'doomed'})
+        self.assertEqual(resp.data, [])
+
+
+class CourseSoftDeleteTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='STUDENT'))
+        self.course = CourseDiscussion.objects.create(
+            title='CD', body='b', author='A', course_subject='CS', course_id='101', creator_id=1,
+        )
+        CourseComment.objects.create(discussion=self.course, body='c', author='A')
+
+    def test_course_can_be_recreated_after_delete(self):
+        resp = self.client.delete('/api/course-discussions/CS/101/')
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(self.client.get('/api/course-discussions/CS/101/').status_code, 404)
+
+        payload = {'title': 'Again', 'body': 'b', 'author': 'A', 'course_subject': 'CS', 'course_id': '101'}
+        resp = self.client.post('/api/course-discussions/', payload, format='json')
+        self.assertEqual(resp.status_code, 201, resp.content)
+        resp = self.client.get('/api/course-discussions/CS/101/')
+        self.assertEqual(resp.data['title'], 'Again')
+        self.assertEqual(resp.data['comments'], [])
+
+    def test_duplicate_live_course_is_still_rejected(self):
+        payload = {'title': 'Dup', 'body': 'b', 'author': 'A', 'course_subject': 'CS', 'course_id': '101'}
+        resp = self.client.post('/api/course-discussions/', payload, format='json')
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,151 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment, CommentTombstone
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+def age(model, objs, seconds):
+    """Pretend ``objs`` were last written ``seconds`` ago."""
+    model.objects.filter(pk__in=[o.pk for o in objs]).update(updated_at=timezone.now() - timedelta(seconds=seconds))
+
+
+@override_settings(COMMENT_SYNC={'OVERLAP_SECONDS': 1, 'TOMBSTONE_RETENTION_DAYS': 30})
+class CommentSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='ADMIN'))
+        self.discussion = Discussion.objects.create(title='D', body='b', author='A')
+        self.other = Discussion.objects.create(title='O', body='b', author='A')
+        self.old = [Comment.objects.create(discussion=self.discussion, body=f'old{i}', author='A') for i in range(3)]
+        age(Comment, self.old, 3600)
+        self.since = (timezone.now() - timedelta(minutes=5)).isoformat().replace('+00:00', 'Z')
+
+    def sync(self, **params):
+        params = {'discussion': self.discussion.id, 'since': self.since, **params}
+        resp = self.client.get('/api/comments/', params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.data
+
+    def test_returns_only_changes_and_deletions(self):
+        new = Comment.objects.create(discussion=self.discussion, body='new', author='A')
+        Comment.objects.create(discussion=self.other, body='elsewhere', author='A')
+        edited = self.old[0]
+        self.client.put(f'/api/comments/{edited.id}/', {'discussion': self.discussion.id, 'body': 'edited', 'author': 'A'}, format='json')
+        gone = self.old[1].id
+        self.client.delete(f'/api/comments/{gone}/')
+
+        data = self.sync()
+        self.assertEqual([c['body'] for c in data['results']], ['new', 'edited'])
+        self.assertEqual(data['deleted'], [gone])
+        self.assertIsNone(data['next_cursor'])
+        self.assertNotIn(new.id, data['deleted'])
+
+    def test_server_time_round_trips_as_next_since(self):
+        first = self.sync()
+        self.assertEqual(first['results'], [])
+        age(Comment, Comment.objects.all(), 3600)
+        Comment.objects.create(discussion=self.discussion, body='later', author='A')
+        second = self.sync(since=first['server_time'])
+        self.assertEqual([c['body'] for c in second['results']], ['later'])
+
+    def test_updated_after_is_an_alias(self):
+        Comment.objects.create(discussion=self.discussion, body='new', author='A')
+        resp = self.client.get('/api/comments/', {'discussion': self.discussion.id, 'updated_after': self.since})
+        self.assertEqual([c['body'] for c in resp.data['results']], ['new'])
+
+    def test_large_deltas_are_paged(self):
+        for i in range(5):
+            Comment.objects.create(discussion=self.discussion, body=f'n{i}', author='A')
+        Comment.objects.filter(body='old2').delete()
+        first = self.sync(page_size=3)
+        self.assertEqual([c['body'] for c in first['results']], ['n0', 'n1', 'n2'])
+        self.assertEqual(len(first['deleted']), 1)
+        rest = self.sync(page_size=3, cursor=first['next_cursor'])
+        self.assertEqual([c['body'] for c in rest['results']], ['n3', 'n4'])
+        self.assertEqual(rest['deleted'], [])
+        self.assertIsNone(rest['next_cursor'])
+
+    def test_costs_two_queries(self):
+        Comment.objects.create(discussion=self.discussion, body='new', author='A')
+        with self.assertNumQueries(2):
+            self.sync()
+
+    def test_invalid_and_expired_since(self):
+        resp = self.client.get('/api/comments/', {'since': 'yesterday'})
+        self.assertEqual(resp.status_code, 400)
+        too_old = (timezone.now() - timedelta(days=31)).isoformat()
+        resp = self.client.get('/api/comments/', {'since': too_old})
+        self.assertEqual(resp.status_code, 410)
+
+    def test_moved_comment_is_tombstoned_in_old_thread(self):
+        moved = self.old[2]
+        self.client.put(f'/api/comments/{moved.id}/', {'discussion': self.other.id, 'body': 'moved', 'author': 'A'}, format='json')
+        self.assertEqual(self.sync()['deleted'], [moved.id])
+        self.assertEqual([c['id'] for c in self.sync(discussion=self.other.id)['results']], [moved.id])
+
+    def test_cascade_delete_leaves_tombstones(self):
+        discussion_id = self.discussion.id
+        self.discussion.delete()
+        self.assertEqual(self.sync(discussion=discussion_id)['deleted'], sorted(c.id for c in self.old))
+
+    def test_plain_list_is_unchanged(self):
+        resp = self.client.get('/api/comments/', {'discussion': self.discussion.id})
+        self.assertIsInstance(resp.data, list)
+
+
+@override_settings(COMMENT_SYNC={'OVERLAP_SECONDS': 1, 'TOMBSTONE_RETENTION_DAYS': 30})
+class CourseCommentSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='STUDENT'))
+        self.course = CourseDiscussion.objects.create(title='CD', body='b', author='A', course_subject='CS', course_id='101')
+        self.other = CourseDiscussion.objects.create(title='CD2', body='b', author='A', course_subject='CS', course_id='102')
+        self.old = CourseComment.objects.create(discussion=self.course, body='old', author='A')
+        self.elsewhere = CourseComment.objects.create(discussion=self.other, body='x', author='A')
+        age(CourseComment, [self.old, self.elsewhere], 3600)
+
+    def test_sync_by_course(self):
+        new = CourseComment.objects.create(discussion=self.course, body='new', author='A')
+        gone = self.old.id
+        self.old.delete()
+        self.elsewhere.delete()
+        since = (timezone.now() - timedelta(minutes=5)).isoformat()
+        resp = self.client.get('/api/course-comments/', {'course_subject': 'CS', 'course_id': '101', 'since': since})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([c['id'] for c in resp.data['results']], [new.id])
+        self.assertEqual(resp.data['deleted'], [gone])
+
+    async def test_async_view_matches(self):
+        since = (timezone.now() - timedelta(minutes=5)).isoformat().replace('+00:00', 'Z')
+        await CourseComment.objects.acreate(discussion=self.course, body='new', author='A')
+        resp = await self.async_client.get(
+            '/api/async/course-comments/', {'discussion': self.course.id, 'since': since},
+            headers={'X-User-ID': '1', 'X-User-Role': 'STUDENT'},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([c['body'] for c in resp.json()['results']], ['new'])
+
+
+class TombstonePurgeTests(TestCase):
+    def test_purge_removes_only_expired_tombstones(self):
+        discussion = Discussion.objects.create(title='D', body='b', author='A')
+        for i in range(3):
+            Comment.objects.create(discussion=discussion, body=f'c{i}', author='A').delete()
+        CommentTombstone.objects.filter(pk__in=CommentTombstone.objects.values('pk')[:2]).update(
+            deleted_at=timezone.now() - timedelta(days=40)
+        )
+        out = StringIO()
+        call_command('purge_comment_tombstones', '--days', '30', '--batch-size', '1', stdout=out)
+        self.assertIn('Deleted 2 tombstones', out.getvalue())
+        self.assertEqual(CommentTombstone.objects.count(), 1)
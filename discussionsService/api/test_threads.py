@@ -0,0 +1,189 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment, CommentTombstone
+from base.threads import MAX_DEPTH, subtree
+
+STUDENT = {'X-User-ID': '1', 'X-User-Role': 'STUDENT'}
+
+
+class DummyUser:
+    def __init__(self, id=None, role=None, is_authenticated=True):
+        self.id = id
+        self.role = role
+        self.is_authenticated = is_authenticated
+
+
+def reply(parent, body):
+    return type(parent).objects.create(discussion_id=parent.discussion_id, parent=parent, body=body, author='A')
+
+
+def ids(nodes):
+    return [(node['body'], ids(node['replies'])) if node['replies'] else node['body'] for node in nodes]
+
+
+class ThreadTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=DummyUser(id=1, role='ADMIN'))
+        self.discussion = Discussion.objects.create(title='T', body='b', author='A')
+        self.a = Comment.objects.create(discussion=self.discussion, body='a', author='A', creator_id=1)
+        self.b = Comment.objects.create(discussion=self.discussion, body='b', author='A')
+        self.a1 = reply(self.a, 'a1')
+        self.a1x = reply(self.a1, 'a1x')
+        self.a2 = reply(self.a, 'a2')
+        self.b1 = reply(self.b, 'b1')
+
+    def test_path_and_depth(self):
+        self.a1x.refresh_from_db()
+        self.assertEqual(self.a1x.path, f'{self.a.pk:010d}/{self.a1.pk:010d}/{self.a1x.pk:010d}/')
+        self.assertEqual((self.a.depth, self.a1.depth, self.a1x.depth), (0, 1, 2))
+
+    def test_subtree_is_one_range_query_in_thread_order(self):
+        with CaptureQueriesContext(connection) as ctx:
+            bodies = [c.body for c in subtree(Comment.objects.all(), self.a)]
+        self.assertEqual(bodies, ['a', 'a1', 'a1x', 'a2'])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        sql = ctx.captured_queries[0]['sql']
+        self.assertIn('"path" >=', sql)
+        self.assertNotIn('LIKE', sql)
+        self.assertEqual([c.body for c in subtree(Comment.objects.all(), self.a, levels=2)], ['a', 'a1', 'a2'])
+
+    def test_discussion_thread_nested(self):
+        with self.assertNumQueries(2):
+            resp = self.client.get(f'/api/discussions/{self.discussion.id}/thread/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(ids(resp.data), [('a', [('a1', ['a1x']), 'a2']), ('b', ['b1'])])
+        self.assertEqual(resp.data[0]['replies'][0]['parent'], self.a.id)
+        self.assertEqual(resp.data[0]['replies'][0]['discussion_title'], 'T')
+
+    def test_discussion_thread_top_levels_flat(self):
+        resp = self.client.get(f'/api/discussions/{self.discussion.id}/thread/', {'levels': 2, 'shape': 'flat'})
+        self.assertEqual([(c['body'], c['depth']) for c in resp.data], [('a', 0), ('a1', 1), ('a2', 1), ('b', 0), ('b1', 1)])
+        self.assertNotIn('replies', resp.data[0])
+
+    def test_comment_thread(self):
+        resp = self.client.get(f'/api/comments/{self.a.id}/thread/')
+        self.assertEqual(ids(resp.data), [('a', [('a1', ['a1x']), 'a2'])])
+        resp = self.client.get(f'/api/comments/{self.a1.id}/thread/', {'levels': 1})
+        self.assertEqual(ids(resp.data), ['a1'])
+        self.assertEqual(self.client.get('/api/comments/9999/thread/').status_code, 404)
+        self.assertEqual(self.client.get('/api/discussions/9999/thread/').status_code, 404)
+
+    def test_invalid_parameters(self):
+        url = f'/api/discussions/{self.discussion.id}/thread/'
+        self.assertEqual(self.client.get(url, {'levels': '0'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'levels': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'shape': 'tree'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': 'bm9wZQ'}).status_code, 404)
+
+    @override_settings(COMMENT_THREADS={'PAGE_SIZE': 4})
+    def test_pages_continue_in_thread_order(self):
+        url = f'/api/discussions/{self.discussion.id}/thread/'
+        first = self.client.get(url, {'shape': 'flat'})
+        self.assertEqual([c['body'] for c in first.data], ['a', 'a1', 'a1x', 'a2'])
+        self.assertIn('rel="next"', first['Link'])
+        next_url = first['Link'].split(';')[0].strip('<>')
+        second = self.client.get(next_url)
+        self.assertEqual([c['body'] for c in second.data], ['b', 'b1'])
+        self.assertNotIn('Link', second)
+
+    def test_reply_created_through_api(self):
+        resp = self.client.post('/api/comments/', {
+            'discussion': self.discussion.id, 'parent': self.a1x.id, 'body': 'deep', 'author': 'A',
+        }, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual((resp.data['depth'], resp.data['parent']), (3, self.a1x.id))
+        created = Comment.objects.get(pk=resp.data['id'])
+        self.assertTrue(created.path.startswith(self.a1x.path))
+        self.discussion.refresh_from_db()
+        self.assertEqual(self.discussion.comment_count, 1)
+
+    def test_reply_must_stay_in_parents_discussion(self):
+        other = Discussion.objects.create(title='O', body='b', author='A')
+        resp = self.client.post('/api/comments/', {
+            'discussion': other.id, 'parent': self.a.id, 'body': 'x', 'author': 'A',
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('parent', resp.data)
+
+        resp = self.client.put(f'/api/comments/{self.a.id}/', {
+            'discussion': other.id, 'body': 'moved', 'author': 'A',
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('discussion', resp.data)
+
+        resp = self.client.put(f'/api/comments/{self.a1.id}/', {
+            'discussion': self.discussion.id, 'parent': self.b.id, 'body': 'a1', 'author': 'A',
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+        resp = self.client.put(f'/api/comments/{self.a1.id}/', {
+            'discussion': self.discussion.id, 'parent': self.a.id, 'body': 'edited', 'author': 'A',
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_depth_limit(self):
+        comment = self.a
+        for n in range(MAX_DEPTH):
+            comment = reply(comment, f'd{n}')
+        resp = self.client.post('/api/comments/', {
+            'discussion': self.discussion.id, 'parent': comment.id, 'body': 'too deep', 'author': 'A',
+        }, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_delete_removes_subtree_and_counts(self):
+        Discussion.objects.filter(pk=self.discussion.pk).update(comment_count=6)
+        resp = self.client.delete(f'/api/comments/{self.a.id}/')
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(sorted(Comment.objects.values_list('body', flat=True)), ['b', 'b1'])
+        self.discussion.refresh_from_db()
+        self.assertEqual(self.discussion.comment_count, 2)
+        self.assertEqual(
+            set(CommentTombstone.objects.values_list('comment_id', flat=True)),
+            {self.a.id, self.a1.id, self.a1x.id, self.a2.id},
+        )
+
+    def test_bulk_replies(self):
+        resp = self.client.post('/api/comments/bulk/', [
+            {'discussion': self.discussion.id, 'parent': self.b1.id, 'body': 'r1', 'author': 'x'},
+            {'discussion': self.discussion.id, 'body': 'top', 'author': 'x'},
+        ], format='json')
+        self.assertEqual(resp.status_code, 201)
+        r1, top = (Comment.objects.get(pk=r['id']) for r in resp.data['results'])
+        self.assertEqual((r1.depth, r1.parent_id), (2, self.b1.id))
+        self.assertTrue(r1.path.startswith(self.b1.path))
+        self.assertEqual(top.path, f'{top.pk:010d}/')
+
+
+class AsyncReplyTests(TestCase):
+    async def test_async_create_reply(self):
+        discussion = await Discussion.objects.acreate(title='T', body='b', author='A')
+        parent = await Comment.objects.acreate(discussion=discussion, body='p', author='A')
+        resp = await self.async_client.post('/api/async/comments/', {
+            'discussion': discussion.id, 'parent': parent.id, 'body': 'r', 'author': 'A',
+        }, content_type='application/json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json()['depth'], 1)
+        resp = await self.async_client.post('/api/async/comments/', {
+            'discussion': discussion.id, 'parent': 9999, 'body': 'r', 'author': 'A',
+        }, content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('parent', resp.json())
+
+
+class CourseThreadTests(TestCase):
+    def setUp(self):
+        self.discussion = CourseDiscussion.objects.create(
+            course_id='101', course_subject='CS', title='T', body='b', author='A',
+        )
+        self.root = CourseComment.objects.create(discussion=self.discussion, body='q', author='A')
+        reply(reply(self.root, 'r'), 'rr')
+
+    def test_course_threads(self):
+        resp = self.client.get(f'/api/course-discussions/{self.discussion.id}/thread/', headers=STUDENT)
+        self.assertEqual(ids(resp.data), [('q', [('r', ['rr'])])])
+        resp = self.client.get(f'/api/course-comments/{self.root.id}/thread/', {'levels': 2}, headers=STUDENT)
+        self.assertEqual(ids(resp.data), [('q', ['r'])])
+        self.assertEqual(self.client.get(f'/api/course-comments/{self.root.id}/thread/').status_code, 403)
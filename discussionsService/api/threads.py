@@ -0,0 +1,48 @@
+"""
+Reply-thread endpoints (``comments/<pk>/thread/``, ``discussions/<pk>/thread/``
+and the course equivalents).
+
+The comments are read in path order (base.threads), one indexed range query
+per page, and returned either nested, each comment carrying its direct
+replies in ``replies``, or flat (``?shape=flat``) in depth-first order,
+where ``depth`` and ``parent`` give the structure. ``?levels=N`` limits the
+fetch to the top N levels (1 = only the comment itself, or only the
+top-level comments of the discussion). Large threads are paged with
+ThreadPathPagination; on a later page, nested replies whose parent was on an
+earlier page appear at the top level.
+"""
+from rest_framework.exceptions import ValidationError
+
+from base.threads import MAX_DEPTH, nest
+from .pagination import ThreadPathPagination
+
+SHAPES = ('nested', 'flat')
+
+
+def get_levels(request):
+    raw = request.query_params.get('levels')
+    if not raw:
+        return None
+    try:
+        levels = int(raw)
+    except ValueError:
+        levels = 0
+    if levels < 1:
+        raise ValidationError({'levels': 'Expected a positive integer.'})
+    return min(levels, MAX_DEPTH + 1)
+
+
+def get_shape(request):
+    shape = request.query_params.get('shape', 'nested')
+    if shape not in SHAPES:
+        raise ValidationError({'shape': f'Expected one of: {", ".join(SHAPES)}.'})
+    return shape
+
+
+def thread_response(request, queryset, serializer_class):
+    """One page of ``queryset`` (already limited to the thread), serialized in the requested shape."""
+    shape = get_shape(request)
+    paginator = ThreadPathPagination()
+    comments = paginator.paginate_queryset(queryset, request)
+    data = serializer_class(comments, many=True, context={'request': request}).data
+    return paginator.get_paginated_response(nest(data) if shape == 'nested' else data)
@@ -1,21 +1,43 @@
-from django.urls import path
-from . import views
+from django.urls import include, path
+from . import async_views, views
 
 urlpatterns = [
     # Discussion endpoints
     path('discussions/', views.discussion_list_create, name='discussion-list-create'),
     path('discussions/<int:pk>/', views.discussion_detail, name='discussion-detail'),
+    path('discussions/<int:pk>/events/', async_views.discussion_events, name='discussion-events'),
+    path('discussions/<int:pk>/thread/', views.discussion_thread, name='discussion-thread'),
 
     # Comment endpoints
     path('comments/', views.comment_list_create, name='comment-list-create'),
+    path('comments/bulk/', views.comment_bulk_create, name='comment-bulk-create'),
     path('comments/<int:pk>/', views.comment_detail, name='comment-detail'),
+    path('comments/<int:pk>/thread/', views.comment_thread, name='comment-thread'),
 
     # Course Discussion endpoints
     path('course-discussions/', views.course_discussion_list_create, name='course-discussion-list-create'),
     path('course-discussions/<int:pk>/', views.course_discussion_detail, name='course-discussion-detail'),
+    path('course-discussions/<int:pk>/events/', async_views.course_discussion_events, name='course-discussion-events'),
+    path('course-discussions/<int:pk>/thread/', views.course_discussion_thread, name='course-discussion-thread'),
+    path('course-discussions/cache-stats/', views.course_discussion_cache_stats, name='course-discussion-cache-stats'),
     path('course-discussions/<str:course_subject>/<str:course_id>/', views.course_discussion_by_course_info, name='course-discussion-by-course-info'),
+    path('course-discussions/<str:course_subject>/<str:course_id>/events/', async_views.course_events, name='course-events'),
 
     # Course Comment endpoints
     path('course-comments/', views.course_comment_list_create, name='course-comment-list-create'),
+    path('course-comments/bulk/', views.course_comment_bulk_create, name='course-comment-bulk-create'),
     path('course-comments/<int:pk>/', views.course_comment_detail, name='course-comment-detail'),
+    path('course-comments/<int:pk>/thread/', views.course_comment_thread, name='course-comment-thread'),
+
+    # Search
+    path('search/', views.search_documents, name='search'),
+
+    # Export
+    path('export/', views.export_ndjson, name='export-ndjson'),
+
+    # Health check
+    path('health/', views.health, name='health'),
+
+    # Native async versions of the list/detail endpoints, for ASGI deployments
+    path('async/', include('api.async_urls')),
 ]
@@ -1,17 +1,101 @@
-from rest_framework.decorators import api_view, permission_classes
+import logging
+import time
+
+from django.db import DatabaseError, connections, transaction
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import api_view, authentication_classes, parser_classes, permission_classes
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework import status
+from .bulk import bulk_create_comments
+from .cache import cache_stats, get_course_discussion_data
+from .conditional import comment_validators, discussion_validators, not_modified_response
+from .export import SCOPES, iter_export_records, iter_ndjson
+from .pagination import KeysetCursorPagination, RankedOffsetPagination
+from .parsers import NDJSONParser
+from .search import COURSE_TYPES, TYPE_CODES, search
+from .sync import ChangeSet, get_since
+from .threads import get_levels, thread_response
 from .permissions import IsAdmin, IsStudent, IsStaff, IsOwnerOrAdmin
+from discussionsService.db_router import PRIMARY
+from discussionsService.logging_utils import debug_enabled
+from base.counters import comments_added, comments_removed
+from base.purge import schedule_purge
+from base.threads import delete_subtree, subtree, top_levels
+from base.tombstones import record_tombstones, tombstones_for
 from base.models import Discussion, Comment, CourseDiscussion, CourseComment
-from .serializers import DiscussionSerializer, CommentSerializer, CourseDiscussionSerializer, CourseCommentSerializer
+from .serializers import (
+	DiscussionSerializer, CommentSerializer, CourseDiscussionSerializer, CourseCommentSerializer,
+	DiscussionSummarySerializer, CourseDiscussionSummarySerializer, cached_discussion_data,
+)
+
+logger = logging.getLogger(__name__)
+
+# Querysets used by the views below. Nested comments are prefetched in one
+# extra query, and the prefetch also fills in each comment's `discussion`, so
+# `discussion_title` never triggers a per-row lookup.
+def discussion_queryset():
+	return Discussion.objects.prefetch_related('comments')
+
+def comment_queryset():
+	return Comment.objects.select_related('discussion')
+
+def course_discussion_queryset():
+	return CourseDiscussion.objects.prefetch_related('comments')
+
+def course_comment_queryset():
+	return CourseComment.objects.select_related('discussion')
+
+def load_course_discussion_data(course_subject, course_id):
+	# from the primary: a lagging replica would put stale data in the shared cache
+	try:
+		discussion = course_discussion_queryset().using(PRIMARY).get(course_subject=course_subject, course_id=course_id)
+	except CourseDiscussion.DoesNotExist:
+		return None
+	return CourseDiscussionSerializer(discussion).data
+
+def is_summary_request(request):
+	return request.GET.get('mode') == 'summary'
+
+def save_comment(serializer, discussion_model, **kwargs):
+	"""Save a new or edited comment and keep the parent's counters in step."""
+	previous = serializer.instance.discussion_id if serializer.instance is not None else None
+	with transaction.atomic():
+		comment = serializer.save(**kwargs)
+		if previous != comment.discussion_id:
+			if previous is not None:
+				comments_removed(discussion_model, previous)
+				# clients syncing the old thread need to drop it
+				record_tombstones(type(comment), [(comment.pk, previous)])
+			comments_added(discussion_model, comment.discussion_id, last_activity_at=comment.created_at)
+	return comment
+
+def delete_discussion(discussion):
+	"""Soft-delete now; the comments and the row itself are purged in the background."""
+	with transaction.atomic():
+		discussion.soft_delete()
+		schedule_purge(type(discussion), discussion.pk)
+
+def delete_comment(comment, discussion_model):
+	"""Delete the comment with its replies, and take all of them off the parent's count."""
+	with transaction.atomic():
+		removed = delete_subtree(comment)
+		comments_removed(discussion_model, comment.discussion_id, count=removed)
 
 # Discussion Views
 @api_view(['GET', 'POST'])
 def discussion_list_create(request):
 	if request.method == 'GET':
-		discussions = Discussion.objects.all().order_by('-created_at')
-		serializer = DiscussionSerializer(discussions, many=True)
-		return Response(serializer.data)
+		paginator = KeysetCursorPagination()
+		if is_summary_request(request):
+			qs = Discussion.objects.all()
+			serializer_class = DiscussionSummarySerializer
+		else:
+			qs = discussion_queryset()
+			serializer_class = DiscussionSerializer
+		discussions = paginator.paginate_queryset(qs, request)
+		serializer = serializer_class(discussions, many=True, context={'request': request})
+		return paginator.get_paginated_response(serializer.data)
 	elif request.method == 'POST':
 		# coerce creator_id before serializer validation so string values won't fail
 		data = request.data.copy()
@@ -34,15 +118,28 @@ def discussion_list_create(request):
 
 @api_view(['GET', 'PUT', 'DELETE'])
 def discussion_detail(request, pk):
+	if request.method == 'GET':
+		# revalidate from updated_at first so unchanged resources skip serialization
+		validators = discussion_validators(Discussion.objects.all(), pk)
+		if validators is None:
+			return Response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
+		not_modified = not_modified_response(request, validators)
+		if not_modified is not None:
+			return not_modified
+		discussion = discussion_queryset().filter(pk=pk).first()
+		if discussion is None:
+			return Response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
+		serializer = DiscussionSerializer(discussion, context={'request': request})
+		return Response(serializer.data, headers=validators.headers())
+
+	# only PUT returns the discussion, so only PUT needs its comments loaded
+	queryset = discussion_queryset() if request.method == 'PUT' else Discussion.objects.all()
 	try:
-		discussion = Discussion.objects.get(pk=pk)
+		discussion = queryset.get(pk=pk)
 	except Discussion.DoesNotExist:
 		return Response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
 
-	if request.method == 'GET':
-		serializer = DiscussionSerializer(discussion)
-		return Response(serializer.data)
-	elif request.method == 'PUT':
+	if request.method == 'PUT':
 		# enforce owner or admin for mutating operations
 		if not (discussion.creator_id == getattr(request.user, 'id', None) or getattr(request.user, 'role', '').upper() == 'ADMIN'):
 			return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
@@ -54,27 +151,41 @@ def discussion_detail(request, pk):
 		return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 	elif request.method == 'DELETE':
 		if discussion.creator_id == getattr(request.user, 'id', None) or getattr(request.user, 'role', '').upper() == 'ADMIN':
-			discussion.delete()
+			delete_discussion(discussion)
 			return Response(status=status.HTTP_204_NO_CONTENT)
 		return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
+@api_view(['GET'])
+def discussion_thread(request, pk):
+	levels = get_levels(request)
+	if not Discussion.objects.filter(pk=pk).exists():
+		return Response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
+	return thread_response(request, top_levels(comment_queryset(), pk, levels), CommentSerializer)
+
 # Comment Views
 @api_view(['GET', 'POST'])
 def comment_list_create(request):
 	if request.method == 'GET':
 		discussion_id = request.GET.get('discussion')
-		qs = Comment.objects.all()
+		qs = comment_queryset()
+		tombstones = tombstones_for(Comment)
 		if discussion_id:
 			# guard against non-integer discussion ids provided by clients
 			try:
 				q_id = int(discussion_id)
 				qs = qs.filter(discussion_id=q_id)
+				tombstones = tombstones.filter(discussion_id=q_id)
 			except (TypeError, ValueError):
 				# return empty set for invalid ids instead of raising
 				qs = qs.none()
-		comments = qs.order_by('-created_at')
-		serializer = CommentSerializer(comments, many=True)
-		return Response(serializer.data)
+				tombstones = tombstones.none()
+		since = get_since(request)
+		if since is not None:
+			return Response(ChangeSet(request, since, qs, tombstones).evaluate(CommentSerializer))
+		paginator = KeysetCursorPagination()
+		comments = paginator.paginate_queryset(qs, request)
+		serializer = CommentSerializer(comments, many=True, context={'request': request})
+		return paginator.get_paginated_response(serializer.data)
 	elif request.method == 'POST':
 		# copy and coerce incoming data so serializer validation won't fail on bad creator_id
 		data = request.data.copy()
@@ -90,38 +201,72 @@ def comment_list_create(request):
 		if serializer.is_valid():
 			creator = data.get('creator_id')
 			if creator is not None:
-				serializer.save(creator_id=creator)
+				save_comment(serializer, Discussion, creator_id=creator)
 			else:
-				serializer.save()
+				save_comment(serializer, Discussion)
 			return Response(serializer.data, status=status.HTTP_201_CREATED)
 		return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+def comment_bulk_create(request):
+	items = request.data
+	if isinstance(items, list):
+		# same creator_id coercion as the single-comment POST
+		items = [dict(item) if isinstance(item, dict) else item for item in items]
+		for item in items:
+			if isinstance(item, dict) and item.get('creator_id') is not None:
+				try:
+					item['creator_id'] = int(item['creator_id'])
+				except (TypeError, ValueError):
+					item['creator_id'] = None
+	return bulk_create_comments(items, CommentSerializer, Discussion)
+
 @api_view(['GET', 'PUT', 'DELETE'])
 def comment_detail(request, pk):
+	if request.method == 'GET':
+		# revalidate from updated_at first so unchanged resources skip serialization
+		validators = comment_validators(Comment.objects.all(), pk)
+		if validators is None:
+			return Response({'error': 'Comment not found'}, status=status.HTTP_404_NOT_FOUND)
+		not_modified = not_modified_response(request, validators)
+		if not_modified is not None:
+			return not_modified
+		comment = comment_queryset().filter(pk=pk).first()
+		if comment is None:
+			return Response({'error': 'Comment not found'}, status=status.HTTP_404_NOT_FOUND)
+		serializer = CommentSerializer(comment, context={'request': request})
+		return Response(serializer.data, headers=validators.headers())
+
 	try:
-		comment = Comment.objects.get(pk=pk)
+		comment = comment_queryset().get(pk=pk)
 	except Comment.DoesNotExist:
 		return Response({'error': 'Comment not found'}, status=status.HTTP_404_NOT_FOUND)
 
-	if request.method == 'GET':
-		serializer = CommentSerializer(comment)
-		return Response(serializer.data)
-	elif request.method == 'PUT':
+	if request.method == 'PUT':
 		# enforce owner or admin for mutating operations
 		if not (comment.creator_id == getattr(request.user, 'id', None) or getattr(request.user, 'role', '').upper() == 'ADMIN'):
 			return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
 		serializer = CommentSerializer(comment, data=request.data)
 		if serializer.is_valid():
-			serializer.save()
+			save_comment(serializer, Discussion)
 			return Response(serializer.data)
 		return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 	elif request.method == 'DELETE':
 		if comment.creator_id == getattr(request.user, 'id', None) or getattr(request.user, 'role', '').upper() == 'ADMIN':
-			comment.delete()
+			delete_comment(comment, Discussion)
 			return Response(status=status.HTTP_204_NO_CONTENT)
 		return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
+@api_view(['GET'])
+def comment_thread(request, pk):
+	levels = get_levels(request)
+	comment = Comment.objects.filter(pk=pk).first()
+	if comment is None:
+		return Response({'error': 'Comment not found'}, status=status.HTTP_404_NOT_FOUND)
+	return thread_response(request, subtree(comment_queryset(), comment, levels), CommentSerializer)
+
 # Course Discussion Views
 @api_view(['GET', 'POST'])
 @permission_classes([IsStudent])
@@ -129,12 +274,25 @@ def course_discussion_list_create(request):
     if request.method == 'GET':
         course_id = request.GET.get('course_id')
         course_subject = request.GET.get('course_subject')
-        qs = CourseDiscussion.objects.all()
+        if course_id and course_subject and not is_summary_request(request):
+            # at most one discussion per course, served from the read-through cache
+            data = cached_discussion_data(request, get_course_discussion_data(
+                course_subject, course_id,
+                lambda: load_course_discussion_data(course_subject, course_id),
+            ))
+            return Response([data] if data is not None else [])
+        if is_summary_request(request):
+            qs = CourseDiscussion.objects.all()
+            serializer_class = CourseDiscussionSummarySerializer
+        else:
+            qs = course_discussion_queryset()
+            serializer_class = CourseDiscussionSerializer
         if course_id and course_subject:
             qs = qs.filter(course_id=course_id, course_subject=course_subject)
-        discussions = qs.order_by('-created_at')
-        serializer = CourseDiscussionSerializer(discussions, many=True)
-        return Response(serializer.data)
+        paginator = KeysetCursorPagination()
+        discussions = paginator.paginate_queryset(qs, request)
+        serializer = serializer_class(discussions, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
     elif request.method == 'POST':
         serializer = CourseDiscussionSerializer(data=request.data)
         if serializer.is_valid():
@@ -146,15 +304,27 @@ def course_discussion_list_create(request):
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsStudent])
 def course_discussion_detail(request, pk):
+    if request.method == 'GET':
+        # revalidate from updated_at first so unchanged resources skip serialization
+        validators = discussion_validators(CourseDiscussion.objects.all(), pk)
+        if validators is None:
+            return Response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
+        not_modified = not_modified_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+        discussion = course_discussion_queryset().filter(pk=pk).first()
+        if discussion is None:
+            return Response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = CourseDiscussionSerializer(discussion, context={'request': request})
+        return Response(serializer.data, headers=validators.headers())
+
+    queryset = course_discussion_queryset() if request.method == 'PUT' else CourseDiscussion.objects.all()
     try:
-        discussion = CourseDiscussion.objects.get(pk=pk)
+        discussion = queryset.get(pk=pk)
     except CourseDiscussion.DoesNotExist:
         return Response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    if request.method == 'GET':
-        serializer = CourseDiscussionSerializer(discussion)
-        return Response(serializer.data)
-    elif request.method == 'PUT':
+    if request.method == 'PUT':
         serializer = CourseDiscussionSerializer(discussion, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -162,27 +332,46 @@ def course_discussion_detail(request, pk):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     elif request.method == 'DELETE':
         if discussion.creator_id == getattr(request.user, 'id', None) or getattr(request.user, 'role', '').upper() == 'ADMIN':
-            discussion.delete()
+            delete_discussion(discussion)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
 @api_view(['GET', 'DELETE'])
 @permission_classes([IsOwnerOrAdmin])
 def course_discussion_by_course_info(request, course_subject, course_id):
+    if request.method == 'GET':
+        data = cached_discussion_data(request, get_course_discussion_data(
+            course_subject, course_id,
+            lambda: load_course_discussion_data(course_subject, course_id),
+        ))
+        if data is None:
+            return Response({'error': 'Discussion not found for this course'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
     try:
         discussion = CourseDiscussion.objects.get(course_subject=course_subject, course_id=course_id)
     except CourseDiscussion.DoesNotExist:
         return Response({'error': 'Discussion not found for this course'}, status=status.HTTP_404_NOT_FOUND)
 
-    if request.method == 'GET':
-        serializer = CourseDiscussionSerializer(discussion)
-        return Response(serializer.data)
-    elif request.method == 'DELETE':
+    if request.method == 'DELETE':
         if discussion.creator_id == getattr(request.user, 'id', None) or getattr(request.user, 'role', '').upper() == 'ADMIN':
-            discussion.delete()
+            delete_discussion(discussion)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
+@api_view(['GET'])
+@permission_classes([IsStudent])
+def course_discussion_thread(request, pk):
+    levels = get_levels(request)
+    if not CourseDiscussion.objects.filter(pk=pk).exists():
+        return Response({'error': 'Discussion not found'}, status=status.HTTP_404_NOT_FOUND)
+    return thread_response(request, top_levels(course_comment_queryset(), pk, levels), CourseCommentSerializer)
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def course_discussion_cache_stats(request):
+    return Response(cache_stats())
+
 # Course Comment Views
 @api_view(['GET', 'POST'])
 @permission_classes([IsStudent])
@@ -192,47 +381,151 @@ def course_comment_list_create(request):
 		course_id = request.GET.get('course_id')
 		course_subject = request.GET.get('course_subject')
 
-		print(f"[DEBUG] course_comment_list_create: discussion_id={discussion_id}, course_id={course_id}, course_subject={course_subject}")
-
-		qs = CourseComment.objects.all()
+		qs = course_comment_queryset()
+		tombstones = tombstones_for(CourseComment)
 
 		if discussion_id:
 			qs = qs.filter(discussion_id=discussion_id)
+			tombstones = tombstones.filter(discussion_id=discussion_id)
 		elif course_id and course_subject:
 			qs = qs.filter(discussion__course_id=course_id, discussion__course_subject=course_subject)
+			tombstones = tombstones.filter(discussion_id__in=CourseDiscussion.objects.filter(
+				course_id=course_id, course_subject=course_subject).values('pk'))
 
-		print(f"[DEBUG] Filtered CourseComment count: {qs.count()}")
+		if debug_enabled(logger):
+			logger.debug("course_comment_list_create", extra={
+				"discussion_id": discussion_id, "course_id": course_id,
+				"course_subject": course_subject,
+			})
 
-		comments = qs.order_by('-created_at')
-		serializer = CourseCommentSerializer(comments, many=True)
-		return Response(serializer.data)
+		since = get_since(request)
+		if since is not None:
+			return Response(ChangeSet(request, since, qs, tombstones).evaluate(CourseCommentSerializer))
+
+		paginator = KeysetCursorPagination()
+		comments = paginator.paginate_queryset(qs, request)
+		serializer = CourseCommentSerializer(comments, many=True, context={'request': request})
+		return paginator.get_paginated_response(serializer.data)
 	elif request.method == 'POST':
 		serializer = CourseCommentSerializer(data=request.data)
 		if serializer.is_valid():
 			creator = getattr(request.user, 'id', None)
-			serializer.save(creator_id=creator)
+			save_comment(serializer, CourseDiscussion, creator_id=creator)
 			return Response(serializer.data, status=status.HTTP_201_CREATED)
 		return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsStudent])
+@parser_classes([JSONParser, NDJSONParser])
+def course_comment_bulk_create(request):
+	creator = getattr(request.user, 'id', None)
+	return bulk_create_comments(request.data, CourseCommentSerializer, CourseDiscussion, creator_id=creator)
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsOwnerOrAdmin])
 def course_comment_detail(request, pk):
+    if request.method == 'GET':
+        # revalidate from updated_at first so unchanged resources skip serialization
+        validators = comment_validators(CourseComment.objects.all(), pk)
+        if validators is None:
+            return Response({'error': 'Comment not found'}, status=status.HTTP_404_NOT_FOUND)
+        not_modified = not_modified_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+        comment = course_comment_queryset().filter(pk=pk).first()
+        if comment is None:
+            return Response({'error': 'Comment not found'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = CourseCommentSerializer(comment, context={'request': request})
+        return Response(serializer.data, headers=validators.headers())
+
     try:
-        comment = CourseComment.objects.get(pk=pk)
+        comment = course_comment_queryset().get(pk=pk)
     except CourseComment.DoesNotExist:
         return Response({'error': 'Comment not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    if request.method == 'GET':
-        serializer = CourseCommentSerializer(comment)
-        return Response(serializer.data)
-    elif request.method == 'PUT':
+    if request.method == 'PUT':
         serializer = CourseCommentSerializer(comment, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            save_comment(serializer, CourseDiscussion)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     elif request.method == 'DELETE':
         if comment.creator_id == getattr(request.user, 'id', None) or getattr(request.user, 'role', '').upper() == 'ADMIN':
-            comment.delete()
+            delete_comment(comment, CourseDiscussion)
             return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+
+@api_view(['GET'])
+@permission_classes([IsStudent])
+def course_comment_thread(request, pk):
+    levels = get_levels(request)
+    comment = CourseComment.objects.filter(pk=pk).first()
+    if comment is None:
+        return Response({'error': 'Comment not found'}, status=status.HTTP_404_NOT_FOUND)
+    return thread_response(request, subtree(course_comment_queryset(), comment, levels), CourseCommentSerializer)
+
+# Export
+@api_view(['GET'])
+@permission_classes([IsStaff])
+def export_ndjson(request):
+    scope = request.GET.get('scope', 'all')
+    if scope not in SCOPES:
+        return Response({'error': f'scope must be one of {", ".join(SCOPES)}'}, status=status.HTTP_400_BAD_REQUEST)
+    records = iter_export_records(
+        scope=scope,
+        course_subject=request.GET.get('course_subject'),
+        course_id=request.GET.get('course_id'),
+    )
+    response = StreamingHttpResponse(iter_ndjson(records), content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename="discussions-export.ndjson"'
+    return response
+
+# Search
+@api_view(['GET'])
+def search_documents(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return Response({'error': 'Missing search query ?q='}, status=status.HTTP_400_BAD_REQUEST)
+
+    requested = request.GET.get('type')
+    types = [t.strip() for t in requested.split(',')] if requested else list(TYPE_CODES)
+    unknown = [t for t in types if t not in TYPE_CODES]
+    if unknown:
+        return Response({'error': f'Unknown type: {", ".join(unknown)}'}, status=status.HTTP_400_BAD_REQUEST)
+    # course content is only visible to the same roles the course endpoints admit
+    if not IsStudent().has_permission(request, None):
+        types = [t for t in types if t not in COURSE_TYPES]
+
+    paginator = RankedOffsetPagination()
+    hits = paginator.paginate_results(
+        lambda limit, offset: search(query, types, limit=limit, offset=offset)[0], request
+    )
+    return paginator.get_paginated_response(hits)
+
+# Health
+@api_view(['GET'])
+@authentication_classes([])
+def health(request):
+    """Liveness plus a round-trip to every configured database, for load balancer checks."""
+    databases = {}
+    for alias in connections:
+        connection = connections[alias]
+        started = time.perf_counter()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except DatabaseError as exc:
+            logger.warning('health check failed', extra={'database': alias, 'error': str(exc)})
+            databases[alias] = {'vendor': connection.vendor, 'ok': False}
+            continue
+        databases[alias] = {
+            'vendor': connection.vendor,
+            'ok': True,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+    healthy = all(db['ok'] for db in databases.values())
+    return Response(
+        {'status': 'ok' if healthy else 'unavailable', 'databases': databases},
+        status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class BaseConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "base"
+
+    def ready(self):
+        from discussionsService import database
+        from . import tombstones
+
+        database.connect_signals()
+        tombstones.connect_signals()
@@ -0,0 +1,49 @@
+"""
+Maintenance of the denormalized ``comment_count`` / ``last_activity_at``
+columns on Discussion and CourseDiscussion.
+
+The comment views call comments_added() / comments_removed() in the same
+transaction as the write. Both are single UPDATE statements built from F()
+expressions, so concurrent writers never lose an increment.
+recompute_counters() rebuilds the columns from the comment tables to
+repair any drift (see the recompute_discussion_counters command).
+"""
+from django.db.models import Count, DateTimeField, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def comments_added(discussion_model, discussion_id, count=1, last_activity_at=None):
+    updates = {'comment_count': F('comment_count') + count}
+    if last_activity_at is not None:
+        updates['last_activity_at'] = Greatest(
+            F('last_activity_at'), Value(last_activity_at, output_field=DateTimeField())
+        )
+    discussion_model.objects.filter(pk=discussion_id).update(**updates)
+
+
+def comments_removed(discussion_model, discussion_id, count=1):
+    # last_activity_at is left alone: a deletion does not undo past activity
+    discussion_model.objects.filter(pk=discussion_id).update(
+        comment_count=Greatest(F('comment_count') - count, Value(0))
+    )
+
+
+def recompute_counters(discussion_model, comment_model, batch_size=1000):
+    """Recompute both columns from scratch, one pk range per UPDATE. Returns rows updated."""
+    comments = comment_model.objects.filter(discussion=OuterRef('pk')).order_by().values('discussion')
+    count = Subquery(comments.annotate(n=Count('pk')).values('n'))
+    latest = Subquery(comments.annotate(latest=Max('created_at')).values('latest'))
+
+    updated = 0
+    last_pk = 0
+    while True:
+        pks = list(
+            discussion_model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return updated
+        updated += discussion_model.objects.filter(pk__gte=pks[0], pk__lte=pks[-1]).update(
+            comment_count=Coalesce(count, 0),
+            last_activity_at=Coalesce(latest, F('created_at')),
+        )
+        last_pk = pks[-1]
@@ -0,0 +1,29 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Copy the SQLite primary into the SQLite replica files (a stand-in for replication in local testing)."
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        replicas = {
+            alias: config for alias, config in settings.DATABASES.items()
+            if alias != 'default' and config['ENGINE'] == primary['ENGINE'] == 'django.db.backends.sqlite3'
+        }
+        if not replicas:
+            raise CommandError("No SQLite replicas configured (set DB_REPLICA_URLS=sqlite:///replica.sqlite3).")
+        source = sqlite3.connect(str(primary['NAME']))
+        try:
+            for alias, config in replicas.items():
+                target = sqlite3.connect(str(config['NAME']))
+                try:
+                    # the backup API gives a consistent snapshot even while the primary is being written
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Copied {primary['NAME']} to {alias} ({config['NAME']})")
+        finally:
+            source.close()
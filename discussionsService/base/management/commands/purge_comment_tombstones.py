@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from base.tombstones import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete comment tombstones older than the ?since= sync retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Keep this many days (default COMMENT_SYNC['TOMBSTONE_RETENTION_DAYS']).")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Tombstones deleted per DELETE statement (default 1000).")
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = getattr(settings, 'COMMENT_SYNC', {}).get('TOMBSTONE_RETENTION_DAYS', 30)
+        deleted = purge_tombstones(timezone.now() - timedelta(days=days), batch_size=options['batch_size'])
+        self.stdout.write(f"Deleted {deleted} tombstones older than {days} days")
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from base.models import Discussion, CourseDiscussion
+from base.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    help = "Remove soft-deleted discussions and their comments in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Comments deleted per transaction (default SOFT_DELETE['PURGE_BATCH_SIZE']).")
+        parser.add_argument('--pause', type=float, default=None,
+                            help="Seconds to sleep between batches (default SOFT_DELETE['PURGE_PAUSE_SECONDS']).")
+        parser.add_argument('--min-age', type=int, default=0,
+                            help="Only purge discussions deleted at least this many seconds ago.")
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(seconds=options['min_age']) if options['min_age'] else None
+        for discussion_model in (Discussion, CourseDiscussion):
+            discussions, comments = purge_deleted(
+                discussion_model, older_than=older_than,
+                batch_size=options['batch_size'], pause=options['pause'],
+            )
+            self.stdout.write(f"{discussion_model.__name__}: purged {discussions} discussions, {comments} comments")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from base.counters import recompute_counters
+from base.models import Discussion, Comment, CourseDiscussion, CourseComment
+
+
+class Command(BaseCommand):
+    help = "Recompute comment_count and last_activity_at on discussions from their comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Discussions updated per UPDATE statement (default 1000).")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for discussion_model, comment_model in ((Discussion, Comment), (CourseDiscussion, CourseComment)):
+            updated = recompute_counters(discussion_model, comment_model, batch_size=batch_size)
+            self.stdout.write(f"{discussion_model.__name__}: recomputed {updated} rows")
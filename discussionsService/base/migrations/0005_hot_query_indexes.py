@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_merge_comment_creator_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['-created_at', '-id'], name='comment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['discussion', '-created_at', '-id'], name='comment_discussion_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['creator_id', '-created_at'], name='comment_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecomment',
+            index=models.Index(fields=['-created_at', '-id'], name='coursecomment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecomment',
+            index=models.Index(fields=['discussion', '-created_at', '-id'], name='coursecomment_disc_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecomment',
+            index=models.Index(fields=['creator_id', '-created_at'], name='coursecomment_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursediscussion',
+            index=models.Index(fields=['-created_at', '-id'], name='coursediscussion_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursediscussion',
+            index=models.Index(fields=['creator_id', '-created_at'], name='coursediscussion_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=models.Index(fields=['-created_at', '-id'], name='discussion_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=models.Index(fields=['creator_id', '-created_at'], name='discussion_creator_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:33
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    pairs = (('Discussion', 'Comment'), ('CourseDiscussion', 'CourseComment'))
+    for discussion_name, comment_name in pairs:
+        Discussion = apps.get_model('base', discussion_name)
+        Comment = apps.get_model('base', comment_name)
+        comments = Comment.objects.filter(discussion=OuterRef('pk')).order_by().values('discussion')
+        Discussion.objects.update(
+            comment_count=Coalesce(Subquery(comments.annotate(n=Count('pk')).values('n')), 0),
+            last_activity_at=Coalesce(Subquery(comments.annotate(latest=Max('created_at')).values('latest')), F('created_at')),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursediscussion',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursediscussion',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='discussion',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='discussion',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+"""
+Full-text index over discussion/comment titles and bodies (see api/search.py).
+
+Only created on SQLite builds that include FTS5; elsewhere the application
+falls back to its in-process index and this migration does nothing.
+"""
+from django.db import migrations
+from django.db.utils import OperationalError
+
+TABLE = 'base_search_index'
+
+# rowid = pk * 4 + type code, matching api.search.DOC_TYPES
+BACKFILL = (
+    ("base_discussion", 0, "title", "NULL"),
+    ("base_comment", 1, "''", "discussion_id"),
+    ("base_coursediscussion", 2, "title", "NULL"),
+    ("base_coursecomment", 3, "''", "discussion_id"),
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {TABLE} USING fts5(title, body, parent UNINDEXED, tokenize='unicode61')"
+        )
+    except OperationalError:
+        # SQLite compiled without FTS5
+        return
+    for source, code, title, parent in BACKFILL:
+        schema_editor.execute(
+            f"INSERT INTO {TABLE} (rowid, title, body, parent) "
+            f"SELECT id * 4 + {code}, {title}, body, {parent} FROM {source}"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_discussion_activity_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
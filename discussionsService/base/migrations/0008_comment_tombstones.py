@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('comment', 'Comment'), ('course_comment', 'Course comment')], max_length=20)),
+                ('comment_id', models.BigIntegerField()),
+                ('discussion_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['discussion', 'updated_at', 'id'], name='comment_discussion_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated_at', 'id'], name='comment_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecomment',
+            index=models.Index(fields=['discussion', 'updated_at', 'id'], name='coursecomment_disc_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecomment',
+            index=models.Index(fields=['updated_at', 'id'], name='coursecomment_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commenttombstone',
+            index=models.Index(fields=['kind', 'discussion_id', 'deleted_at'], name='tombstone_discussion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commenttombstone',
+            index=models.Index(fields=['kind', 'deleted_at'], name='tombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_comment_tombstones'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='coursediscussion',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='coursediscussion',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='discussion',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='coursediscussion',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('course_id', 'course_subject'), name='unique_active_course_discussion'),
+        ),
+    ]
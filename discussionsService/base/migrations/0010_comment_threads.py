@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat, LPad
+
+
+def backfill_paths(apps, schema_editor):
+    # every existing comment is top-level: its path is just its own id
+    for name in ('Comment', 'CourseComment'):
+        Comment = apps.get_model('base', name)
+        Comment.objects.update(path=Concat(LPad(Cast('pk', CharField()), 10, Value('0')), Value('/')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_soft_delete_discussions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='base.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=231),
+        ),
+        migrations.AddField(
+            model_name='coursecomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='coursecomment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='base.coursecomment'),
+        ),
+        migrations.AddField(
+            model_name='coursecomment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=231),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['discussion', 'path'], name='comment_discussion_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecomment',
+            index=models.Index(fields=['discussion', 'path'], name='coursecomment_disc_path_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
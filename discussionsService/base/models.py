@@ -1,6 +1,44 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
-class Discussion(models.Model):
+from .threads import PATH_LENGTH, thread_path
+
+
+class ActiveDiscussionManager(models.Manager):
+	"""Default manager for discussions: hides soft-deleted rows (see base.purge)."""
+
+	def get_queryset(self):
+		return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class LiveCommentManager(models.Manager):
+	"""Default manager for comments: hides comments of soft-deleted discussions."""
+
+	def get_queryset(self):
+		return super().get_queryset().filter(discussion__deleted_at__isnull=True)
+
+
+class SoftDeleteMixin:
+	def soft_delete(self):
+		"""Hide the discussion and its comments now; base.purge removes the rows later."""
+		self.deleted_at = timezone.now()
+		self.save(update_fields=['deleted_at', 'updated_at'])
+
+
+class ThreadedCommentMixin:
+	"""Keeps ``depth`` and the materialized ``path`` (see base.threads) of new comments."""
+
+	def save(self, *args, **kwargs):
+		if self.path:
+			return super().save(*args, **kwargs)
+		self.depth = self.parent.depth + 1 if self.parent_id else 0
+		with transaction.atomic(using=kwargs.get('using')):
+			super().save(*args, **kwargs)
+			self.path = thread_path(self.parent.path if self.parent_id else '', self.pk)
+			type(self).all_objects.filter(pk=self.pk).update(path=self.path)
+
+
+class Discussion(SoftDeleteMixin, models.Model):
 	title = models.CharField(max_length=200)
 	body = models.TextField()
 	author = models.CharField(max_length=100)
@@ -8,12 +46,31 @@ class Discussion(models.Model):
 	creator_id = models.IntegerField(null=True, blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
+	# denormalized, maintained by the comment views via base.counters
+	comment_count = models.PositiveIntegerField(default=0)
+	last_activity_at = models.DateTimeField(default=timezone.now)
+	# set by soft_delete(); the row and its comments are purged in the background
+	deleted_at = models.DateTimeField(null=True, blank=True)
+
+	objects = ActiveDiscussionManager()
+	all_objects = models.Manager()
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['-created_at', '-id'], name='discussion_created_idx'),
+			models.Index(fields=['creator_id', '-created_at'], name='discussion_creator_idx'),
+		]
 
 	def __str__(self):
 		return self.title
 
-class Comment(models.Model):
+class Comment(ThreadedCommentMixin, models.Model):
 	discussion = models.ForeignKey(Discussion, related_name='comments', on_delete=models.CASCADE)
+	# the comment this one replies to (same discussion); null for top-level comments
+	parent = models.ForeignKey('self', null=True, blank=True, related_name='replies', on_delete=models.CASCADE)
+	# ids from the thread root down to this comment, and the nesting level; see base.threads
+	path = models.CharField(max_length=PATH_LENGTH, default='', editable=False)
+	depth = models.PositiveSmallIntegerField(default=0, editable=False)
 	body = models.TextField()
 	author = models.CharField(max_length=100)
 	# optional external user id who created this comment
@@ -21,11 +78,26 @@ class Comment(models.Model):
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
+	objects = LiveCommentManager()
+	all_objects = models.Manager()
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['-created_at', '-id'], name='comment_created_idx'),
+			models.Index(fields=['discussion', '-created_at', '-id'], name='comment_discussion_created_idx'),
+			models.Index(fields=['creator_id', '-created_at'], name='comment_creator_idx'),
+			# incremental sync (?since=) reads changes in (updated_at, id) order
+			models.Index(fields=['discussion', 'updated_at', 'id'], name='comment_discussion_updated_idx'),
+			models.Index(fields=['updated_at', 'id'], name='comment_updated_idx'),
+			# subtree and top-N-level fetches are path range scans within a discussion
+			models.Index(fields=['discussion', 'path'], name='comment_discussion_path_idx'),
+		]
+
 	def __str__(self):
 		return f"Comment by {self.author} on {self.discussion.title}"
 
 # for course
-class CourseDiscussion(models.Model):
+class CourseDiscussion(SoftDeleteMixin, models.Model):
 	course_id = models.CharField(max_length=100)
 	course_subject = models.CharField(max_length=100)
 	title = models.CharField(max_length=200)
@@ -34,20 +106,75 @@ class CourseDiscussion(models.Model):
 	creator_id = models.IntegerField(null=True, blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
+	# denormalized, maintained by the comment views via base.counters
+	comment_count = models.PositiveIntegerField(default=0)
+	last_activity_at = models.DateTimeField(default=timezone.now)
+	deleted_at = models.DateTimeField(null=True, blank=True)
+
+	objects = ActiveDiscussionManager()
+	all_objects = models.Manager()
 
 	class Meta:
-		unique_together = ('course_id', 'course_subject')
+		# one live discussion per course; a soft-deleted one does not block a new one
+		constraints = [
+			models.UniqueConstraint(
+				fields=['course_id', 'course_subject'], condition=models.Q(deleted_at__isnull=True),
+				name='unique_active_course_discussion',
+			),
+		]
+		indexes = [
+			models.Index(fields=['-created_at', '-id'], name='coursediscussion_created_idx'),
+			models.Index(fields=['creator_id', '-created_at'], name='coursediscussion_creator_idx'),
+		]
 
 	def __str__(self):
 		return f"{self.course_subject} {self.course_id}: {self.title}"
 
-class CourseComment(models.Model):
+class CourseComment(ThreadedCommentMixin, models.Model):
 	discussion = models.ForeignKey(CourseDiscussion, related_name='comments', on_delete=models.CASCADE)
+	parent = models.ForeignKey('self', null=True, blank=True, related_name='replies', on_delete=models.CASCADE)
+	path = models.CharField(max_length=PATH_LENGTH, default='', editable=False)
+	depth = models.PositiveSmallIntegerField(default=0, editable=False)
 	body = models.TextField()
 	author = models.CharField(max_length=100)
 	creator_id = models.IntegerField(null=True, blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
+	objects = LiveCommentManager()
+	all_objects = models.Manager()
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['-created_at', '-id'], name='coursecomment_created_idx'),
+			models.Index(fields=['discussion', '-created_at', '-id'], name='coursecomment_disc_created_idx'),
+			models.Index(fields=['creator_id', '-created_at'], name='coursecomment_creator_idx'),
+			models.Index(fields=['discussion', 'updated_at', 'id'], name='coursecomment_disc_updated_idx'),
+			models.Index(fields=['updated_at', 'id'], name='coursecomment_updated_idx'),
+			models.Index(fields=['discussion', 'path'], name='coursecomment_disc_path_idx'),
+		]
+
 	def __str__(self):
 		return f"Comment by {self.author} on {self.discussion.title}"
+
+# Record of a deleted (or moved) comment, kept so clients syncing with
+# ?since= can drop it. Written by base.tombstones.
+class CommentTombstone(models.Model):
+	COMMENT = 'comment'
+	COURSE_COMMENT = 'course_comment'
+	KIND_CHOICES = [(COMMENT, 'Comment'), (COURSE_COMMENT, 'Course comment')]
+
+	kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+	comment_id = models.BigIntegerField()
+	# the discussion the comment was removed from
+	discussion_id = models.BigIntegerField()
+	deleted_at = models.DateTimeField(default=timezone.now)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['kind', 'discussion_id', 'deleted_at'], name='tombstone_discussion_idx'),
+			models.Index(fields=['kind', 'deleted_at'], name='tombstone_deleted_idx'),
+		]
+
+	def __str__(self):
+		return f"{self.kind} {self.comment_id} removed from {self.discussion_id}"
@@ -0,0 +1,116 @@
+"""
+Purge of soft-deleted discussions.
+
+Deleting a discussion through the API only sets ``deleted_at``: the default
+managers then hide it and its comments, and the request returns straight
+away. The rows are removed afterwards by purge_discussion(), which deletes
+comments in batches of SOFT_DELETE['PURGE_BATCH_SIZE'], each batch in its
+own short transaction with a pause in between, so other writers get the
+database (and SQLite's write lock) back between batches. Comment deletes
+still send post_delete, so tombstones, the search index and event streams
+stay consistent.
+
+Purges run on a background thread in the web process when
+SOFT_DELETE['PURGE_IN_BACKGROUND'] is set. The purge_deleted_discussions
+command finds anything left behind (e.g. by a restart mid-purge) and is
+meant to be run periodically.
+"""
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'PURGE_IN_BACKGROUND': True,
+    'PURGE_BATCH_SIZE': 500,
+    'PURGE_PAUSE_SECONDS': 0.05,
+}
+
+
+def purge_config():
+    return {**DEFAULTS, **getattr(settings, 'SOFT_DELETE', {})}
+
+
+def purge_discussion(discussion_model, pk, batch_size=None, pause=None):
+    """Remove a soft-deleted discussion and its comments. Returns the number of comments deleted."""
+    config = purge_config()
+    batch_size = batch_size or config['PURGE_BATCH_SIZE']
+    pause = config['PURGE_PAUSE_SECONDS'] if pause is None else pause
+    comment_model = discussion_model._meta.get_field('comments').related_model
+
+    if not discussion_model.all_objects.filter(pk=pk, deleted_at__isnull=False).exists():
+        return 0
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            # all_objects: the default manager already hides these comments
+            pks = list(
+                comment_model.all_objects.filter(discussion_id=pk)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            comment_model.all_objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+        if pause:
+            time.sleep(pause)
+    discussion_model.all_objects.filter(pk=pk, deleted_at__isnull=False).delete()
+    return deleted
+
+
+def purge_deleted(discussion_model, older_than=None, batch_size=None, pause=None):
+    """Purge every soft-deleted discussion (deleted before ``older_than``, if given). Returns (discussions, comments)."""
+    pending = discussion_model.all_objects.filter(deleted_at__isnull=False)
+    if older_than is not None:
+        pending = pending.filter(deleted_at__lt=older_than)
+    discussions = comments = 0
+    for pk in list(pending.order_by('deleted_at').values_list('pk', flat=True)):
+        comments += purge_discussion(discussion_model, pk, batch_size=batch_size, pause=pause)
+        discussions += 1
+    return discussions, comments
+
+
+class PurgeWorker:
+    """A single daemon thread working through queued purges one at a time."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, discussion_model, pk):
+        self._queue.put((discussion_model, pk))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='discussion-purge', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            discussion_model, pk = self._queue.get()
+            try:
+                close_old_connections()
+                purge_discussion(discussion_model, pk)
+            except Exception:
+                # the periodic purge command picks it up again
+                logger.exception('purge failed', extra={'model': discussion_model.__name__, 'pk': pk})
+            finally:
+                connection.close()
+                self._queue.task_done()
+
+    def join(self):
+        self._queue.join()
+
+
+_worker = PurgeWorker()
+
+
+def schedule_purge(discussion_model, pk):
+    """Queue the purge of a just soft-deleted discussion once the transaction commits."""
+    if purge_config()['PURGE_IN_BACKGROUND']:
+        transaction.on_commit(lambda: _worker.enqueue(discussion_model, pk))
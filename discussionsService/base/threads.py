@@ -0,0 +1,87 @@
+"""
+Reply threads for Comment and CourseComment (materialized paths).
+
+Every comment stores the chain of ids from its thread root down to itself
+in ``path``: fixed-width, zero-padded segments, each ending in ``/``, so
+``0000000007/0000000042/`` is comment 42 replying to comment 7. Sorting by
+path gives depth-first (reply-under-parent) order with siblings in creation
+order, and a comment's subtree is the contiguous path range starting at its
+own path. ``subtree()`` turns that range into ``path >= p AND path < p'``,
+which the (discussion, path) index answers in one range scan on SQLite and
+PostgreSQL alike (a LIKE 'p%' would need a pattern index on PostgreSQL).
+``depth`` (0 for top-level comments) limits a fetch to the top N levels.
+
+The path contains the comment's own id, so it is written right after the
+INSERT (ThreadedCommentMixin.save(); assign_paths() after bulk_create).
+"""
+SEGMENT_WIDTH = 10
+# paths have at most MAX_DEPTH + 1 segments
+MAX_DEPTH = 20
+PATH_LENGTH = (MAX_DEPTH + 1) * (SEGMENT_WIDTH + 1)
+
+
+def thread_path(parent_path, pk):
+    return f'{parent_path}{pk:0{SEGMENT_WIDTH}d}/'
+
+
+def path_upper_bound(path):
+    """Smallest string sorting after every path that starts with ``path`` ('0' follows '/')."""
+    return path[:-1] + '0'
+
+
+def assign_paths(objs):
+    """
+    Fill in ``depth`` and ``path`` on saved objects that lack a path (after
+    bulk_create, which skips save()) and write them back in one UPDATE per
+    batch. Parents are taken from the ``parent`` attribute and must be saved
+    comments with a path.
+    """
+    pending = [obj for obj in objs if not obj.path]
+    for obj in pending:
+        obj.depth = obj.parent.depth + 1 if obj.parent_id else 0
+        obj.path = thread_path(obj.parent.path if obj.parent_id else '', obj.pk)
+    if pending:
+        type(pending[0]).all_objects.bulk_update(pending, ['path', 'depth'], batch_size=500)
+
+
+def subtree(queryset, comment, levels=None):
+    """``comment`` and its replies, depth first; ``levels`` limits how many levels (1 = just ``comment``)."""
+    qs = queryset.filter(
+        discussion_id=comment.discussion_id, path__gte=comment.path, path__lt=path_upper_bound(comment.path),
+    )
+    if levels is not None:
+        qs = qs.filter(depth__lt=comment.depth + levels)
+    return qs.order_by('path')
+
+
+def top_levels(queryset, discussion_id, levels=None):
+    """A discussion's comments, depth first; ``levels`` limits how many levels (1 = top-level comments only)."""
+    qs = queryset.filter(discussion_id=discussion_id)
+    if levels is not None:
+        qs = qs.filter(depth__lt=levels)
+    return qs.order_by('path')
+
+
+def delete_subtree(comment):
+    """Delete ``comment`` with all of its replies. Returns the number of comments deleted."""
+    model = type(comment)
+    # collected in one query; the cascade on `parent` then finds nothing new
+    deleted = subtree(model.all_objects, comment).delete()[1]
+    return deleted.get(model._meta.label, 0)
+
+
+def nest(nodes):
+    """
+    Nest depth-first ``nodes`` (dicts with 'id' and 'parent') in their
+    parents' 'replies' lists. Nodes whose parent is not among them (the
+    subtree root, or the first replies on a continuation page) are returned
+    as the top level.
+    """
+    by_id = {}
+    roots = []
+    for node in nodes:
+        node['replies'] = []
+        by_id[node['id']] = node
+        parent = by_id.get(node['parent'])
+        (parent['replies'] if parent is not None else roots).append(node)
+    return roots
@@ -0,0 +1,56 @@
+"""
+Tombstones for deleted comments.
+
+Comments are hard-deleted, so without a trace the ``since`` sync on the
+comment lists (api/sync.py) could not tell a client that a row it holds is
+gone. A post_delete receiver records a CommentTombstone for every deleted
+Comment / CourseComment, including those removed by a cascading discussion
+delete; the comment views also leave one behind when a comment is moved to
+another discussion. purge_tombstones() drops tombstones older than the
+retention window (see the purge_comment_tombstones command).
+"""
+from django.db.models.signals import post_delete
+
+from .models import Comment, CourseComment, CommentTombstone
+
+KINDS = {
+    Comment: CommentTombstone.COMMENT,
+    CourseComment: CommentTombstone.COURSE_COMMENT,
+}
+
+
+def tombstones_for(comment_model):
+    return CommentTombstone.objects.filter(kind=KINDS[comment_model])
+
+
+def record_tombstones(comment_model, removed):
+    """``removed`` is an iterable of (comment_id, discussion_id) pairs."""
+    kind = KINDS[comment_model]
+    CommentTombstone.objects.bulk_create([
+        CommentTombstone(kind=kind, comment_id=comment_id, discussion_id=discussion_id)
+        for comment_id, discussion_id in removed
+    ])
+
+
+def purge_tombstones(older_than, batch_size=1000):
+    """Delete tombstones from before ``older_than``, one pk batch per DELETE. Returns rows deleted."""
+    deleted = 0
+    while True:
+        pks = list(
+            CommentTombstone.objects.filter(deleted_at__lt=older_than)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += CommentTombstone.objects.filter(pk__in=pks).delete()[0]
+
+
+# Signal receivers
+
+def comment_deleted(sender, instance, **kwargs):
+    record_tombstones(sender, [(instance.pk, instance.discussion_id)])
+
+
+def connect_signals():
+    for model in KINDS:
+        post_delete.connect(comment_deleted, sender=model, dispatch_uid=f'tombstone_{model.__name__}')
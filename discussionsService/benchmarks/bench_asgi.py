@@ -0,0 +1,53 @@
+"""
+Throughput and latency of the synchronous endpoints under WSGI versus the
+native async endpoints (/api/async/) under ASGI, with the same worker count.
+
+Start both servers with the same number of worker processes, e.g.
+
+    cd discussionsService
+    gunicorn discussionsService.wsgi -w 2 -b 127.0.0.1:8001
+    uvicorn discussionsService.asgi:application --workers 2 --port 8002
+
+then drive them with the same number of concurrent clients:
+
+    python benchmarks/bench_asgi.py -c 64 -n 5000 \\
+        wsgi=http://127.0.0.1:8001/api/discussions/ \\
+        asgi=http://127.0.0.1:8002/api/async/discussions/
+
+Each sync worker serves one request at a time, so with more clients than
+workers the WSGI run queues; the ASGI workers interleave requests while they
+wait on the database. Extra headers (e.g. X-User-ID / X-User-Role for the
+course endpoints) are passed with -H.
+"""
+import argparse
+import statistics
+
+from loadgen import load, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='+', metavar='LABEL=URL')
+    parser.add_argument('-c', '--concurrency', type=int, default=32)
+    parser.add_argument('-n', '--requests', type=int, default=2000)
+    parser.add_argument('-H', '--header', action='append', default=[], help='extra request header, "Name: value"')
+    parser.add_argument('--warmup', type=int, default=100)
+    args = parser.parse_args()
+
+    headers = dict(h.split(':', 1) for h in args.header)
+    headers = {k.strip(): v.strip() for k, v in headers.items()}
+
+    print(f'{"target":<10} {"rps":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"mean ms":>8} {"errors":>7}')
+    for target in args.targets:
+        label, url = target.split('=', 1)
+        load(url, min(args.concurrency, args.warmup or 1), args.warmup, headers)
+        latencies, errors, elapsed, _ = load(url, args.concurrency, args.requests, headers)
+        ms = [s * 1000 for s in latencies]
+        print(
+            f'{label:<10} {len(latencies) / elapsed:>9.1f} {percentile(ms, 50):>8.2f} {percentile(ms, 95):>8.2f} '
+            f'{percentile(ms, 99):>8.2f} {statistics.fmean(ms) if ms else 0.0:>8.2f} {len(errors):>7}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Render CPU and bytes on the wire for the largest list responses: a
+maximum-size page of the discussion list (each discussion with its comments
+nested), of the comment list, and of a discussion thread.
+
+    cd discussionsService
+    python benchmarks/bench_render.py [--comments-per-discussion 20]
+
+For each response the serializer output is rendered with DRF's JSONRenderer
+and with api.renderers.FastJSONRenderer (orjson, when installed), then
+compressed as discussionsService.compression would: gzip at the configured
+level and, with the brotli package installed, brotli. Times are CPU
+milliseconds per response (best of --repeat). Rows are unsaved model
+instances, so no database is needed.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'discussionsService.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.renderers import FastJSONRenderer
+from api.serializers import CommentSerializer, DiscussionSerializer
+from base.models import Comment, Discussion
+from base.threads import nest, thread_path
+from discussionsService.compression import COMPRESSORS, compression_config
+
+
+def make_comment(pk, discussion, now, parent=None):
+    comment = Comment(pk=pk, body=f'comment {pk} ' + 'lorem ipsum dolor sit amet ' * 4, author=f'user{pk % 97}',
+                      creator_id=pk % 1000, created_at=now - timedelta(minutes=pk), updated_at=now)
+    comment.discussion = discussion
+    comment.parent = parent
+    comment.depth = parent.depth + 1 if parent else 0
+    comment.path = thread_path(parent.path if parent else '', pk)
+    return comment
+
+
+def make_discussions(count, per_discussion, now):
+    discussions = []
+    next_pk = 1
+    for n in range(count):
+        discussion = Discussion(pk=n + 1, title=f'Discussion {n + 1} about the midterm', body='question body ' * 20,
+                                author=f'user{n % 97}', created_at=now, updated_at=now, last_activity_at=now,
+                                comment_count=per_discussion)
+        comments = []
+        for _ in range(per_discussion):
+            comments.append(make_comment(next_pk, discussion, now))
+            next_pk += 1
+        # what prefetch_related('comments') would have cached
+        discussion._prefetched_objects_cache = {'comments': comments}
+        discussions.append(discussion)
+    return discussions
+
+
+def make_thread(count, now):
+    discussion = Discussion(pk=1, title='A long thread', body='b', author='A')
+    comments, parents = [], []
+    for pk in range(1, count + 1):
+        parent = parents[pk % len(parents)] if parents and pk % 3 else None
+        comment = make_comment(pk, discussion, now, parent)
+        comments.append(comment)
+        if comment.depth < 6:
+            parents.append(comment)
+    return sorted(comments, key=lambda c: c.path)
+
+
+def cpu_ms(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        result = func()
+        best = min(best, time.process_time() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--comments-per-discussion', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    now = timezone.now()
+    page = settings.API_PAGINATION['MAX_PAGE_SIZE']
+    thread_page = settings.COMMENT_THREADS['MAX_PAGE_SIZE']
+    discussions = make_discussions(page, args.comments_per_discussion, now)
+    comments = [c for d in discussions for c in d._prefetched_objects_cache['comments']][:page]
+    responses = {
+        f'discussions x{page} (+{args.comments_per_discussion} comments each)':
+            DiscussionSerializer(discussions, many=True).data,
+        f'comments x{page}': CommentSerializer(comments, many=True).data,
+        f'thread x{thread_page} (nested)': nest(CommentSerializer(make_thread(thread_page, now), many=True).data),
+    }
+
+    config = compression_config()
+    print(f'orjson: {"yes" if renderers.orjson is not None else "no (FastJSONRenderer falls back to JSONRenderer)"}; '
+          f'compression: {", ".join(COMPRESSORS)} (gzip level {config["GZIP_LEVEL"]}, brotli quality {config["BROTLI_QUALITY"]})')
+    for label, data in responses.items():
+        drf_ms, body = cpu_ms(lambda: JSONRenderer().render(data), args.repeat)
+        fast_ms, fast_body = cpu_ms(lambda: FastJSONRenderer().render(data), args.repeat)
+        assert fast_body == body, 'FastJSONRenderer output differs from JSONRenderer'
+        print(f'\n{label}')
+        print(f'  {"render JSONRenderer":<26} {drf_ms:8.2f} ms')
+        print(f'  {"render FastJSONRenderer":<26} {fast_ms:8.2f} ms  ({drf_ms / fast_ms:.1f}x)')
+        print(f'  {"identity":<26} {"":>8}     {len(body) / 1024:9.1f} KiB')
+        for encoding, compress in COMPRESSORS.items():
+            ms, compressed = cpu_ms(lambda: compress(body, config), args.repeat)
+            print(f'  {encoding:<26} {ms:8.2f} ms  {len(compressed) / 1024:9.1f} KiB  ({len(body) / len(compressed):.1f}x smaller)')
+
+
+if __name__ == '__main__':
+    main()
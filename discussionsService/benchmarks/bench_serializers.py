@@ -0,0 +1,80 @@
+"""
+Per-row serialization cost of the comment serializer: created_at_display
+formatted the old way (timezone.localtime + strftime per row), the current
+way (time zone looked up once, f-string formatting), and left out with
+?created_at_display=false.
+
+    cd discussionsService
+    python benchmarks/bench_serializers.py [--rows 1000]
+
+Rows are unsaved model instances, so no database is needed.
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'discussionsService.settings')
+
+import django
+
+django.setup()
+
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import CommentSerializer
+from base.models import Comment, Discussion
+
+
+class PerRowLocaltimeSerializer(CommentSerializer):
+    """The previous implementation, for comparison."""
+
+    def get_created_at_display(self, obj):
+        if not obj.created_at:
+            return None
+        try:
+            local = timezone.localtime(obj.created_at)
+            return local.strftime('%Y-%m-%d %H:%M')
+        except Exception:
+            return obj.created_at.isoformat()
+
+
+def make_rows(n):
+    discussion = Discussion(pk=1, title='bench', body='b', author='A')
+    now = timezone.now()
+    rows = []
+    for i in range(n):
+        comment = Comment(pk=i + 1, body=f'comment {i}', author='A', created_at=now - timedelta(minutes=i), updated_at=now)
+        comment.discussion = discussion
+        rows.append(comment)
+    return rows
+
+
+def per_row_us(serializer_class, rows, context=None, repeat=5):
+    context = context or {}
+    number = 5
+    elapsed = min(timeit.repeat(lambda: serializer_class(rows, many=True, context=context).data, number=number, repeat=repeat))
+    return elapsed / number / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    omit = {'request': Request(APIRequestFactory().get('/api/comments/', {'created_at_display': 'false'}))}
+    before = per_row_us(PerRowLocaltimeSerializer, rows)
+    after = per_row_us(CommentSerializer, rows)
+    omitted = per_row_us(CommentSerializer, rows, context=omit)
+    print(f'per-row localtime/strftime: {before:7.2f} us/row')
+    print(f'cached tz, f-string:        {after:7.2f} us/row ({before / after:.2f}x)')
+    print(f'created_at_display=false:   {omitted:7.2f} us/row ({before / omitted:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
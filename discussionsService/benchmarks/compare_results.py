@@ -0,0 +1,76 @@
+"""
+Compare two result files written by run_benchmarks.py.
+
+    python benchmarks/compare_results.py benchmarks/results/abc123-100k.json benchmarks/results/def456-100k.json
+
+Prints the change of every metric per scenario. Exits with status 1 when a
+scenario regressed: p95 latency up or throughput down by more than
+--threshold percent, or more queries per request.
+"""
+import argparse
+import json
+import sys
+
+
+def change(old, new):
+    if not old:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def compare(baseline, current, threshold):
+    """Returns (rows, regressions) for the scenarios present in both runs."""
+    rows, regressions = [], []
+    for label, new in current['results'].items():
+        old = baseline['results'].get(label)
+        if old is None:
+            continue
+        rps = change(old['rps'], new['rps'])
+        p95 = change(old['p95_ms'], new['p95_ms'])
+        old_q, new_q = old.get('queries_per_request'), new.get('queries_per_request')
+        rows.append((label, old, new, rps, p95))
+        reasons = []
+        if p95 > threshold:
+            reasons.append(f'p95 +{p95:.1f}%')
+        if rps < -threshold:
+            reasons.append(f'rps {rps:.1f}%')
+        if old_q is not None and new_q is not None and new_q > old_q:
+            reasons.append(f'queries {old_q:g} -> {new_q:g}')
+        if new['errors'] > old['errors']:
+            reasons.append(f'errors {old["errors"]} -> {new["errors"]}')
+        if reasons:
+            regressions.append((label, reasons))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed slowdown in percent (default 10)')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    for key in ('scale', 'concurrency', 'server'):
+        if baseline.get(key) != current.get(key):
+            print(f'warning: {key} differs ({baseline.get(key)} vs {current.get(key)})')
+
+    rows, regressions = compare(baseline, current, args.threshold)
+    print(f'{baseline["commit"]} -> {current["commit"]} ({current["scale"]})')
+    print(f'{"scenario":<20} {"rps":>17} {"change":>8} {"p95 ms":>17} {"change":>8} {"q/req":>11}')
+    for label, old, new, rps, p95 in rows:
+        queries = f'{old.get("queries_per_request")}->{new.get("queries_per_request")}'
+        print(
+            f'{label:<20} {old["rps"]:>8.1f}->{new["rps"]:<8.1f} {rps:>+7.1f}% '
+            f'{old["p95_ms"]:>8.2f}->{new["p95_ms"]:<8.2f} {p95:>+7.1f}% {queries:>11}'
+        )
+    for label, reasons in regressions:
+        print(f'REGRESSION {label}: {", ".join(reasons)}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Closed-loop HTTP load generator shared by the benchmark scripts.
+
+``load()`` runs ``concurrency`` client threads, each with its own keep-alive
+connection, until ``total`` requests have been sent, and returns
+(latencies in seconds, errors, elapsed seconds, X-Query-Count values).
+"""
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def load(url, concurrency, total, headers):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    local = threading.local()
+    counter = iter(range(total))
+    counter_lock = threading.Lock()
+    latencies, errors, query_counts = [], [], []
+
+    def connection():
+        # one keep-alive connection per client thread
+        if not hasattr(local, 'conn'):
+            local.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        return local.conn
+
+    def client():
+        while True:
+            with counter_lock:
+                if next(counter, None) is None:
+                    return
+            start = time.perf_counter()
+            try:
+                conn = connection()
+                conn.request('GET', path, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 400:
+                    errors.append(resp.status)
+                queries = resp.getheader('X-Query-Count')
+                if queries is not None:
+                    query_counts.append(int(queries))
+            except (OSError, http.client.HTTPException) as exc:
+                errors.append(type(exc).__name__)
+                local.__dict__.pop('conn', None)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed, query_counts
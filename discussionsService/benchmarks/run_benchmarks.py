@@ -0,0 +1,241 @@
+"""
+Load-test the discussions API endpoints and store the results as JSON.
+
+With --scales, each scale gets its own SQLite database under
+benchmarks/.data/ (migrated and filled by `manage.py seed_benchmark_data`
+the first time, reused afterwards), and a local server is started on it
+with QUERY_COUNT_HEADER=1 so queries per request are recorded:
+
+    cd discussionsService
+    python benchmarks/run_benchmarks.py --scales 1k,100k,1m -c 16 -n 2000
+    python benchmarks/run_benchmarks.py --scales 100k --server gunicorn --workers 4
+
+Alternatively drive a server you started yourself (start it with
+QUERY_COUNT_HEADER=1 to get query counts):
+
+    python benchmarks/run_benchmarks.py --base-url http://127.0.0.1:8000 --scale-label prod-copy
+
+Every endpoint scenario is warmed up, then run with -c concurrent clients
+for -n requests; p50/p95/p99/mean latency, requests per second, errors and
+mean queries per request are printed and written to
+benchmarks/results/<commit>-<scale>.json. Compare two runs with
+benchmarks/compare_results.py.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+from loadgen import load, percentile
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = BENCH_DIR.parent
+STUDENT = {'X-User-ID': '1', 'X-User-Role': 'STUDENT'}
+
+# label -> (path template, needs student headers)
+SCENARIOS = {
+    'discussions': ('/api/discussions/?page_size=50', False),
+    'discussions-summary': ('/api/discussions/?mode=summary&page_size=50', False),
+    'discussion-detail': ('/api/discussions/{discussion}/', False),
+    'comments': ('/api/comments/?discussion={discussion}&page_size=50', False),
+    'comments-since': ('/api/comments/?discussion={discussion}&since={since}', False),
+    'discussion-thread': ('/api/discussions/{discussion}/thread/', False),
+    'discussion-thread-top': ('/api/discussions/{discussion}/thread/?levels=2&shape=flat', False),
+    'course-discussion': ('/api/course-discussions/{course_subject}/{course_id}/', True),
+    'course-comments': ('/api/course-comments/?discussion={course}&page_size=50', True),
+    'search': ('/api/search/?q=lecture+exam', False),
+    'async-discussions': ('/api/async/discussions/?page_size=50', False),
+    'health': ('/api/health/', False),
+}
+
+SERVERS = {
+    'runserver': lambda port, workers: [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{port}'],
+    'gunicorn': lambda port, workers: ['gunicorn', 'discussionsService.wsgi', '-w', str(workers), '-b', f'127.0.0.1:{port}'],
+    'uvicorn': lambda port, workers: [
+        'uvicorn', 'discussionsService.asgi:application', '--workers', str(workers), '--port', str(port), '--no-access-log',
+    ],
+}
+
+
+def get_json(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=30) as resp:
+        return json.load(resp)
+
+
+def git_commit():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR, text=True).strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD', '--', '.'], cwd=PROJECT_DIR) != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+
+def discover(base_url):
+    """Ids the scenario URLs need, taken from the data on the server."""
+    discussions = get_json(f'{base_url}/api/discussions/?mode=summary&page_size=1')
+    courses = get_json(f'{base_url}/api/course-discussions/?mode=summary&page_size=1', STUDENT)
+    if not discussions or not courses:
+        raise SystemExit('The server has no discussions or course discussions; seed it first.')
+    since = (datetime.now(timezone.utc) - timedelta(minutes=10)).isoformat().replace('+00:00', 'Z')
+    return {
+        'discussion': discussions[0]['id'],
+        'course': courses[0]['id'],
+        'course_subject': quote(courses[0]['course_subject']),
+        'course_id': quote(courses[0]['course_id']),
+        'since': since,
+    }
+
+
+def run_scenarios(base_url, scenarios, args):
+    ids = discover(base_url)
+    health = get_json(f'{base_url}/api/health/')
+    results = {}
+    print(f'{"scenario":<20} {"rps":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"mean ms":>8} {"q/req":>6} {"errors":>7}')
+    for label in scenarios:
+        template, student = SCENARIOS[label]
+        url = base_url + template.format(**ids)
+        headers = STUDENT if student else {}
+        if args.warmup:
+            load(url, min(args.concurrency, args.warmup), args.warmup, headers)
+        latencies, errors, elapsed, query_counts = load(url, args.concurrency, args.requests, headers)
+        ms = [s * 1000 for s in latencies]
+        result = {
+            'url': url,
+            'requests': len(latencies),
+            'errors': len(errors),
+            'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(percentile(ms, 50), 2),
+            'p95_ms': round(percentile(ms, 95), 2),
+            'p99_ms': round(percentile(ms, 99), 2),
+            'mean_ms': round(statistics.fmean(ms), 2) if ms else 0.0,
+            'queries_per_request': round(statistics.fmean(query_counts), 2) if query_counts else None,
+        }
+        results[label] = result
+        queries = '-' if result['queries_per_request'] is None else f'{result["queries_per_request"]:.1f}'
+        print(
+            f'{label:<20} {result["rps"]:>9.1f} {result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+            f'{result["p99_ms"]:>8.2f} {result["mean_ms"]:>8.2f} {queries:>6} {result["errors"]:>7}'
+        )
+    return results, health
+
+
+def prepare_database(scale):
+    data_dir = BENCH_DIR / '.data'
+    data_dir.mkdir(exist_ok=True)
+    db_path = data_dir / f'{scale}.sqlite3'
+    if db_path.exists():
+        # a database seeded by an older checkout may predate newer migrations
+        subprocess.run([sys.executable, 'manage.py', 'migrate', '-v0'], cwd=PROJECT_DIR,
+                       env={**os.environ, 'DB_NAME': str(db_path)}, check=True)
+    else:
+        partial = db_path.with_suffix('.partial.sqlite3')
+        partial.unlink(missing_ok=True)
+        env = {**os.environ, 'DB_NAME': str(partial)}
+        print(f'seeding {scale} comments into {db_path} ...')
+        subprocess.run([sys.executable, 'manage.py', 'migrate', '-v0'], cwd=PROJECT_DIR, env=env, check=True)
+        subprocess.run(
+            [sys.executable, 'manage.py', 'seed_benchmark_data', '--comments', scale],
+            cwd=PROJECT_DIR, env=env, check=True,
+        )
+        # only a completely seeded database is reused
+        for suffix in ('', '-wal', '-shm'):
+            src = Path(f'{partial}{suffix}')
+            if src.exists():
+                src.rename(f'{db_path}{suffix}')
+    return db_path
+
+
+def start_server(db_path, args):
+    env = {**os.environ, 'DB_NAME': str(db_path), 'QUERY_COUNT_HEADER': '1'}
+    server = subprocess.Popen(
+        SERVERS[args.server](args.port, args.workers), cwd=PROJECT_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{args.port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f'{args.server} exited with status {server.returncode}')
+        try:
+            get_json(f'{base_url}/api/health/')
+            return server, base_url
+        except OSError:
+            time.sleep(0.25)
+    server.terminate()
+    raise SystemExit(f'{args.server} did not become healthy within 60s')
+
+
+def write_results(args, scale, base_url, results, health):
+    commit = git_commit()
+    document = {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'scale': scale,
+        'server': args.server if args.scales else base_url,
+        'workers': args.workers if args.scales else None,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'database': {alias: db['vendor'] for alias, db in health.get('databases', {}).items()},
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    output = Path(args.output) if args.output else BENCH_DIR / 'results' / f'{commit}-{scale}.json'
+    if args.output and len(args.scales or []) > 1:
+        output = output.with_name(f'{output.stem}-{scale}{output.suffix}')
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2) + '\n')
+    print(f'wrote {output}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--scales', type=lambda v: [s.strip() for s in v.split(',') if s.strip()],
+                        help='comma-separated data sizes to seed and serve, e.g. 1k,100k,1m')
+    target.add_argument('--base-url', help='benchmark an already running server instead')
+    parser.add_argument('--scale-label', default='external', help='scale recorded for --base-url runs')
+    parser.add_argument('--server', choices=sorted(SERVERS), default='runserver')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn/uvicorn worker processes')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-c', '--concurrency', type=int, default=16)
+    parser.add_argument('-n', '--requests', type=int, default=1000, help='requests per scenario')
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--only', type=lambda v: v.split(','), default=list(SCENARIOS),
+                        help=f'comma-separated scenarios (default all: {",".join(SCENARIOS)})')
+    parser.add_argument('-o', '--output', help='results file (default benchmarks/results/<commit>-<scale>.json)')
+    args = parser.parse_args()
+
+    unknown = set(args.only) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenario(s): {", ".join(sorted(unknown))}')
+
+    if args.base_url:
+        results, health = run_scenarios(args.base_url.rstrip('/'), args.only, args)
+        write_results(args, args.scale_label, args.base_url, results, health)
+        return
+
+    for scale in args.scales:
+        db_path = prepare_database(scale)
+        server, base_url = start_server(db_path, args)
+        try:
+            print(f'\n== {scale} comments, {args.server}, {args.concurrency} clients ==')
+            results, health = run_scenarios(base_url, args.only, args)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        write_results(args, scale, base_url, results, health)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,3 +12,15 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "discussionsService.settings")
 
 import django
 django.setup()
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    # cached entries would otherwise outlive the per-test database rollback
+    from django.core.cache import caches
+
+    for cache in caches.all():
+        cache.clear()
+    yield
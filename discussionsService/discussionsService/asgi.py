@@ -2,6 +2,8 @@
 ASGI config for discussionsService project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server, e.g. ``uvicorn discussionsService.asgi:application``;
+the native async endpoints are under /api/async/ (api/async_views.py).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
 from django.conf import settings
+from django.core.signals import setting_changed
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.request import Request
 from rest_framework_simplejwt.backends import TokenBackend
 from rest_framework_simplejwt.exceptions import TokenBackendError
 
+from .logging_utils import debug_enabled
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class ExternalJWTUser:
@@ -34,6 +45,90 @@ class ExternalJWTUser:
         return f"ExternalJWTUser(id={self.id}, email={self.email}, username={self.username}, role={self.role})"
 
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU of token payloads that already passed signature and expiry
+    checks, keyed by the SHA-256 digest of the raw token. An entry is kept
+    until the token's own ``exp`` or ``ttl`` seconds, whichever comes first,
+    so a cached token never outlives its validity.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        if self.max_size <= 0:
+            return None
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return dict(payload)
+
+    def set(self, token: str, payload: dict) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_token_cache: Optional[VerifiedTokenCache] = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    """Process-wide cache, sized from SIMPLE_JWT on first use."""
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = VerifiedTokenCache(
+                    max_size=settings.SIMPLE_JWT.get("VERIFIED_TOKEN_CACHE_SIZE", 1024),
+                    ttl=settings.SIMPLE_JWT.get("VERIFIED_TOKEN_CACHE_TTL", 300),
+                )
+    return _token_cache
+
+
+def reset_token_cache(**kwargs) -> None:
+    global _token_cache
+    if kwargs.get("setting") not in (None, "SIMPLE_JWT", "SECRET_KEY"):
+        return
+    with _token_cache_lock:
+        _token_cache = None
+
+
+setting_changed.connect(reset_token_cache)
+
+
 class ExternalJWTAuthentication(BaseAuthentication):
     """
     Authenticate requests using the JWTs issued by the user-auth service.
@@ -48,9 +143,9 @@ class ExternalJWTAuthentication(BaseAuthentication):
         algorithm = settings.SIMPLE_JWT.get("ALGORITHM", "HS256")
         self.token_backend = TokenBackend(algorithm=algorithm, signing_key=signing_key)
 
+    @timed("auth")
     def authenticate(self, request: Request) -> Optional[Tuple[ExternalJWTUser, dict]]:
         auth_header = request.headers.get("Authorization")
-        print("53-auth_header: ", auth_header)
         if not auth_header:
             # Fallback: allow the calling web frontend to pass lightweight user info
             # via headers when a JWT is not available (e.g., server-side session auth).
@@ -79,7 +174,6 @@ class ExternalJWTAuthentication(BaseAuthentication):
             return None
 
         payload = self._decode_token(token)
-        print("payload: ",payload)
         raw_user_id = payload.get("user_id")
         if raw_user_id is None:
             raise AuthenticationFailed("Token payload missing user_id")
@@ -95,11 +189,30 @@ class ExternalJWTAuthentication(BaseAuthentication):
             username=payload.get("username"),
             role=payload.get("role")
         )
-        print("user: ", user)
+        if debug_enabled(logger):
+            # never log the token itself; the claims identify the caller
+            logger.debug("authenticated bearer token", extra={"user_id": user.id, "role": user.role, "exp": payload.get("exp")})
         return (user, payload)
 
+    async def aauthenticate(self, request) -> Optional[Tuple[ExternalJWTUser, dict]]:
+        """
+        Entry point for the native async views. Verification is CPU-only (an
+        HMAC check, usually a token-cache hit) with no database or network
+        access, so it runs inline on the event loop rather than in a thread
+        via sync_to_async.
+        """
+        return self.authenticate(request)
+
     def _decode_token(self, token: str) -> dict:
+        # DRF builds a new authenticator per request, so verified payloads
+        # live in a process-wide cache rather than on the instance
+        cache = get_token_cache()
+        payload = cache.get(token)
+        if payload is not None:
+            return payload
         try:
-            return self.token_backend.decode(token, verify=True)
+            payload = self.token_backend.decode(token, verify=True)
         except TokenBackendError as exc:
             raise AuthenticationFailed("Invalid or expired token") from exc
+        cache.set(token, payload)
+        return payload
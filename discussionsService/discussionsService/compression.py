@@ -0,0 +1,134 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+CompressionMiddleware compresses bodies of at least
+RESPONSE_COMPRESSION['MIN_SIZE'] bytes with brotli, when the optional brotli
+package is installed and the client prefers or accepts ``br``, and otherwise
+with gzip. Smaller bodies are sent as they are: below about a kilobyte the
+savings do not pay for the CPU time and the extra headers. Only the
+CONTENT_TYPES prefixes (JSON, NDJSON, text) are compressed, and a body is
+left alone if compressing did not make it smaller.
+
+Streaming responses are never compressed. That keeps Server-Sent Event
+streams from being held back in a compressor's buffer, and it leaves the
+NDJSON export as a stream.
+
+Since the bytes now depend on the encoding, a strong ETag is made weak, as
+Django's GZipMiddleware does. The conditional GET checks in api/conditional.py
+compare ETags weakly. Compressed or compressible responses carry
+``Vary: Accept-Encoding`` so shared caches keep the variants apart.
+"""
+from __future__ import annotations
+
+import gzip
+from typing import Dict, Optional, Sequence
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    # 4-5 compresses about as fast as gzip level 6, and smaller
+    "BROTLI_QUALITY": 4,
+    "CONTENT_TYPES": ("application/json", "application/x-ndjson", "text/"),
+}
+
+
+def compression_config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "RESPONSE_COMPRESSION", {})}
+
+
+def _gzip(content: bytes, config: dict) -> bytes:
+    # mtime=0: identical bodies give identical bytes
+    return gzip.compress(content, compresslevel=config["GZIP_LEVEL"], mtime=0)
+
+
+def _brotli(content: bytes, config: dict) -> bytes:
+    return brotli.compress(content, quality=config["BROTLI_QUALITY"])
+
+
+# in order of preference when the client accepts several equally
+COMPRESSORS = {"br": _brotli, "gzip": _gzip} if brotli is not None else {"gzip": _gzip}
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Content codings -> q-values from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: str, available: Sequence[str]) -> Optional[str]:
+    """The coding from ``available`` the client rates highest (ties go to the earlier one), or None."""
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        config = compression_config()
+        if not config["ENABLED"] or response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if len(response.content) < config["MIN_SIZE"]:
+            return response
+        if not response.get("Content-Type", "").startswith(tuple(config["CONTENT_TYPES"])):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""), list(COMPRESSORS))
+        if encoding is None:
+            return response
+        compressed = COMPRESSORS[encoding](response.content, config)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
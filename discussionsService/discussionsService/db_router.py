@@ -0,0 +1,100 @@
+"""
+Read-replica routing.
+
+ReplicaRoutingMiddleware marks GET/HEAD/OPTIONS requests as safe to read
+from a replica; ReplicaRouter then sends their reads to one of the aliases in
+READ_REPLICAS['ALIASES']. Everything else (writes, unsafe requests,
+management commands, background threads) uses ``default``.
+
+After a successful unsafe request the client is pinned to the primary for
+READ_REPLICAS['STICKY_SECONDS'] through a cookie, so an author reads their
+own write even while the replicas lag behind.
+"""
+from __future__ import annotations
+
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = "default"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+STICKY_COOKIE = "primary_until"
+
+# False (the default, outside requests) routes every read to the primary
+replica_reads_var: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+def replica_config() -> dict:
+    return {"ALIASES": [], "STICKY_SECONDS": 5, **getattr(settings, "READ_REPLICAS", {})}
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        aliases = replica_config()["ALIASES"]
+        if aliases and replica_reads_var.get():
+            return random.choice(aliases)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def pinned_to_primary(request) -> bool:
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        use_replica = request.method in SAFE_METHODS and not pinned_to_primary(request)
+        return replica_reads_var.set(use_replica)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads_var.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica_reads_var.reset(token)
+        return self.finish(request, response)
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            sticky = replica_config()["STICKY_SECONDS"]
+            if sticky and replica_config()["ALIASES"]:
+                response.set_cookie(
+                    STICKY_COOKIE, f"{time.time() + sticky:.3f}", max_age=sticky, httponly=True, samesite="Lax",
+                )
+        return response
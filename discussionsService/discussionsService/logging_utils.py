@@ -0,0 +1,70 @@
+"""
+Structured, request-correlated and sampled logging.
+
+RequestContextMiddleware assigns every request an id and decides once,
+up front, whether the request is sampled for debug logging. Code on the
+hot path guards expensive debug output with ``debug_enabled(logger)`` so
+unsampled requests skip building the message entirely; RequestContextFilter
+also drops any DEBUG record that slips through for an unsampled request.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+# None outside a request (management commands, shell): debug is not sampled away
+debug_sampled_var: ContextVar[Optional[bool]] = ContextVar("debug_sampled", default=None)
+
+# attributes every LogRecord has; anything else was passed through ``extra=``
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+def is_debug_sampled() -> bool:
+    return debug_sampled_var.get() is not False
+
+
+def debug_enabled(logger: logging.Logger) -> bool:
+    """True when a DEBUG record from ``logger`` would actually be emitted."""
+    return logger.isEnabledFor(logging.DEBUG) and is_debug_sampled()
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request id and applies debug sampling."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        if record.levelno <= logging.DEBUG and not is_debug_sampled():
+            return False
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; ``extra=`` fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_levels(spec: str) -> dict:
+    """Parse ``"api=DEBUG,discussionsService=WARNING"`` into logger -> level."""
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
@@ -0,0 +1,361 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware starts a RequestTimings for every request. Code on the
+request path adds to it with ``timed(phase)`` (a context manager that also
+works as a decorator): ExternalJWTAuthentication records ``auth``, the
+permission classes ``perm``, the model serializers and the JSON renderer
+``serialize``. Every SQL statement is timed into ``db`` through a
+connection execute_wrapper (``wrap_queries``; ``awrap_queries`` under
+ASGI, where the connections belong to the thread that runs the async ORM's
+queries). Phases may overlap (queries run while
+serializing count in both), so the request also keeps one wall clock of
+the time any phase was open; ``app`` is the rest of the request, total
+minus that time.
+
+The breakdown is sent back in a Server-Timing header (when
+PERFORMANCE_METRICS['SERVER_TIMING'] is on) and aggregated into Prometheus
+histograms labelled by the URL name from api/urls.py, served in the text
+exposition format by ``metrics_view`` at /metrics (bearer token required
+outside DEBUG). The registry is
+per-process: scrape every worker, or run a single one behind the scraper.
+"""
+from __future__ import annotations
+
+import bisect
+import hmac
+import threading
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+PHASES = ("auth", "perm", "db", "serialize")
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,
+    "TOKEN": "",
+    "LATENCY_BUCKETS": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    "QUERY_BUCKETS": (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    "SIZE_BUCKETS": (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+}
+
+
+def metrics_config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PERFORMANCE_METRICS", {})}
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        # wall-clock time with at least one phase open; phases overlap, so it is not their sum
+        self.busy = 0.0
+        self._open = 0
+        self._busy_since = 0.0
+        self._depth: Dict[str, int] = {}
+        # queries of async views run on another thread than the view
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def enter(self) -> None:
+        with self._lock:
+            if self._open == 0:
+                self._busy_since = time.perf_counter()
+            self._open += 1
+
+    def leave(self) -> None:
+        with self._lock:
+            self._open -= 1
+            if self._open == 0:
+                self.busy += time.perf_counter() - self._busy_since
+
+    def app(self, total: float) -> float:
+        return max(0.0, total - self.busy)
+
+    def record_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        self.enter()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - started)
+            self.leave()
+
+    def server_timing(self, total: float) -> str:
+        app = self.app(total)
+        parts = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in self.phases.items()]
+        parts[PHASES.index("db")] += f';desc="{self.queries} queries"'
+        parts.append(f"app;dur={app * 1000:.2f}")
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def timed(phase: str):
+    """Add the time spent in the block to ``phase`` of the current request (no-op outside one)."""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    # a nested block of the same phase (e.g. a serializer inside another) is already being timed
+    depth = timings._depth.get(phase, 0)
+    timings._depth[phase] = depth + 1
+    timings.enter()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._depth[phase] = depth
+        if depth == 0:
+            timings.add(phase, time.perf_counter() - started)
+        timings.leave()
+
+
+# Registry
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value:g}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket = _labels(self.labelnames, labels, f'le="{le}"')
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]:g}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        config = metrics_config()
+        self.lock = threading.Lock()
+        self.requests = Counter("http_requests_total", "Requests served.", ("view", "method", "status"))
+        self.duration = Histogram(
+            "http_request_duration_seconds", "Time to build the response.", ("view", "method"),
+            config["LATENCY_BUCKETS"],
+        )
+        self.phases = Histogram(
+            "http_request_phase_seconds",
+            "Time per request spent in auth, perm, db and serialize (which overlap) and in none of them (app).",
+            ("view", "phase"), config["LATENCY_BUCKETS"],
+        )
+        self.queries = Histogram(
+            "http_request_db_queries", "SQL statements per request.", ("view",), config["QUERY_BUCKETS"],
+        )
+        self.size = Histogram(
+            "http_response_size_bytes", "Response body size as sent, after compression (not measured when streaming).",
+            ("view",), config["SIZE_BUCKETS"],
+        )
+        self.metrics = (self.requests, self.duration, self.phases, self.queries, self.size)
+
+    def record(self, view: str, method: str, status: int, total: float, timings: RequestTimings, size: Optional[int]):
+        with self.lock:
+            self.requests.inc((view, method, str(status)))
+            self.duration.observe((view, method), total)
+            for phase, seconds in timings.phases.items():
+                self.phases.observe((view, phase), seconds)
+            self.phases.observe((view, "app"), timings.app(total))
+            self.queries.observe((view,), timings.queries)
+            if size is not None:
+                self.size.observe((view,), size)
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+_registry: Optional[Registry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> Registry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = Registry()
+    return _registry
+
+
+def reset_registry(**kwargs) -> None:
+    global _registry
+    if kwargs.get("setting") not in (None, "PERFORMANCE_METRICS"):
+        return
+    with _registry_lock:
+        _registry = None
+
+
+setting_changed.connect(reset_registry)
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """Install ``wrapper`` as an execute_wrapper on every connection of this thread."""
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(wrapper))
+        yield
+
+
+@asynccontextmanager
+async def awrap_queries(wrapper):
+    """
+    wrap_queries() for async code. Connections are per thread and the async
+    ORM runs its queries through thread-sensitive sync_to_async, so the
+    wrappers are installed and removed on that thread.
+    """
+    stack = ExitStack()
+
+    def install():
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(wrapper))
+
+    await sync_to_async(install)()
+    try:
+        yield
+    finally:
+        await sync_to_async(stack.close)()
+
+
+def view_label(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match._func_path
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of this process's registry. The per-view
+    traffic and error counts are not public: outside DEBUG the endpoint
+    answers only with PERFORMANCE_METRICS['TOKEN'] set and supplied.
+    """
+    token = metrics_config()["TOKEN"]
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, token):
+            return HttpResponseForbidden("metrics token required\n")
+    elif not settings.DEBUG:
+        return HttpResponseForbidden("set METRICS_TOKEN to serve metrics\n")
+    return HttpResponse(get_registry().render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class PerformanceMiddleware:
+    """
+    Times the request (see the module docstring) and, with
+    settings.QUERY_COUNT_HEADER on, also reports the number of SQL statements
+    in an X-Query-Count header for the load tests in benchmarks/.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def enabled(self) -> bool:
+        return metrics_config()["ENABLED"] or getattr(settings, "QUERY_COUNT_HEADER", False)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled():
+            return self.get_response(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with wrap_queries(timings.record_query):
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self.enabled():
+            return await self.get_response(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            async with awrap_queries(timings.record_query):
+                response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        config = metrics_config()
+        total = time.perf_counter() - timings.started
+        if getattr(settings, "QUERY_COUNT_HEADER", False):
+            response["X-Query-Count"] = str(timings.queries)
+        if config["ENABLED"]:
+            if config["SERVER_TIMING"]:
+                response["Server-Timing"] = timings.server_timing(total)
+            view = view_label(request)
+            if view != "metrics":
+                size = None if response.streaming else len(response.content)
+                get_registry().record(view, request.method, response.status_code, total, timings, size)
+        return response
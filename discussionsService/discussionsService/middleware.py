@@ -0,0 +1,63 @@
+import random
+import re
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .logging_utils import debug_sampled_var, request_id_var
+
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+
+class RequestContextMiddleware:
+    """
+    Tags each request with an id (reusing a sane incoming X-Request-ID so
+    logs correlate across services) and rolls the debug-sampling dice once
+    per request according to LOG_DEBUG_SAMPLE_RATE.
+    """
+
+    header = "X-Request-ID"
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        request_id = request.headers.get(self.header, "")
+        if not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+
+        rate = getattr(settings, "LOG_DEBUG_SAMPLE_RATE", 0.0)
+        sampled = rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+        return request_id_var.set(request_id), debug_sampled_var.set(sampled)
+
+    def finish(self, tokens):
+        id_token, sampled_token = tokens
+        debug_sampled_var.reset(sampled_token)
+        request_id_var.reset(id_token)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish(tokens)
+        response[self.header] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        tokens = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish(tokens)
+        response[self.header] = request.request_id
+        return response
+
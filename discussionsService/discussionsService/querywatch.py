@@ -0,0 +1,230 @@
+"""
+Duplicate- and slow-query detection for development and staging.
+
+With QUERY_INSPECTOR['ENABLED'] on, QueryInspectorMiddleware wraps the
+database cursors for each request and fingerprints every statement
+(literals, placeholders and IN lists collapsed, so ``WHERE id = 1`` and
+``WHERE id = 2`` share a shape). At the end of the request it reports:
+
+- ``duplicate``: a shape executed more than DUPLICATE_THRESHOLD times (the
+  usual N+1 signature);
+- ``slow_query``: a statement slower than SLOW_QUERY_MS;
+- ``slow_request``: total time in SQL above REQUEST_DB_BUDGET_MS.
+
+Each issue names the view (URL name) and, for queries run while DRF was
+serializing, the serializer field being rendered (e.g.
+``CommentSerializer.discussion_title``) plus the first line of project code
+on the stack. Issues are logged as warnings on this module's logger; with
+RAISE on a QueryInspectionError is raised instead, which fails any test that
+makes the request. ``inspect_queries()`` applies the same checks to a block
+of code outside a request.
+
+Walking the stack for every statement is slow, so this is off by default.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import awrap_queries, wrap_queries
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": False,
+    "DUPLICATE_THRESHOLD": 5,
+    "SLOW_QUERY_MS": 100,
+    "REQUEST_DB_BUDGET_MS": 500,
+    "RAISE": False,
+}
+
+_IGNORED = re.compile(r"^\s*(SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT|PRAGMA)\b", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+_THIS_FILE = os.path.abspath(__file__)
+_SERIALIZER_WRAPPERS = {"data", "to_representation"}
+
+
+def inspector_config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "QUERY_INSPECTOR", {})}
+
+
+def fingerprint(sql: str) -> str:
+    """The shape of a statement: literals and placeholders become ?, IN lists IN (...)."""
+    shape = _STRING.sub("?", sql.replace("%s", "?"))
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def _attribute(frame) -> tuple:
+    """(serializer field label, first project source line) for the query being executed from ``frame``."""
+    from rest_framework.serializers import BaseSerializer, Serializer
+
+    source, location = None, None
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None:
+        code = frame.f_code
+        if source is None and code.co_name == "to_representation":
+            owner = frame.f_locals.get("self")
+            current = frame.f_locals.get("field")
+            if isinstance(owner, Serializer) and current is not None:
+                source = f"{type(owner).__name__}.{current.field_name}"
+        # the project's serializer wrappers (.data timing) say nothing about the caller
+        wrapper = code.co_name in _SERIALIZER_WRAPPERS and isinstance(frame.f_locals.get("self"), BaseSerializer)
+        if location is None and not wrapper:
+            filename = os.path.abspath(code.co_filename)
+            if filename.startswith(base_dir) and filename != _THIS_FILE and "site-packages" not in filename:
+                location = f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {code.co_name}"
+        if source is not None and location is not None:
+            break
+        frame = frame.f_back
+    return source, location
+
+
+@dataclass
+class QueryIssue:
+    kind: str
+    view: str
+    fingerprint: str = ""
+    count: int = 0
+    duration_ms: float = 0.0
+    sources: List[str] = field(default_factory=list)
+    locations: List[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        where = ", ".join(self.sources + self.locations) or "unknown source"
+        if self.kind == "duplicate":
+            return f"{self.view}: {self.count}x [{self.fingerprint}] from {where}"
+        if self.kind == "slow_query":
+            return f"{self.view}: {self.duration_ms:.1f} ms [{self.fingerprint}] from {where}"
+        return f"{self.view}: {self.duration_ms:.1f} ms in {self.count} queries"
+
+
+class QueryInspectionError(AssertionError):
+    def __init__(self, issues: List[QueryIssue]):
+        self.issues = issues
+        super().__init__("Query issues:\n" + "\n".join(f"  {issue.kind}: {issue.describe()}" for issue in issues))
+
+
+class QueryInspection:
+    """Execute wrapper collecting statement shapes, timings and their origin."""
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = config or inspector_config()
+        self.counts: Counter = Counter()
+        self.sources: Dict[str, Counter] = defaultdict(Counter)
+        self.locations: Dict[str, Counter] = defaultdict(Counter)
+        self.slow: List[tuple] = []
+        self.total_ms = 0.0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.total_ms += elapsed_ms
+            self.queries += 1
+            if not _IGNORED.match(sql):
+                shape = fingerprint(sql)
+                self.counts[shape] += 1
+                source, location = _attribute(sys._getframe(1))
+                if source:
+                    self.sources[shape][source] += 1
+                if location:
+                    self.locations[shape][location] += 1
+                if elapsed_ms > self.config["SLOW_QUERY_MS"]:
+                    self.slow.append((shape, elapsed_ms, source, location))
+
+    def issues(self, view: str) -> List[QueryIssue]:
+        found = []
+        for shape, count in self.counts.most_common():
+            if count <= self.config["DUPLICATE_THRESHOLD"]:
+                break
+            found.append(QueryIssue(
+                "duplicate", view, shape, count,
+                sources=[name for name, _ in self.sources[shape].most_common(3)],
+                locations=[name for name, _ in self.locations[shape].most_common(3)],
+            ))
+        for shape, elapsed_ms, source, location in self.slow:
+            found.append(QueryIssue(
+                "slow_query", view, shape, 1, elapsed_ms,
+                sources=[source] if source else [], locations=[location] if location else [],
+            ))
+        if self.total_ms > self.config["REQUEST_DB_BUDGET_MS"]:
+            found.append(QueryIssue("slow_request", view, count=self.queries, duration_ms=self.total_ms))
+        return found
+
+    def report(self, view: str) -> List[QueryIssue]:
+        issues = self.issues(view)
+        if issues and self.config["RAISE"]:
+            raise QueryInspectionError(issues)
+        for issue in issues:
+            logger.warning(
+                "query %s: %s", issue.kind, issue.describe(),
+                extra={"view": issue.view, "kind": issue.kind, "fingerprint": issue.fingerprint,
+                       "count": issue.count, "duration_ms": round(issue.duration_ms, 2),
+                       "sources": issue.sources, "locations": issue.locations},
+            )
+        return issues
+
+
+@contextmanager
+def inspect_queries(label: str = "block", **overrides):
+    """Apply the request checks to a block: ``with inspect_queries('import', RAISE=True): ...``"""
+    inspection = QueryInspection({**inspector_config(), **overrides})
+    with wrap_queries(inspection):
+        yield inspection
+    inspection.report(label)
+
+
+class QueryInspectorMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = inspector_config()
+        if not config["ENABLED"]:
+            return self.get_response(request)
+        inspection = QueryInspection(config)
+        with wrap_queries(inspection):
+            response = self.get_response(request)
+        return self.finish(request, response, inspection)
+
+    async def __acall__(self, request):
+        config = inspector_config()
+        if not config["ENABLED"]:
+            return await self.get_response(request)
+        inspection = QueryInspection(config)
+        async with awrap_queries(inspection):
+            response = await self.get_response(request)
+        return self.finish(request, response, inspection)
+
+    def finish(self, request, response, inspection):
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match is not None else request.path
+        issues = inspection.report(view)
+        if issues:
+            response["X-Query-Issues"] = str(len(issues))
+        return response
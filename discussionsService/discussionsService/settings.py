@@ -17,8 +17,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from discussionsService.database import database_config, replica_configs, sqlite_pragmas
+from discussionsService.logging_utils import parse_levels
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -56,22 +60,76 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework_simplejwt",
     "base.apps.BaseConfig",
+    "api.apps.ApiConfig",
 ]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'discussionsService.authentication.ExternalJWTAuthentication',
     ],
+    # orjson-backed when orjson is installed, same output as DRF's JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     # "DEFAULT_PERMISSION_CLASSES": [
     #     "rest_framework.permissions.IsAuthenticated",
     #     # "base.permissions.IsOwnerOrAdmin"
     # ],
-}# JWT settings for compatibility with professors-service
+}
+
+# Keyset pagination for the list endpoints in api/views.py. Clients may ask
+# for a smaller or larger page with ?page_size=, but never above MAX_PAGE_SIZE.
+API_PAGINATION = {
+    'PAGE_SIZE': 50,
+    'MAX_PAGE_SIZE': 200,
+}
+
+# Reply threads (GET .../<pk>/thread/, api/threads.py): comments per page, in
+# depth-first order. Threads larger than this continue via the Link header.
+COMMENT_THREADS = {
+    'PAGE_SIZE': 200,
+    'MAX_PAGE_SIZE': 1000,
+}
+
+# Batch comment creation (POST /api/comments/bulk/, /api/course-comments/bulk/).
+BULK_COMMENTS = {
+    'MAX_ITEMS': 5000,
+    'BATCH_SIZE': 500,
+}
+
+# Rows fetched per round-trip by the NDJSON export (api/export.py).
+EXPORT_CHUNK_SIZE = 2000
+
+# Full-text search backend (api/search.py): "auto" uses the SQLite FTS5 index
+# when the migration could create it, otherwise the in-process index.
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "auto")
+# The in-process index is per worker process and only sees that process's
+# writes, so it is rebuilt from the database, on a background thread, once it
+# is older than this many seconds; writes handled by other workers become
+# searchable within about this interval. Set it to
+# "none" for a single-process deployment, where the index never goes stale.
+SEARCH_MEMORY_REFRESH_SECONDS = (
+    None if os.environ.get("SEARCH_MEMORY_REFRESH_SECONDS", "") == "none"
+    else float(os.environ.get("SEARCH_MEMORY_REFRESH_SECONDS", "60"))
+)
+
+# JWT settings for compatibility with professors-service
 SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
+    # ExternalJWTAuthentication keeps this many verified token payloads and
+    # trusts each for at most TTL seconds (never past the token's own exp).
+    # Set the size to 0 to verify every request.
+    'VERIFIED_TOKEN_CACHE_SIZE': 1024,
+    'VERIFIED_TOKEN_CACHE_TTL': 300,
 }
 
 MIDDLEWARE = [
+    "discussionsService.middleware.RequestContextMiddleware",
+    "discussionsService.metrics.PerformanceMiddleware",
+    "discussionsService.compression.CompressionMiddleware",
+    "discussionsService.querywatch.QueryInspectorMiddleware",
+    "discussionsService.db_router.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -104,11 +162,164 @@ WSGI_APPLICATION = "discussionsService.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite in db.sqlite3 unless DB_ENGINE=postgres or DATABASE_URL says
+# otherwise; see discussionsService/database.py for the variables, pooling
+# and the SQLite tuning applied to every new connection.
+
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+    "default": database_config(os.environ, BASE_DIR / "db.sqlite3"),
+    **replica_configs(os.environ),
+}
+SQLITE_PRAGMAS = sqlite_pragmas(os.environ)
+
+# Reads of GET requests go to a random replica, if any are configured; a
+# client that just wrote reads from the primary for STICKY_SECONDS. Locally,
+# DB_REPLICA_URLS=sqlite:///replica.sqlite3 plus `manage.py
+# copy_sqlite_replica` stands in for a real replica.
+DATABASE_ROUTERS = ["discussionsService.db_router.ReplicaRouter"]
+READ_REPLICAS = {
+    "ALIASES": [alias for alias in DATABASES if alias != "default"],
+    "STICKY_SECONDS": int(os.environ.get("DB_REPLICA_STICKY_SECONDS", 5)),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default; point REDIS_URL at a Redis server to share the
+# cache between worker processes.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "discussions-service",
+        }
     }
+
+# Read-through cache for course discussion lookups (see api/cache.py).
+COURSE_DISCUSSION_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# Incremental comment sync (?since=, see api/sync.py). Tombstones of deleted
+# comments older than the retention window are removed by
+# `manage.py purge_comment_tombstones`; older syncs must refetch in full.
+COMMENT_SYNC = {
+    "OVERLAP_SECONDS": 5,
+    "TOMBSTONE_RETENTION_DAYS": 30,
+}
+
+# Soft delete of discussions (see base/purge.py). DELETE only marks the row;
+# its comments are removed in batches on a background thread. Run
+# `manage.py purge_deleted_discussions` periodically to finish purges
+# interrupted by a restart.
+SOFT_DELETE = {
+    "PURGE_IN_BACKGROUND": True,
+    "PURGE_BATCH_SIZE": 500,
+    "PURGE_PAUSE_SECONDS": 0.05,
+}
+
+# Report SQL statements per request in an X-Query-Count header, for the load
+# tests in benchmarks/ (see benchmarks/run_benchmarks.py). Off in production.
+QUERY_COUNT_HEADER = os.environ.get("QUERY_COUNT_HEADER", "") == "1"
+
+# Per-request timings (discussionsService/metrics.py): a Server-Timing header
+# with the auth/perm/db/serialize breakdown, and Prometheus histograms per URL
+# name at /metrics. /metrics requires "Authorization: Bearer <METRICS_TOKEN>";
+# without METRICS_TOKEN it is only served when DEBUG is on.
+PERFORMANCE_METRICS = {
+    "ENABLED": os.environ.get("PERFORMANCE_METRICS", "1") == "1",
+    "SERVER_TIMING": DEBUG or os.environ.get("SERVER_TIMING", "") == "1",
+    "TOKEN": os.environ.get("METRICS_TOKEN", ""),
+}
+
+# gzip/brotli response compression (discussionsService/compression.py; brotli
+# needs the optional brotli package). Bodies under MIN_SIZE bytes and
+# streaming responses are sent uncompressed. Set RESPONSE_COMPRESSION=0 when a
+# proxy in front already compresses.
+RESPONSE_COMPRESSION = {
+    "ENABLED": os.environ.get("RESPONSE_COMPRESSION", "1") != "0",
+    "MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 4,
+}
+
+# Duplicate/slow query detection for development and staging
+# (discussionsService/querywatch.py). QUERY_INSPECTOR=1 logs offending
+# requests with the view and serializer field responsible; QUERY_INSPECTOR=raise
+# makes them fail instead, e.g. `QUERY_INSPECTOR=raise python -m pytest`.
+QUERY_INSPECTOR = {
+    "ENABLED": os.environ.get("QUERY_INSPECTOR", "") in ("1", "raise"),
+    "RAISE": os.environ.get("QUERY_INSPECTOR", "") == "raise",
+    "DUPLICATE_THRESHOLD": 5,      # same statement shape more often than this
+    "SLOW_QUERY_MS": 100,
+    "REQUEST_DB_BUDGET_MS": 500,   # total SQL time per request
+}
+
+# Comment event streams (Server-Sent Events, see api/events.py). Events only
+# reach subscribers in the publishing process unless a shared broker is set.
+# Under WSGI each open stream holds a worker thread until MAX_STREAM_SECONDS;
+# serve the /events/ routes from ASGI (asgi.py) for many listeners.
+EVENT_STREAM = {
+    "BROKER": "api.events.LocalBroker",
+    "BROKER_OPTIONS": {},
+    "REPLAY_SIZE": 200,          # events kept per discussion for Last-Event-ID replay
+    "QUEUE_SIZE": 100,           # a subscriber this far behind is disconnected
+    "HEARTBEAT": 15,             # seconds between keep-alive comments
+    "MAX_STREAM_SECONDS": 300,   # clients reconnect (and replay) after this
+}
+if os.environ.get("REDIS_URL"):
+    EVENT_STREAM["BROKER"] = "api.events.RedisBroker"
+    EVENT_STREAM["BROKER_OPTIONS"] = {"url": os.environ["REDIS_URL"]}
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# JSON lines on stderr, each stamped with the request id. Per-logger levels
+# come from LOG_LEVELS, e.g. LOG_LEVELS="api=DEBUG,discussionsService=INFO".
+# DEBUG records are only emitted for the LOG_DEBUG_SAMPLE_RATE fraction of
+# requests (0.01 = 1%), see discussionsService/logging_utils.py.
+
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.0"))
+
+_LOG_LEVELS = {
+    "api": "INFO",
+    "discussionsService": "INFO",
+    **parse_levels(os.environ.get("LOG_LEVELS", "")),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "request_context": {"()": "discussionsService.logging_utils.RequestContextFilter"},
+    },
+    "formatters": {
+        "json": {"()": "discussionsService.logging_utils.JSONFormatter"},
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "filters": ["request_context"],
+            "formatter": "json",
+        },
+    },
+    "root": {
+        "handlers": ["console"],
+        "level": os.environ.get("LOG_LEVEL", "WARNING"),
+    },
+    "loggers": {
+        name: {"level": level, "handlers": ["console"], "propagate": False}
+        for name, level in _LOG_LEVELS.items()
+    },
 }
 
 